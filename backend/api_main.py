@@ -1,9 +1,43 @@
 # api_main.py
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from app.db import get_connection
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.db import db_cursor, get_pool_stats
+from app.db_async import init_async_pool, close_async_pool
+from app.security import verify_jwt
+from app.services.route_graph_cache import (
+    get_route_graph,
+    get_route_graph_stats,
+    invalidate_route_graph,
+)
+from app.services.journey_planner import preload_timetables
+from app.services.distance_matrix import init_distance_matrix, get_distance_matrix_stats
+from app.services.airport_index import get_airport_index
+from app.services.idempotency import get_idempotency_stats
+from app.services.notification_broker import get_notification_broker_stats
+from app.services.job_queue import start_job_workers, stop_job_workers, get_job_queue_stats
+from app.services.weather_api_service import (
+    get_weather_cache_stats,
+    close_weather_clients,
+    OPENWEATHER_API_KEY,
+)
+from app.services.weather_log_writer import (
+    close_weather_log_writer,
+    get_weather_log_writer_stats,
+)
+from app.services.weather_prefetch import (
+    start_weather_prefetch,
+    stop_weather_prefetch,
+    get_weather_prefetch_stats,
+)
+from app.config import WEATHER_PREFETCH_ENABLED, JOB_WORKERS_ENABLED
+
+# Registers the disruption fan-out job handler with the job queue
+import app.services.disruption_service  # noqa: F401
 
 from app.routes.auth_routes import router as auth_router
 from app.routes.flight_routes import router as flight_router
@@ -11,11 +45,57 @@ from app.routes.booking_routes import router as booking_router
 from app.routes.payment_routes import router as payment_router
 from app.routes.weather_routes import router as weather_router
 from app.routes.price_routes import router as price_router
+from app.routes.airport_routes import router as airport_router
+from app.routes.notification_routes import router as notification_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Async DB pool for the async routes (bookings, price, flight search)
+    try:
+        await init_async_pool()
+    except Exception as e:
+        print("Async DB pool init failed:", e)
+
+    # Warm the route graph cache so the first search doesn't pay for it
+    try:
+        graph = get_route_graph()
+        init_distance_matrix(graph)
+    except Exception as e:
+        print("Route graph warm-up failed:", e)
+
+    try:
+        get_airport_index()
+    except Exception as e:
+        print("Airport index warm-up failed:", e)
+
+    # Preload today's / tomorrow's connection arrays for the journey planner
+    try:
+        preload_timetables()
+    except Exception as e:
+        print("Timetable preload failed:", e)
+
+    # Keep weather for airports with upcoming departures in the cache
+    if WEATHER_PREFETCH_ENABLED and OPENWEATHER_API_KEY:
+        start_weather_prefetch()
+
+    # Background jobs (disruption notification fan-out)
+    if JOB_WORKERS_ENABLED:
+        start_job_workers()
+
+    yield
+
+    stop_job_workers()
+    await stop_weather_prefetch()
+    await close_weather_clients()
+    close_weather_log_writer()
+    await close_async_pool()
 
 
 app = FastAPI(
     title="AirNova Flight System API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ------------ CORS CONFIG ------------
@@ -45,12 +125,9 @@ def read_root():
 @app.get("/health/db")
 def db_health_check():
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        res = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with db_cursor() as cursor:
+            cursor.execute("SELECT 1")
+            res = cursor.fetchone()
         return {"status": "ok", "db_result": res[0]}
     except Exception as e:
         return JSONResponse(
@@ -59,6 +136,76 @@ def db_health_check():
         )
 
 
+@app.get("/health/db/pool")
+def db_pool_stats():
+    return {"status": "ok", "pool": get_pool_stats()}
+
+
+@app.get("/health/route-graph")
+def route_graph_health():
+    return {
+        "status": "ok",
+        "cache": get_route_graph_stats(),
+        "distance_matrix": get_distance_matrix_stats(),
+    }
+
+
+security = HTTPBearer()
+
+
+def require_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """JWT of a user with role ADMIN, else 401 / 403."""
+    payload = verify_jwt(credentials.credentials)
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if payload.get("role") != "ADMIN":
+        raise HTTPException(status_code=403, detail="Admin only")
+    return payload
+
+
+@app.post("/admin/route-graph/invalidate")
+def route_graph_invalidate(admin: dict = Depends(require_admin)):
+    """
+    Call after changing the routes table (seed / admin scripts): the next
+    search in this worker reloads the route graph, and the distance
+    matrix is rebuilt once it no longer matches. Other workers pick the
+    change up within ROUTE_GRAPH_MAX_AGE_SECONDS.
+    """
+    invalidate_route_graph()
+    return {"status": "ok", "cache": get_route_graph_stats()}
+
+
+@app.get("/health/weather")
+def weather_cache_health():
+    return {
+        "status": "ok",
+        "cache": get_weather_cache_stats(),
+        "prefetch": get_weather_prefetch_stats(),
+        "log_writer": get_weather_log_writer_stats(),
+    }
+
+
+@app.get("/health/jobs")
+def job_queue_health():
+    try:
+        return {"status": "ok", "jobs": get_job_queue_stats()}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"status": "error", "detail": str(e)},
+        )
+
+
+@app.get("/health/notifications")
+def notification_stream_health():
+    return {"status": "ok", "broker": get_notification_broker_stats()}
+
+
+@app.get("/health/idempotency")
+def idempotency_health():
+    return {"status": "ok", "keys": get_idempotency_stats()}
+
+
 # Routers
 app.include_router(auth_router)
 app.include_router(flight_router)
@@ -66,4 +213,6 @@ app.include_router(booking_router)
 app.include_router(payment_router) 
 app.include_router(weather_router)
 app.include_router(price_router)
+app.include_router(airport_router)
+app.include_router(notification_router)
 
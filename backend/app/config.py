@@ -14,6 +14,12 @@ DB_CONFIG = {
     "database": os.getenv("DB_NAME"),
 }
 
+# Connection pool (app/db.py)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))                   # connections kept open
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "5"))   # extra ones under bursts
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))          # seconds to wait for one
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"         # health check on borrow
+
 # Secret key for HMAC (booking token)
 SECRET_KEY = os.getenv("SECRET_KEY")
 
@@ -23,3 +29,102 @@ AES_KEY = os.getenv("AES_KEY")
 
 # 🔹 NEW: Weather API key
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+
+# Route graph cache: rebuild from the routes table after this many seconds
+# (0 = only rebuild when invalidated)
+ROUTE_GRAPH_MAX_AGE_SECONDS = int(os.getenv("ROUTE_GRAPH_MAX_AGE_SECONDS", "300"))
+
+# Default path search strategy: dijkstra | bidirectional | astar
+PATH_SEARCH_ALGORITHM = os.getenv("PATH_SEARCH_ALGORITHM", "astar")
+
+# Timetable journey planner (Connection Scan)
+MIN_CONNECTION_MINUTES = int(os.getenv("MIN_CONNECTION_MINUTES", "45"))
+JOURNEY_MAX_LEGS = int(os.getenv("JOURNEY_MAX_LEGS", "4"))
+TIMETABLE_CACHE_SECONDS = int(os.getenv("TIMETABLE_CACHE_SECONDS", "300"))
+TIMETABLE_CACHE_DAYS = int(os.getenv("TIMETABLE_CACHE_DAYS", "14"))
+
+# Precomputed all-pairs distance matrix (memory-mapped, shared by workers)
+USE_DISTANCE_MATRIX = os.getenv("USE_DISTANCE_MATRIX", "0") == "1"
+DISTANCE_MATRIX_DIR = os.getenv("DISTANCE_MATRIX_DIR", "app/ml/model/distance_matrix")
+
+# Airport index (city / code resolution + autocomplete) reload interval
+AIRPORT_INDEX_TTL_SECONDS = int(os.getenv("AIRPORT_INDEX_TTL_SECONDS", "600"))
+
+# Async DB layer (app/db_async.py): "mysql" (aiomysql) or "sqlite" (aiosqlite,
+# local stand-in without a MySQL server)
+ASYNC_DB_BACKEND = os.getenv("ASYNC_DB_BACKEND", "mysql")
+ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "20"))
+ASYNC_SQLITE_PATH = os.getenv("ASYNC_SQLITE_PATH", "airnova_local.db")
+
+# Weather (app/services/weather_api_service.py)
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5")
+WEATHER_CACHE_TTL_SECONDS = int(os.getenv("WEATHER_CACHE_TTL_SECONDS", "600"))     # fresh for
+WEATHER_STALE_SECONDS = int(os.getenv("WEATHER_STALE_SECONDS", "3600"))            # served stale for
+WEATHER_MAX_WAIT_SECONDS = float(os.getenv("WEATHER_MAX_WAIT_SECONDS", "0.5"))     # pricing wait on a miss
+
+# Weather HTTP client: pooled keep-alive connections, retries, circuit breaker
+WEATHER_HTTP_TIMEOUT = float(os.getenv("WEATHER_HTTP_TIMEOUT", "10"))
+WEATHER_HTTP_POOL_SIZE = int(os.getenv("WEATHER_HTTP_POOL_SIZE", "20"))
+WEATHER_HTTP_RETRIES = int(os.getenv("WEATHER_HTTP_RETRIES", "2"))                 # extra attempts
+WEATHER_HTTP_RETRY_BACKOFF = float(os.getenv("WEATHER_HTTP_RETRY_BACKOFF", "0.2")) # seconds, doubles
+WEATHER_BREAKER_FAILURES = int(os.getenv("WEATHER_BREAKER_FAILURES", "5"))         # opens after N in a row
+WEATHER_BREAKER_RESET_SECONDS = float(os.getenv("WEATHER_BREAKER_RESET_SECONDS", "30"))
+
+# Background weather prefetch (app/services/weather_prefetch.py)
+WEATHER_PREFETCH_ENABLED = os.getenv("WEATHER_PREFETCH_ENABLED", "1") == "1"
+WEATHER_PREFETCH_INTERVAL_SECONDS = int(os.getenv("WEATHER_PREFETCH_INTERVAL_SECONDS", "300"))
+WEATHER_PREFETCH_HORIZON_HOURS = int(os.getenv("WEATHER_PREFETCH_HORIZON_HOURS", "24"))
+WEATHER_PREFETCH_CONCURRENCY = int(os.getenv("WEATHER_PREFETCH_CONCURRENCY", "8"))
+WEATHER_PREFETCH_MAX_BACKOFF_SECONDS = int(os.getenv("WEATHER_PREFETCH_MAX_BACKOFF_SECONDS", "1800"))
+
+# Buffered weather_log writes (app/services/weather_log_writer.py)
+WEATHER_LOG_BATCH_SIZE = int(os.getenv("WEATHER_LOG_BATCH_SIZE", "200"))       # flush at this many rows
+WEATHER_LOG_FLUSH_SECONDS = float(os.getenv("WEATHER_LOG_FLUSH_SECONDS", "2"))  # ...or after this long
+WEATHER_LOG_MAX_QUEUE = int(os.getenv("WEATHER_LOG_MAX_QUEUE", "10000"))        # oldest rows dropped past this
+WEATHER_LOG_RETENTION_DAYS = int(os.getenv("WEATHER_LOG_RETENTION_DAYS", "30"))   # raw rows kept, older ones rolled up
+
+# Seat inventory read cache (app/services/seat_inventory.py)
+SEAT_CACHE_SECONDS = float(os.getenv("SEAT_CACHE_SECONDS", "5"))
+
+# Seat map (app/services/seat_map.py)
+SEAT_HOLD_SECONDS = int(os.getenv("SEAT_HOLD_SECONDS", "300"))          # checkout hold length
+SEAT_MAP_CACHE_SECONDS = float(os.getenv("SEAT_MAP_CACHE_SECONDS", "2")) # per-flight map reuse
+
+# Group bookings: encrypt passenger fields in a thread pool from this many
+# passengers up (0 = never)
+BOOKING_PARALLEL_ENCRYPT_MIN = int(os.getenv("BOOKING_PARALLEL_ENCRYPT_MIN", "50"))
+BOOKING_ENCRYPT_WORKERS = int(os.getenv("BOOKING_ENCRYPT_WORKERS", "4"))
+
+# Streaming bulk booking endpoint (/bookings/bulk): max bookings per request
+BULK_BOOKING_MAX_ITEMS = int(os.getenv("BULK_BOOKING_MAX_ITEMS", "500"))
+
+# Idempotency-Key handling for /bookings/create and /payments/pay
+# (app/services/idempotency.py)
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))      # in-process LRU entries
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))           # replays honoured for
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))     # claim lease, renewed every 1/3 while running
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))   # duplicate waits this long
+
+# Background job queue (app/services/job_queue.py)
+JOB_WORKERS_ENABLED = os.getenv("JOB_WORKERS_ENABLED", "1") == "1"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))                              # worker threads
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))                  # idle poll interval
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "5"))  # doubles per attempt
+JOB_MAX_BACKOFF_SECONDS = float(os.getenv("JOB_MAX_BACKOFF_SECONDS", "600"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))                # RUNNING job retried after
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))                # finished jobs kept for
+
+# Live notification stream (/notifications/stream, app/services/notification_broker.py)
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", "100"))        # per stream
+NOTIFICATION_STREAM_MAX_PER_USER = int(os.getenv("NOTIFICATION_STREAM_MAX_PER_USER", "5"))
+NOTIFICATION_STREAM_KEEPALIVE_SECONDS = float(os.getenv("NOTIFICATION_STREAM_KEEPALIVE_SECONDS", "15"))
+NOTIFICATION_STREAM_REPLAY_LIMIT = int(os.getenv("NOTIFICATION_STREAM_REPLAY_LIMIT", "100"))    # on reconnect
+
+# Keyset-paginated lists (/notifications, /bookings/my)
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "20"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "100"))
+
+# Streaming exports (app/services/export_service.py)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "500"))           # rows per fetchmany / write
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "4"))     # DB connections held by exports
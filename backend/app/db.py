@@ -1,14 +1,227 @@
 # app/db.py
 
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
 import mysql.connector
-from mysql.connector import pooling
-from .config import DB_CONFIG
+from .config import (
+    DB_CONFIG,
+    DB_POOL_SIZE,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PRE_PING,
+)
+
+
+class PoolTimeoutError(RuntimeError):
+    """No connection became free within the pool timeout."""
+
+
+# Upper bounds (ms) of the checkout wait-time histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PooledConnection:
+    """
+    Thin proxy around a mysql.connector connection borrowed from the pool.
+    close() hands it back to the pool instead of closing the socket,
+    so existing `conn.close()` calls keep working unchanged.
+    """
+
+    def __init__(self, pool, raw, overflow: bool):
+        self._pool = pool
+        self._raw = raw
+        self._overflow = overflow
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool._release(raw, self._overflow)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Bounded MySQL connection pool.
+
+    - `size` pooled connections (opened lazily, kept idle between uses)
+    - up to `max_overflow` extra connections under burst load, closed on return
+    - callers wait up to `timeout` seconds for a free connection instead of
+      failing immediately, then get PoolTimeoutError
+    - optional health check (ping) on borrow, broken connections are replaced
+    - metrics: checkouts, timeouts, wait-time histogram, in-use gauge
+    """
+
+    def __init__(self, name: str, size: int, max_overflow: int, timeout: float,
+                 pre_ping: bool, **connect_args):
+        self.name = name
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._connect_args = connect_args
+
+        self._cond = threading.Condition()
+        self._idle = []          # raw connections ready to hand out
+        self._opened = 0         # pooled connections currently open
+        self._overflow = 0       # overflow connections currently open
+        self._in_use = 0
+
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "overflow_checkouts": 0,
+            "health_check_failures": 0,
+            "connect_errors": 0,
+        }
+        self._wait_hist = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._wait_total_ms = 0.0
+
+    def _connect(self):
+        try:
+            return mysql.connector.connect(**self._connect_args)
+        except Exception:
+            with self._cond:
+                self._stats["connect_errors"] += 1
+            raise
+
+    def _healthy(self, raw) -> bool:
+        try:
+            # Pings the server; False if the socket went away
+            return raw.is_connected()
+        except Exception:
+            return False
+
+    def get_connection(self) -> PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        raw = None
+        create = None  # "pooled" / "overflow" when we reserved a slot to open
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw = self._idle.pop()
+                    break
+                if self._opened < self.size:
+                    self._opened += 1
+                    create = "pooled"
+                    break
+                if self._overflow < self.max_overflow:
+                    self._overflow += 1
+                    create = "overflow"
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Pool '{self.name}': no connection available after {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+
+        overflow = create == "overflow"
+        try:
+            if create:
+                raw = self._connect()
+            elif self.pre_ping and not self._healthy(raw):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                try:
+                    raw.close()
+                except Exception:
+                    pass
+                raw = self._connect()
+        except Exception:
+            # Give the slot back so waiters aren't starved by a dead server
+            with self._cond:
+                self._in_use -= 1
+                if overflow:
+                    self._overflow -= 1
+                else:
+                    self._opened -= 1
+                self._cond.notify()
+            raise
+
+        waited_ms = (time.monotonic() - start) * 1000
+        with self._cond:
+            self._stats["checkouts"] += 1
+            if overflow:
+                self._stats["overflow_checkouts"] += 1
+            self._wait_hist[bisect.bisect_left(WAIT_BUCKETS_MS, waited_ms)] += 1
+            self._wait_total_ms += waited_ms
+
+        return PooledConnection(self, raw, overflow)
+
+    def _release(self, raw, overflow: bool):
+        # Don't let an unfinished transaction leak into the next borrower
+        reusable = not overflow
+        if reusable:
+            try:
+                if raw.in_transaction:
+                    raw.rollback()
+            except Exception:
+                reusable = False
+
+        if not reusable:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+        with self._cond:
+            self._in_use -= 1
+            if overflow:
+                self._overflow -= 1
+            elif reusable:
+                self._idle.append(raw)
+            else:
+                self._opened -= 1
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            histogram = {}
+            for i, upper in enumerate(WAIT_BUCKETS_MS):
+                histogram[f"le_{upper}ms"] = self._wait_hist[i]
+            histogram["gt_5000ms"] = self._wait_hist[-1]
+
+            checkouts = self._stats["checkouts"]
+            return {
+                "pool": self.name,
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "open": self._opened + self._overflow,
+                "overflow_open": self._overflow,
+                **self._stats,
+                "avg_wait_ms": round(self._wait_total_ms / checkouts, 3) if checkouts else 0.0,
+                "wait_histogram": histogram,
+            }
+
 
 # Create a connection pool so we can reuse DB connections efficiently
-connection_pool = pooling.MySQLConnectionPool(
-    pool_name="air_nova_pool",
-    pool_size=5,               # Max number of active connections
-    **DB_CONFIG                # Unpack DB_CONFIG (host, user, password, database)
+# (connections are opened on first use, not at import time)
+connection_pool = ConnectionPool(
+    name="air_nova_pool",
+    size=DB_POOL_SIZE,                 # Connections kept open
+    max_overflow=DB_POOL_MAX_OVERFLOW, # Extra connections allowed under bursts
+    timeout=DB_POOL_TIMEOUT,           # Seconds to wait for a free connection
+    pre_ping=DB_POOL_PRE_PING,         # Check connection health on borrow
+    **DB_CONFIG                        # Unpack DB_CONFIG (host, user, password, database)
 )
 
 def get_connection():
@@ -16,5 +229,50 @@ def get_connection():
     Get a connection object from the pool.
     Every time we want to talk to MySQL,
     we will call this function instead of creating new connections manually.
+    Call conn.close() (or use db_connection()/db_cursor()) to give it back.
     """
     return connection_pool.get_connection()
+
+
+@contextmanager
+def db_connection():
+    """
+    Borrow a connection for the duration of the block.
+    It always goes back to the pool, even if the block raises.
+    """
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextmanager
+def db_cursor(dictionary: bool = False, commit: bool = False):
+    """
+    Borrow a connection + cursor for the duration of the block:
+
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(...)
+            rows = cursor.fetchall()
+
+    commit=True commits when the block finishes; on an exception the
+    transaction is rolled back. Cursor and connection are always released.
+    """
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=dictionary)
+    try:
+        yield cursor
+        if commit:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_pool_stats() -> dict:
+    """Metrics for the /health/db/pool endpoint."""
+    return connection_pool.stats()
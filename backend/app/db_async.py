@@ -0,0 +1,207 @@
+# app/db_async.py
+
+from contextlib import asynccontextmanager
+
+from .config import DB_CONFIG, ASYNC_DB_BACKEND, ASYNC_DB_POOL_SIZE, ASYNC_SQLITE_PATH
+
+# Async counterpart of app/db.py, used by the async routes.
+#
+# Backends:
+#   "mysql"  -> aiomysql pool against the same DB_CONFIG as the sync pool
+#   "sqlite" -> aiosqlite file (ASYNC_SQLITE_PATH), a local stand-in for
+#               development / tests without a MySQL server
+#
+# Services only see AsyncDB, which takes the same "%s"-style SQL as the
+# sync code and returns rows as dicts. Connections run in autocommit mode;
+# multi-statement writes go inside `async with db.transaction():`.
+
+_pool = None
+
+
+class AsyncDB:
+    """
+    One borrowed connection (autocommit). Use transaction() to group writes.
+    """
+
+    def __init__(self, conn, backend: str):
+        self._conn = conn
+        self._backend = backend
+
+    def _sql(self, sql: str) -> str:
+        if self._backend == "sqlite":
+            return sql.replace("%s", "?")
+        return sql
+
+    async def fetch_one(self, sql: str, params: tuple = ()):
+        return await self._run(sql, params, fetch="one")
+
+    async def fetch_all(self, sql: str, params: tuple = ()) -> list:
+        return await self._run(sql, params, fetch="all")
+
+    async def execute(self, sql: str, params: tuple = ()):
+        """Run a write. Returns (lastrowid, rowcount)."""
+        return await self._run(sql, params, fetch=None)
+
+    async def executemany(self, sql: str, seq_params: list) -> int:
+        """Run a batched write. Returns rowcount."""
+        if self._backend == "sqlite":
+            cur = await self._conn.executemany(self._sql(sql), seq_params)
+            count = cur.rowcount
+            await cur.close()
+            return count
+
+        async with self._conn.cursor() as cur:
+            await cur.executemany(sql, seq_params)
+            return cur.rowcount
+
+    async def stream(self, sql: str, params: tuple = (), chunk_size: int = 500):
+        """
+        Yield the result in lists of up to chunk_size rows, read from an
+        unbuffered (server-side) cursor, so memory doesn't grow with the
+        result size. The connection stays busy until the iteration ends.
+
+            async for rows in db.stream("SELECT ...", (x,)):
+                ...
+        """
+        if self._backend == "sqlite":
+            cur = await self._conn.execute(self._sql(sql), params)
+            try:
+                while True:
+                    rows = await cur.fetchmany(chunk_size)
+                    if not rows:
+                        return
+                    yield [dict(r) for r in rows]
+            finally:
+                await cur.close()
+
+        import aiomysql
+
+        async with self._conn.cursor(aiomysql.SSDictCursor) as cur:
+            await cur.execute(sql, params)
+            while True:
+                rows = await cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield list(rows)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        BEGIN ... COMMIT around the block, ROLLBACK if it raises.
+
+            async with db.transaction():
+                await db.execute(...)
+                await db.executemany(...)
+        """
+        if self._backend == "sqlite":
+            await self._conn.execute("BEGIN")
+        else:
+            await self._conn.begin()
+
+        try:
+            yield self
+        except BaseException:
+            await self._conn.rollback()
+            raise
+        else:
+            await self._conn.commit()
+
+    async def _run(self, sql: str, params: tuple, fetch):
+        if self._backend == "sqlite":
+            cur = await self._conn.execute(self._sql(sql), params)
+            try:
+                if fetch == "one":
+                    row = await cur.fetchone()
+                    return dict(row) if row is not None else None
+                if fetch == "all":
+                    return [dict(r) for r in await cur.fetchall()]
+                return cur.lastrowid, cur.rowcount
+            finally:
+                await cur.close()
+
+        import aiomysql
+
+        async with self._conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(sql, params)
+            if fetch == "one":
+                return await cur.fetchone()
+            if fetch == "all":
+                return list(await cur.fetchall())
+            return cur.lastrowid, cur.rowcount
+
+
+def integrity_errors() -> tuple:
+    """Duplicate-key exception types of the drivers in use (sync and async)."""
+    import sqlite3
+
+    import mysql.connector
+
+    errors = [mysql.connector.errors.IntegrityError, sqlite3.IntegrityError]
+    try:
+        import pymysql  # aiomysql's driver
+
+        errors.append(pymysql.err.IntegrityError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+async def init_async_pool():
+    """Create the async pool (called from the app lifespan)."""
+    global _pool
+
+    if _pool is not None:
+        return
+
+    if ASYNC_DB_BACKEND == "sqlite":
+        # aiosqlite has no pool; connections are opened per borrow
+        _pool = "sqlite"
+        return
+
+    import aiomysql
+
+    _pool = await aiomysql.create_pool(
+        host=DB_CONFIG["host"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        db=DB_CONFIG["database"],
+        minsize=1,
+        maxsize=ASYNC_DB_POOL_SIZE,
+        autocommit=True,
+    )
+
+
+async def close_async_pool():
+    global _pool
+
+    if _pool is not None and _pool != "sqlite":
+        _pool.close()
+        await _pool.wait_closed()
+    _pool = None
+
+
+@asynccontextmanager
+async def async_connection():
+    """
+    Borrow a connection for the duration of the block:
+
+        async with async_connection() as db:
+            row = await db.fetch_one("SELECT ... WHERE id = %s", (x,))
+    """
+    if _pool is None:
+        await init_async_pool()
+
+    if ASYNC_DB_BACKEND == "sqlite":
+        import aiosqlite
+
+        # isolation_level=None -> autocommit; transaction() issues BEGIN itself
+        conn = await aiosqlite.connect(ASYNC_SQLITE_PATH, isolation_level=None)
+        conn.row_factory = aiosqlite.Row
+        try:
+            yield AsyncDB(conn, "sqlite")
+        finally:
+            await conn.close()
+        return
+
+    async with _pool.acquire() as conn:
+        yield AsyncDB(conn, "mysql")
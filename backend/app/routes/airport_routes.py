@@ -0,0 +1,18 @@
+# app/routes/airport_routes.py
+
+from fastapi import APIRouter, Query
+
+from app.services.airport_index import get_airport_index
+
+router = APIRouter(prefix="/airports", tags=["Airports"])
+
+
+@router.get("/suggest")
+def suggest_airports(
+    q: str = Query(..., min_length=1, description="Prefix of a city name or airport code"),
+    limit: int = Query(10, ge=1, le=20)
+):
+    """
+    Typeahead for the search form. Served entirely from memory.
+    """
+    return {"query": q, "airports": get_airport_index().suggest(q, limit)}
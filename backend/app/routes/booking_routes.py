@@ -1,12 +1,40 @@
 # app/routes/booking_routes.py
 
+import json
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError, model_validator
 
-from app.services.booking_service import create_booking, get_user_bookings
+from app.config import BULK_BOOKING_MAX_ITEMS, PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+from app.services.export_service import (
+    EXPORT_FORMAT_PATTERN,
+    MEDIA_TYPES,
+    export_headers,
+    export_rows_async,
+)
+from app.services.booking_service import (
+    create_booking_async,
+    create_itinerary_booking_async,
+    get_all_user_bookings_async,
+    get_user_bookings_async,
+)
+from app.services.idempotency import (
+    IdempotencyInProgressError,
+    IdempotencyKeyReusedError,
+    IdempotencyReplayedError,
+    run_idempotent_async,
+)
+from app.services.pagination import InvalidCursorError
+from app.services.seat_inventory import SeatsUnavailableError
+from app.services.seat_map import (
+    SeatTakenError,
+    get_seat_map_async,
+    hold_seats_async,
+    release_hold_async,
+)
 from app.security import verify_jwt
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
@@ -42,46 +70,258 @@ class BookingRequest(BaseModel):
     passengers: List[Passenger]
 
 
+class ItineraryLeg(BaseModel):
+    flight_id: int
+    seat_no: str
+    price_paid: float
+
+
+class ItineraryRequest(BaseModel):
+    legs: List[ItineraryLeg] = Field(..., min_length=1, max_length=8)
+    passengers: List[Passenger]
+
+    @model_validator(mode="after")
+    def flights_unique(self):
+        if len({leg.flight_id for leg in self.legs}) != len(self.legs):
+            raise ValueError("Each flight can appear only once")
+        return self
+
+
+class SeatHoldRequest(BaseModel):
+    seats: List[str] = Field(..., min_length=1, max_length=9)
+
+
 @router.post("/create")
-def create_booking_api(
+async def create_booking_api(
     req: BookingRequest,
-    user: dict = Depends(get_current_user)
+    response: Response,
+    user: dict = Depends(get_current_user),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
 ):
     """
     Create a booking for the logged-in user.
-    Uses existing create_booking(user_id, flight_id, seat_no, passengers, price_paid)
+    Uses create_booking_async(user_id, flight_id, seat_no, passengers, price_paid)
     from booking_service.py
+
+    With an Idempotency-Key header, a retry of a successful request returns
+    the original response (header Idempotent-Replayed: true) instead of
+    booking again.
     """
     user_id = user.get("user_id")
 
     passenger_dicts = [p.model_dump() for p in req.passengers]
 
+    async def book():
+        try:
+            booking_id, booking_token = await create_booking_async(
+                user_id=user_id,
+                flight_id=req.flight_id,
+                seat_no=req.seat_no,
+                passengers=passenger_dicts,
+                price_paid=req.price_paid
+            )
+        except (SeatsUnavailableError, SeatTakenError) as se:
+            raise HTTPException(status_code=409, detail=str(se))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return {
+            "message": "Booking created successfully",
+            "booking_id": booking_id,
+            "booking_token": booking_token,
+        }
+
+    if idempotency_key is None:
+        return await book()
+
     try:
-        booking_id, booking_token = create_booking(
+        body, replayed = await run_idempotent_async(
+            user_id, "bookings/create", idempotency_key, req.model_dump(), book
+        )
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except IdempotencyReplayedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
+
+
+@router.post("/itinerary")
+async def create_itinerary_api(
+    req: ItineraryRequest,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Book all legs of a multi-flight itinerary for the same passengers in
+    one transaction. If any leg fails (sold out, seat taken) nothing is
+    booked.
+    """
+    try:
+        bookings = await create_itinerary_booking_async(
+            user_id=user.get("user_id"),
+            legs=[leg.model_dump() for leg in req.legs],
+            passengers=[p.model_dump() for p in req.passengers],
+        )
+    except (SeatsUnavailableError, SeatTakenError) as se:
+        raise HTTPException(status_code=409, detail=str(se))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"message": "Itinerary booked successfully", "bookings": bookings}
+
+
+async def _bulk_item(user_id: int, index: int, line: bytes) -> dict:
+    """Book one NDJSON line (single booking or itinerary); never raises."""
+    try:
+        data = json.loads(line)
+        if isinstance(data, dict) and "legs" in data:
+            req = ItineraryRequest.model_validate(data)
+            bookings = await create_itinerary_booking_async(
+                user_id=user_id,
+                legs=[leg.model_dump() for leg in req.legs],
+                passengers=[p.model_dump() for p in req.passengers],
+            )
+            return {"index": index, "status": "ok", "bookings": bookings}
+
+        req = BookingRequest.model_validate(data)
+        booking_id, booking_token = await create_booking_async(
             user_id=user_id,
             flight_id=req.flight_id,
             seat_no=req.seat_no,
-            passengers=passenger_dicts,
-            price_paid=req.price_paid
+            passengers=[p.model_dump() for p in req.passengers],
+            price_paid=req.price_paid,
         )
+        return {"index": index, "status": "ok", "booking_id": booking_id, "booking_token": booking_token}
+
+    except ValidationError as ve:
+        return {"index": index, "status": "error", "detail": ve.errors(include_url=False, include_input=False)}
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        return {"index": index, "status": "error", "detail": str(e)}
 
-    return {
-        "message": "Booking created successfully",
-        "booking_id": booking_id,
-        "booking_token": booking_token,
-    }
+
+@router.post("/bulk")
+async def bulk_bookings_api(
+    request: Request,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Bulk bookings for agencies, as NDJSON (application/x-ndjson):
+    one booking (same body as /bookings/create) or itinerary (same body
+    as /bookings/itinerary) per line, up to BULK_BOOKING_MAX_ITEMS.
+
+    Each line is booked in its own transaction, and its result line is
+    streamed back as soon as it's done:
+        {"index": 0, "status": "ok", "booking_id": ..., "booking_token": ...}
+        {"index": 1, "status": "error", "detail": "..."}
+    """
+    user_id = user.get("user_id")
+
+    # The body is read up front: the streamed response listens on the
+    # same channel for client disconnects.
+    body = await request.body()
+    lines = [line for line in body.split(b"\n") if line.strip()]
+    if len(lines) > BULK_BOOKING_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_BOOKING_MAX_ITEMS} bookings per request",
+        )
+
+    async def results():
+        for index, line in enumerate(lines):
+            result = await _bulk_item(user_id, index, line)
+            yield json.dumps(result, default=str) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
 
 
 @router.get("/my")
-def get_my_bookings(
+async def get_my_bookings(
+    limit: int | None = Query(None, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
     user: dict = Depends(get_current_user)
 ):
     """
-    Return all bookings for the logged-in user.
-    Uses get_user_bookings(user_id) from booking_service.py
+    Bookings of the logged-in user, newest first.
+
+    Without limit / cursor: all of them, {"bookings": [...]} as before.
+    With either: one page (limit defaults to PAGE_SIZE_DEFAULT) plus
+    next_cursor. Uses get_user_bookings_async(user_id, limit, cursor)
+    from booking_service.py
     """
     user_id = user.get("user_id")
-    bookings = get_user_bookings(user_id)
-    return {"bookings": bookings}
+    if limit is None and cursor is None:
+        return {"bookings": await get_all_user_bookings_async(user_id)}
+
+    try:
+        result = await get_user_bookings_async(user_id, limit or PAGE_SIZE_DEFAULT, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"bookings": result["items"], "next_cursor": result["next_cursor"]}
+
+
+@router.get("/export")
+async def export_bookings(
+    fmt: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    user: dict = Depends(get_current_user)
+):
+    """
+    All bookings of the logged-in user, newest first, streamed as
+    NDJSON (default) or CSV (?format=csv).
+    Rows are read and sent in chunks, so any account size works.
+    """
+    return StreamingResponse(
+        export_rows_async("bookings", user.get("user_id"), fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers=export_headers("bookings", fmt),
+    )
+
+
+@router.get("/seatmap/{flight_id}")
+async def get_seat_map(flight_id: int):
+    """
+    Seat map of a flight: taken and held seats, plus a compact bitmap
+    (bit i = seat i unavailable, seat 0 = 1A, 1 = 1B, ...).
+    """
+    seat_map = await get_seat_map_async(flight_id)
+    if seat_map is None:
+        raise HTTPException(status_code=404, detail="Flight not found")
+    return seat_map.to_dict()
+
+
+@router.post("/seatmap/{flight_id}/hold")
+async def hold_seats(
+    flight_id: int,
+    req: SeatHoldRequest,
+    user: dict = Depends(get_current_user)
+):
+    """Hold seats during checkout; /bookings/create then claims them."""
+    try:
+        expires_at = await hold_seats_async(flight_id, req.seats, user.get("user_id"))
+    except SeatTakenError as se:
+        raise HTTPException(status_code=409, detail=str(se))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    return {"flight_id": flight_id, "seats": req.seats, "hold_expires_at": expires_at}
+
+
+@router.delete("/seatmap/{flight_id}/hold")
+async def release_seats(
+    flight_id: int,
+    req: SeatHoldRequest,
+    user: dict = Depends(get_current_user)
+):
+    """Give up held seats (checkout abandoned)."""
+    try:
+        released = await release_hold_async(flight_id, req.seats, user.get("user_id"))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return {"flight_id": flight_id, "released": released}
@@ -1,24 +1,34 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Query, HTTPException
-from app.services.flight_service import resolve_city_to_airport
-from app.services.path_finder import find_shortest_path
+from app.config import MIN_CONNECTION_MINUTES
+from app.services.flight_service import resolve_city_to_airport_async
+from app.services.journey_planner import plan_journeys_async
+from app.services.path_finder import find_shortest_path_async, find_alternative_routes_async
+from app.services.seat_inventory import get_seats_available_async
 
 router = APIRouter(prefix="/flights", tags=["Flights"])
 
 @router.get("/search")
-def search_flights(
+async def search_flights(
     source: str = Query(...),
     destination: str = Query(...),
-    date: str = Query(...)
+    date: str = Query(...),
+    algorithm: str | None = Query(None, description="dijkstra, bidirectional or astar")
 ):
-    source_code = resolve_city_to_airport(source)
+    source_code = await resolve_city_to_airport_async(source)
     if not source_code:
         raise HTTPException(status_code=404, detail="Source not found")
 
-    destination_code = resolve_city_to_airport(destination)
+    destination_code = await resolve_city_to_airport_async(destination)
     if not destination_code:
         raise HTTPException(status_code=404, detail="Destination not found")
 
-    result = find_shortest_path(source_code, destination_code)
+    try:
+        result = await find_shortest_path_async(source_code, destination_code, algorithm)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
     if not result:
         raise HTTPException(status_code=404, detail="No route found")
 
@@ -29,3 +39,93 @@ def search_flights(
         "total_distance": result["total_distance"],
         "route": result["route"]
     }
+
+
+@router.get("/itineraries")
+async def search_itineraries(
+    source: str = Query(...),
+    destination: str = Query(...),
+    date: str = Query(...),
+    k: int = Query(3, ge=1, le=10, description="Number of alternatives"),
+    max_stops: int | None = Query(None, ge=0),
+    max_detour: float | None = Query(None, ge=1.0, description="Max distance vs. shortest, e.g. 1.5")
+):
+    """
+    Ranked alternative routes (shortest first), limited by stops / detour.
+    """
+    source_code = await resolve_city_to_airport_async(source)
+    if not source_code:
+        raise HTTPException(status_code=404, detail="Source not found")
+
+    destination_code = await resolve_city_to_airport_async(destination)
+    if not destination_code:
+        raise HTTPException(status_code=404, detail="Destination not found")
+
+    itineraries = await find_alternative_routes_async(
+        source_code, destination_code,
+        k=k, max_stops=max_stops, max_detour_ratio=max_detour,
+    )
+    if not itineraries:
+        raise HTTPException(status_code=404, detail="No route found")
+
+    return {
+        "source": source_code,
+        "destination": destination_code,
+        "date": date,
+        "itineraries": itineraries
+    }
+
+
+@router.get("/journeys")
+async def search_journeys(
+    source: str = Query(...),
+    destination: str = Query(...),
+    date: str = Query(..., description="YYYY-MM-DD"),
+    depart_after: str | None = Query(None, description="HH:MM"),
+    min_connection: int = Query(MIN_CONNECTION_MINUTES, ge=0, le=24 * 60)
+):
+    """
+    Timetable-based journeys on the given date (actual flights, with a
+    minimum connection time between legs): earliest arrival and fewest
+    transfers.
+    """
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+        depart_after_minutes = 0
+        if depart_after:
+            t = datetime.strptime(depart_after, "%H:%M")
+            depart_after_minutes = t.hour * 60 + t.minute
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date or depart_after format")
+
+    source_code = await resolve_city_to_airport_async(source)
+    if not source_code:
+        raise HTTPException(status_code=404, detail="Source not found")
+
+    destination_code = await resolve_city_to_airport_async(destination)
+    if not destination_code:
+        raise HTTPException(status_code=404, detail="Destination not found")
+
+    result = await plan_journeys_async(
+        source_code, destination_code, day,
+        depart_after_minutes=depart_after_minutes,
+        min_connection=min_connection,
+    )
+    if not result["earliest_arrival"]:
+        raise HTTPException(status_code=404, detail="No journey found on this date")
+
+    return {
+        "source": source_code,
+        "destination": destination_code,
+        "date": date,
+        **result
+    }
+
+
+@router.get("/{flight_id}/seats")
+async def flight_seats(flight_id: int):
+    """Seats left on a flight (from the seat inventory, briefly cached)."""
+    seats = await get_seats_available_async(flight_id)
+    if seats is None:
+        raise HTTPException(status_code=404, detail="Flight not found")
+    return {"flight_id": flight_id, "seats_available": seats}
@@ -0,0 +1,193 @@
+# app/routes/notification_routes.py
+
+import json
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.background import BackgroundTask
+
+from app.config import (
+    NOTIFICATION_STREAM_KEEPALIVE_SECONDS,
+    NOTIFICATION_STREAM_REPLAY_LIMIT,
+    PAGE_SIZE_DEFAULT,
+    PAGE_SIZE_MAX,
+)
+from app.security import verify_jwt
+from app.services.export_service import (
+    EXPORT_FORMAT_PATTERN,
+    MEDIA_TYPES,
+    export_headers,
+    export_rows_async,
+)
+from app.services.notification_broker import TooManyStreamsError, notification_broker
+from app.services.notification_service import (
+    get_notifications_async,
+    get_notifications_after_async,
+    get_unread_count_async,
+    mark_all_read_async,
+    mark_notification_read_async,
+)
+from app.services.pagination import InvalidCursorError
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+security = HTTPBearer(auto_error=False)
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    token: str | None = Query(None, description="JWT, for EventSource clients that can't send headers"),
+):
+    """
+    Same as the other routers' get_current_user, but also accepts the JWT
+    as ?token=..., since browsers' EventSource can't set Authorization.
+    """
+    raw = credentials.credentials if credentials else token
+    payload = verify_jwt(raw) if raw else None
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return payload
+
+
+def _sse(event: str, data, event_id=None) -> str:
+    """One Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("")
+async def list_notifications(
+    include_read: bool = Query(True),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    user: dict = Depends(get_current_user)
+):
+    """Notifications of the logged-in user, newest first, one page at a time."""
+    try:
+        result = await get_notifications_async(user.get("user_id"), include_read, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"notifications": result["items"], "next_cursor": result["next_cursor"]}
+
+
+@router.get("/export")
+async def export_notifications(
+    fmt: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    user: dict = Depends(get_current_user)
+):
+    """
+    All notifications of the logged-in user, newest first, streamed as
+    NDJSON (default) or CSV (?format=csv).
+    Rows are read and sent in chunks, so any account size works.
+    """
+    return StreamingResponse(
+        export_rows_async("notifications", user.get("user_id"), fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers=export_headers("notifications", fmt),
+    )
+
+
+@router.get("/unread-count")
+async def unread_count(user: dict = Depends(get_current_user)):
+    """Number of unread notifications (from the per-user counter)."""
+    return {"unread": await get_unread_count_async(user.get("user_id"))}
+
+
+@router.post("/read-all")
+async def read_all(user: dict = Depends(get_current_user)):
+    """Mark all of the user's notifications as read."""
+    updated = await mark_all_read_async(user.get("user_id"))
+    return {"marked_read": updated}
+
+
+@router.post("/{notification_id}/read")
+async def read_one(notification_id: int, user: dict = Depends(get_current_user)):
+    """Mark one of the user's notifications as read."""
+    if not await mark_notification_read_async(notification_id, user.get("user_id")):
+        raise HTTPException(status_code=404, detail="Unread notification not found")
+    return {"message": "Notification marked as read"}
+
+
+@router.get("/stream")
+async def notification_stream(
+    user: dict = Depends(get_current_user),
+    last_event_id: str | None = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Live notifications as Server-Sent Events (text/event-stream):
+
+        id: 42
+        event: notification
+        data: {"notification_id": 42, "message": "...", ...}
+
+    On reconnect, EventSource sends Last-Event-ID and the notifications
+    missed in between are sent first (up to NOTIFICATION_STREAM_REPLAY_LIMIT).
+    An `event: resync` means some were skipped; reload GET /notifications.
+    Idle streams get a comment line every NOTIFICATION_STREAM_KEEPALIVE_SECONDS.
+    """
+    user_id = user.get("user_id")
+
+    try:
+        after_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    # Subscribe before reading the missed rows, so nothing published in
+    # between is lost (duplicates are skipped by id below)
+    try:
+        sub = notification_broker.subscribe(user_id)
+    except TooManyStreamsError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    missed = []
+    if after_id is not None:
+        try:
+            missed = await get_notifications_after_async(
+                user_id, after_id, NOTIFICATION_STREAM_REPLAY_LIMIT
+            )
+        except Exception as e:
+            notification_broker.unsubscribe(sub)
+            raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        last_id = after_id or 0
+        try:
+            yield "retry: 5000\n\n"
+
+            for row in missed:
+                last_id = row["notification_id"]
+                yield _sse("notification", row, last_id)
+            if len(missed) == NOTIFICATION_STREAM_REPLAY_LIMIT:
+                yield _sse("resync", {"reason": "too_many_missed"})
+
+            while True:
+                if not await sub.wait(NOTIFICATION_STREAM_KEEPALIVE_SECONDS):
+                    yield ": keepalive\n\n"
+                    continue
+
+                for notification in sub.drain():
+                    notification_id = notification.get("notification_id")
+                    if notification_id is not None:
+                        if notification_id <= last_id:
+                            continue
+                        last_id = notification_id
+                    yield _sse("notification", notification, notification_id)
+
+                if sub.overflowed:
+                    sub.overflowed = False
+                    yield _sse("resync", {"reason": "overflow"})
+        finally:
+            notification_broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also runs if the client went away before the stream started
+        background=BackgroundTask(notification_broker.unsubscribe, sub),
+    )
@@ -1,10 +1,23 @@
 # app/routes/payment_routes.py
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, field_validator
 
 from app.security import verify_jwt
+from app.services.export_service import (
+    EXPORT_FORMAT_PATTERN,
+    MEDIA_TYPES,
+    export_headers,
+    export_rows_async,
+)
+from app.services.idempotency import (
+    IdempotencyInProgressError,
+    IdempotencyKeyReusedError,
+    IdempotencyReplayedError,
+    run_idempotent,
+)
 from app.services.payment_service import create_payment
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
@@ -44,7 +57,9 @@ class PaymentRequest(BaseModel):
 @router.post("/pay")
 def pay(
     req: PaymentRequest,
-    user: dict = Depends(get_current_user)
+    response: Response,
+    user: dict = Depends(get_current_user),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
 ):
     """
     Simulated payment endpoint.
@@ -53,34 +68,75 @@ def pay(
     - Encrypts UPI / Card details
     - Stores payment in DB with status=SUCCESS
     - Returns transaction_id (HMAC) for reference
+    - Optional Idempotency-Key header: a retried payment returns the
+      original response or 5xx error (Idempotent-Replayed: true) instead of
+      charging again
     """
     user_id = user.get("user_id")
 
+    def charge():
+        try:
+            result = create_payment(
+                user_id=user_id,
+                booking_id=req.booking_id,
+                amount=req.amount,
+                method=req.method,
+                upi_id=req.upi_id,
+                card_number=req.card_number,
+                card_expiry=req.card_expiry,
+                card_cvv=req.card_cvv,
+            )
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        # For UI, we can return masked info (no raw details)
+        return {
+            "message": "Payment processed (simulated)",
+            "payment_id": result["payment_id"],
+            "transaction_id": result["transaction_id"],
+            "status": result["status"],
+            "method": result["method"],
+            "amount": result["amount"],
+            "paid_at": result["paid_at"],
+        }
+
+    if idempotency_key is None:
+        return charge()
+
     try:
-        result = create_payment(
-            user_id=user_id,
-            booking_id=req.booking_id,
-            amount=req.amount,
-            method=req.method,
-            upi_id=req.upi_id,
-            card_number=req.card_number,
-            card_expiry=req.card_expiry,
-            card_cvv=req.card_cvv,
+        body, replayed = run_idempotent(
+            user_id, "payments/pay", idempotency_key, req.model_dump(), charge
+        )
+    except IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except IdempotencyReplayedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Idempotent-Replayed": "true"},
         )
-    except ValueError as ve:
-        raise HTTPException(status_code=400, detail=str(ve))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    # For UI, we can return masked info (no raw details)
-    response = {
-        "message": "Payment processed (simulated)",
-        "payment_id": result["payment_id"],
-        "transaction_id": result["transaction_id"],
-        "status": result["status"],
-        "method": result["method"],
-        "amount": result["amount"],
-        "paid_at": result["paid_at"],
-    }
-
-    return response
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return body
+
+
+@router.get("/export")
+async def export_payments(
+    fmt: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Payment history of the logged-in user (no card / UPI details), newest
+    first, streamed as NDJSON (default) or CSV (?format=csv).
+    Rows are read and sent in chunks, so any account size works.
+    """
+    return StreamingResponse(
+        export_rows_async("payments", user.get("user_id"), fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers=export_headers("payments", fmt),
+    )
@@ -1,9 +1,14 @@
 # app/routes/price_routes.py
 
+from typing import List
+
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.services.price_service import predict_price_for_flight
+from app.services.price_service import (
+    predict_price_for_flight_async,
+    predict_prices_for_flights_async,
+)
 
 router = APIRouter(prefix="/price", tags=["Price Prediction"])
 
@@ -19,8 +24,17 @@ class PricePredictionResponse(BaseModel):
     model_version: str
 
 
+class BatchPriceRequest(BaseModel):
+    flight_ids: List[int] = Field(..., min_length=1, max_length=200)
+
+
+class BatchPriceResponse(BaseModel):
+    predictions: List[PricePredictionResponse]
+    not_found: List[int]
+
+
 @router.get("/predict", response_model=PricePredictionResponse)
-def get_price_prediction(flight_id: int):
+async def get_price_prediction(flight_id: int):
     """
     Predict price for a given flight_id.
 
@@ -31,7 +45,7 @@ def get_price_prediction(flight_id: int):
     - Return prediction + context
     """
     try:
-        result = predict_price_for_flight(flight_id)
+        result = await predict_price_for_flight_async(flight_id)
         return result
     except ValueError as ve:
         # flight not found or similar
@@ -41,3 +55,21 @@ def get_price_prediction(flight_id: int):
         raise HTTPException(status_code=500, detail=str(re))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error predicting price: {e}")
+
+
+@router.post("/predict/batch", response_model=BatchPriceResponse)
+async def get_batch_price_prediction(req: BatchPriceRequest):
+    """
+    Predict prices for many flights at once (e.g. a search results page).
+
+    One DB query for all flights, one weather lookup per source airport,
+    one model call for the whole batch. Unknown flight_ids are listed in
+    not_found instead of failing the request.
+    """
+    try:
+        return await predict_prices_for_flights_async(req.flight_ids)
+    except RuntimeError as re:
+        # model file missing or similar
+        raise HTTPException(status_code=500, detail=str(re))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error predicting prices: {e}")
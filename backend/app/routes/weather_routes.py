@@ -1,17 +1,21 @@
 # app/routes/weather_routes.py
 
 from fastapi import APIRouter, HTTPException, Query
-from app.services.weather_api_service import fetch_and_store_weather
+from app.services.weather_api_service import fetch_and_store_weather, get_weather_cached
 
 router = APIRouter(prefix="/weather", tags=["Weather"])
 
 
 @router.get("/current")
 def get_weather(
-    airport_code: str = Query(..., description="Airport code, e.g. BLR, DEL")
+    airport_code: str = Query(..., description="Airport code, e.g. BLR, DEL"),
+    refresh: bool = Query(False, description="Skip the cache and call the weather API"),
 ):
     try:
-        simplified = fetch_and_store_weather(airport_code)
+        if refresh:
+            simplified = fetch_and_store_weather(airport_code)
+        else:
+            simplified = get_weather_cached(airport_code)
         return {
             "message": "Weather fetched successfully",
             "data": simplified,
@@ -7,6 +7,7 @@ import hmac
 import hashlib
 import jwt
 from datetime import datetime, timedelta
+from functools import lru_cache
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from argon2 import PasswordHasher
 from .config import SECRET_KEY, AES_KEY
@@ -40,12 +41,18 @@ def verify_password(password: str, stored_hash: str) -> bool:
 # 2️⃣ AES-256-GCM ENCRYPTION & DECRYPTION FOR SENSITIVE DATA
 #===============================================================
 
+@lru_cache(maxsize=1)
+def _aesgcm() -> AESGCM:
+    """One AESGCM instance per process (key setup done once; it's thread-safe)."""
+    return AESGCM(AES_KEY.encode())
+
+
 def encrypt_sensitive(plain_text: str) -> str:
     """
     Encrypt plain text using AES-256-GCM with random nonce.
     Output = base64(nonce + ciphertext + tag)
     """
-    aesgcm = AESGCM(AES_KEY.encode())
+    aesgcm = _aesgcm()
     nonce = os.urandom(12)  # 96-bit nonce recommended for GCM
     ciphertext = aesgcm.encrypt(nonce, plain_text.encode(), None)
     return base64.b64encode(nonce + ciphertext).decode()
@@ -56,7 +63,7 @@ def decrypt_sensitive(encoded_text: str) -> str:
     Decrypt AES-GCM encrypted text.
     Extracts nonce + ciphertext + tag from base64 string.
     """
-    aesgcm = AESGCM(AES_KEY.encode())
+    aesgcm = _aesgcm()
     decoded = base64.b64decode(encoded_text)
     nonce = decoded[:12]
     ciphertext = decoded[12:]
@@ -0,0 +1,61 @@
+# app/services/airport_coords.py
+
+import math
+
+# Bundled (latitude, longitude) table for the airports we route between.
+# Used only as a search heuristic, so approximate values are fine;
+# airports missing here simply get no heuristic guidance.
+AIRPORT_COORDS = {
+    "AMD": (23.0772, 72.6347),
+    "ATQ": (31.7096, 74.7973),
+    "BBI": (20.2444, 85.8178),
+    "BHO": (23.2875, 77.3374),
+    "BLR": (13.1986, 77.7066),
+    "BOM": (19.0896, 72.8656),
+    "CCU": (22.6547, 88.4467),
+    "CJB": (11.0300, 77.0434),
+    "COK": (10.1520, 76.4019),
+    "DEL": (28.5562, 77.1000),
+    "GAU": (26.1061, 91.5859),
+    "GOI": (15.3808, 73.8314),
+    "HBX": (15.3617, 75.0849),
+    "HYD": (17.2403, 78.4294),
+    "IDR": (22.7218, 75.8011),
+    "IXB": (26.6812, 88.3286),
+    "IXC": (30.6735, 76.7885),
+    "IXE": (12.9613, 74.8901),
+    "IXM": (9.8345, 78.0934),
+    "IXR": (23.3143, 85.3217),
+    "IXZ": (11.6412, 92.7297),
+    "JAI": (26.8242, 75.8122),
+    "LKO": (26.7606, 80.8893),
+    "MAA": (12.9941, 80.1709),
+    "MYQ": (12.2300, 76.6558),
+    "NAG": (21.0922, 79.0472),
+    "PAT": (25.5913, 85.0880),
+    "PNQ": (18.5821, 73.9197),
+    "RPR": (21.1804, 81.7388),
+    "SXR": (33.9871, 74.7742),
+    "TRV": (8.4821, 76.9201),
+    "TRZ": (10.7654, 78.7097),
+    "VNS": (25.4524, 82.8593),
+    "VTZ": (17.7212, 83.2245),
+}
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def great_circle_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Haversine distance between two points, in km."""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def get_airport_coords(airport_code: str):
+    """Return (lat, lon) for an airport code, or None if we don't know it."""
+    return AIRPORT_COORDS.get(airport_code.upper())
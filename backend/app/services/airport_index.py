@@ -0,0 +1,206 @@
+# app/services/airport_index.py
+
+import asyncio
+import difflib
+import threading
+import time
+
+from app.config import AIRPORT_INDEX_TTL_SECONDS
+from app.db import get_connection
+from app.db_async import async_connection
+
+SQL_AIRPORTS = "SELECT airport_code, city FROM airports"
+
+
+class _TrieNode:
+    __slots__ = ("children", "codes")
+
+    def __init__(self):
+        self.children = {}
+        self.codes = []   # airport codes whose key passes through this node
+
+
+class AirportIndex:
+    """
+    In-memory view of the airports table.
+
+    - exact, case-insensitive lookup by airport code or city
+    - prefix trie over codes and city names for autocomplete
+    """
+
+    # Keep at most this many codes on each trie node; suggestions never
+    # need more, and it bounds memory for very short prefixes.
+    MAX_CODES_PER_NODE = 20
+
+    def __init__(self, rows: list):
+        self.airports = {}   # code -> {"airport_code", "city"}
+        self.by_code = {}    # lower(code) -> code
+        self.by_city = {}    # lower(city) -> code
+        self.root = _TrieNode()
+
+        for row in sorted(rows, key=lambda r: r["airport_code"]):
+            code = row["airport_code"]
+            city = row.get("city") or ""
+            self.airports[code] = {"airport_code": code, "city": city}
+
+            self.by_code[code.lower()] = code
+            if city:
+                self.by_city.setdefault(city.strip().lower(), code)
+
+            self._insert(code.lower(), code)
+            if city:
+                self._insert(city.strip().lower(), code)
+
+        self._city_keys = list(self.by_city)
+
+    def _insert(self, key: str, code: str):
+        node = self.root
+        for ch in key:
+            node = node.children.setdefault(ch, _TrieNode())
+            if code not in node.codes and len(node.codes) < self.MAX_CODES_PER_NODE:
+                node.codes.append(code)
+
+    def resolve(self, value: str):
+        """Airport code for a code or city name (any case), or None."""
+        key = value.strip().lower()
+        return self.by_code.get(key) or self.by_city.get(key)
+
+    def suggest(self, query: str, limit: int = 10) -> list:
+        """
+        Airports whose code or city starts with `query`.
+        Falls back to close city-name matches (typos) when the prefix
+        finds fewer than `limit`.
+        """
+        key = query.strip().lower()
+        if not key:
+            return []
+
+        codes = []
+        node = self.root
+        for ch in key:
+            node = node.children.get(ch)
+            if node is None:
+                break
+        else:
+            codes = node.codes[:limit]
+
+        if len(codes) < limit:
+            for city in difflib.get_close_matches(key, self._city_keys, n=limit, cutoff=0.75):
+                code = self.by_city[city]
+                if code not in codes:
+                    codes.append(code)
+
+        return [self.airports[c] for c in codes[:limit]]
+
+
+_lock = threading.Lock()
+_index = None
+_loaded_at = 0.0
+_reload_task = None  # asyncio.Task of the running async reload, if any
+
+
+def _load_index() -> AirportIndex:
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute(SQL_AIRPORTS)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return AirportIndex(rows)
+
+
+def get_airport_index() -> AirportIndex:
+    """
+    Shared airport index, reloaded from the DB every
+    AIRPORT_INDEX_TTL_SECONDS. While one request reloads it, others keep
+    using the previous copy.
+    """
+    global _index, _loaded_at
+
+    expired = time.monotonic() - _loaded_at >= AIRPORT_INDEX_TTL_SECONDS
+
+    if _index is not None and not expired:
+        return _index
+
+    # First load waits for the lock; later refreshes are done by whoever
+    # gets it first while the rest serve the old copy
+    if _index is None:
+        _lock.acquire()
+    elif not _lock.acquire(blocking=False):
+        return _index
+
+    try:
+        if _index is None or time.monotonic() - _loaded_at >= AIRPORT_INDEX_TTL_SECONDS:
+            try:
+                _index = _load_index()
+            except Exception as e:
+                if _index is None:
+                    raise
+                # Keep serving the previous copy until the DB is back
+                print("Airport index refresh failed:", e)
+            _loaded_at = time.monotonic()
+        return _index
+    finally:
+        _lock.release()
+
+
+async def _reload_async() -> AirportIndex:
+    global _index, _loaded_at
+
+    try:
+        async with async_connection() as db:
+            rows = await db.fetch_all(SQL_AIRPORTS)
+        index = await asyncio.to_thread(AirportIndex, rows)
+    except Exception as e:
+        if _index is None:
+            raise
+        print("Airport index refresh failed:", e)
+        _loaded_at = time.monotonic()
+        return _index
+
+    with _lock:
+        _index = index
+        _loaded_at = time.monotonic()
+        return _index
+
+
+def _clear_reload_task(task):
+    global _reload_task
+    if _reload_task is task:
+        _reload_task = None
+
+
+async def get_airport_index_async() -> AirportIndex:
+    """
+    Async version of get_airport_index: reloads through the async DB layer.
+    Only one reload runs at a time; concurrent callers wait for it on the
+    first load and keep using the previous copy on later refreshes.
+    """
+    global _reload_task
+
+    expired = time.monotonic() - _loaded_at >= AIRPORT_INDEX_TTL_SECONDS
+    if _index is not None and (not expired or _lock.locked()):
+        return _index
+
+    task = _reload_task
+    if task is not None and task.get_loop() is not asyncio.get_running_loop():
+        task = None  # left over from another event loop
+    if task is None:
+        task = asyncio.ensure_future(_reload_async())
+        task.add_done_callback(_clear_reload_task)
+        _reload_task = task
+    elif _index is not None:
+        return _index
+
+    # shield: a cancelled caller must not cancel the reload others wait on
+    return await asyncio.shield(task)
+
+
+def invalidate_airport_index():
+    """Force a reload on the next lookup (e.g. after adding an airport)."""
+    global _loaded_at
+    _loaded_at = 0.0
@@ -1,4 +1,4 @@
-from app.db import get_connection
+from app.services.airport_index import get_airport_index
 
 def resolve_airport_code(input_value: str) -> str | None:
     """
@@ -8,23 +8,7 @@ def resolve_airport_code(input_value: str) -> str | None:
 
     Returns:
     - airport_code (MYQ) or None
-    """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
 
-    query = """
-        SELECT airport_code
-        FROM airports
-        WHERE LOWER(city) = %s OR LOWER(airport_code) = %s
-        LIMIT 1
+    Served from the in-memory airport index (see airport_index.py).
     """
-
-    val = input_value.lower()
-    cursor.execute(query, (val, val))
-
-    row = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
-
-    return row["airport_code"] if row else None
+    return get_airport_index().resolve(input_value)
@@ -1,7 +1,7 @@
 # app/services/auth_service.py
 
 from mysql.connector import IntegrityError
-from app.db import get_connection
+from app.db import get_connection, db_cursor
 from app.security import hash_password, verify_password, generate_jwt
 
 
@@ -56,20 +56,15 @@ def login_user(email: str, password: str):
     - Generates JWT token
     """
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
     sql = """
     SELECT user_id, name, email, password_hash, role
     FROM users
     WHERE email = %s
     """
 
-    cursor.execute(sql, (email.strip().lower(),))
-    user = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute(sql, (email.strip().lower(),))
+        user = cursor.fetchone()
 
     if not user:
         return None
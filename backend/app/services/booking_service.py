@@ -1,15 +1,228 @@
 # app/services/booking_service.py
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from app.db import get_connection
+
+from app.config import (
+    BOOKING_PARALLEL_ENCRYPT_MIN,
+    BOOKING_ENCRYPT_WORKERS,
+    PAGE_SIZE_DEFAULT,
+    PAGE_SIZE_MAX,
+)
+from app.db import get_connection, db_cursor
+from app.db_async import async_connection
 from app.security import encrypt_sensitive, compute_hmac
+from app.services.pagination import keyset_params, page
+from app.services.seat_inventory import (
+    seats_for_passengers,
+    take_seats,
+    return_seats,
+    take_seats_async,
+    return_seats_async,
+    invalidate_seats,
+)
+from app.services.seat_map import (
+    parse_seats,
+    claim_seats,
+    claim_seats_async,
+    release_booking_seats,
+    release_booking_seats_async,
+    invalidate_seat_map,
+)
+
+# SQL shared by the sync and async versions below
+
+SQL_INSERT_BOOKING = """
+    INSERT INTO bookings
+        (user_id, flight_id, seat_no, booking_token, status, booked_at, price_paid)
+    VALUES
+        (%s, %s, %s, %s, 'CONFIRMED', %s, %s)
+"""
+
+SQL_INSERT_PASSENGER = """
+    INSERT INTO passenger_details
+        (booking_id, name, age, id_proof_encrypted, contact_encrypted)
+    VALUES
+        (%s, %s, %s, %s, %s)
+"""
+
+SQL_CANCEL_BOOKING = """
+    UPDATE bookings
+    SET status = 'CANCELLED'
+    WHERE booking_id = %s AND user_id = %s AND status <> 'CANCELLED'
+"""
+
+# Seats to give back when a booking is cancelled
+SQL_BOOKING_SEATS = """
+    SELECT
+        b.flight_id,
+        (SELECT COUNT(*) FROM passenger_details p WHERE p.booking_id = b.booking_id) AS passengers
+    FROM bookings b
+    WHERE b.booking_id = %s
+"""
+
+SQL_USER_BOOKINGS_PAGE = """
+    SELECT
+        b.booking_id,
+        b.seat_no,
+        b.status,
+        b.booked_at,
+        b.price_paid,
+        b.booking_token,
+        f.flight_number,
+        f.departure_time,
+        f.arrival_time,
+        r.source_airport,
+        r.destination_airport
+    FROM bookings b
+    JOIN flights f ON b.flight_id = f.flight_id
+    JOIN routes r ON f.route_id = r.route_id
+    WHERE b.user_id = %s {after}
+    ORDER BY b.booked_at DESC, b.booking_id DESC
+    LIMIT %s
+"""
+
+# Keyset condition for the page after a cursor (app/services/pagination.py)
+AFTER_CURSOR_FILTER = "AND (b.booked_at < %s OR (b.booked_at = %s AND b.booking_id < %s)) "
+
+
+def _new_booking_tokens(user_id: int, legs: list):
+    """
+    Returns (timestamp_str, [booking_token per leg]).
+    One timestamp for the whole itinerary; it goes into booked_at and
+    every leg's HMAC message.
+    """
+    timestamp_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    tokens = [
+        compute_hmac(f"{user_id}:{leg['flight_id']}:{leg['seat_no']}:{timestamp_str}")
+        for leg in legs
+    ]
+    return timestamp_str, tokens
+
+
+def _encrypt_passenger(p: dict) -> tuple:
+    """Encrypt ID proof & contact: (name, age, id_enc, contact_enc)."""
+    id_enc = encrypt_sensitive(p["id_proof"])
+    contact_enc = encrypt_sensitive(p["contact"])
+    return (p["name"], p["age"], id_enc, contact_enc)
+
+
+_encrypt_pool = None
+
+
+def _parallel_encrypt(passengers: list) -> bool:
+    return 0 < BOOKING_PARALLEL_ENCRYPT_MIN <= len(passengers)
+
+
+def _encrypt_passengers(passengers: list) -> list:
+    """
+    Encrypted passenger fields, in order. Large group bookings
+    (BOOKING_PARALLEL_ENCRYPT_MIN+) are split across a small thread pool;
+    AES-GCM runs in OpenSSL without holding the GIL.
+    """
+    global _encrypt_pool
+    if not _parallel_encrypt(passengers):
+        return [_encrypt_passenger(p) for p in passengers]
+
+    if _encrypt_pool is None:
+        _encrypt_pool = ThreadPoolExecutor(
+            max_workers=BOOKING_ENCRYPT_WORKERS, thread_name_prefix="booking-encrypt"
+        )
+    # One task per worker, not per passenger, to keep scheduling overhead low
+    size = -(-len(passengers) // BOOKING_ENCRYPT_WORKERS)
+    chunks = [passengers[i:i + size] for i in range(0, len(passengers), size)]
+    encrypted = []
+    for part in _encrypt_pool.map(lambda chunk: [_encrypt_passenger(p) for p in chunk], chunks):
+        encrypted.extend(part)
+    return encrypted
+
+
+def _passenger_rows(booking_id: int, encrypted: list) -> list:
+    """passenger_details rows for executemany."""
+    return [(booking_id, *fields) for fields in encrypted]
+
+
+def _leg_order(legs: list) -> list:
+    """
+    Leg indexes in flight_id order: seat rows are always locked in the
+    same order, so two itineraries sharing flights can't deadlock.
+    """
+    return sorted(range(len(legs)), key=lambda i: legs[i]["flight_id"])
+
+
+def _legs_seats(legs: list, seats: int) -> list:
+    """
+    Parsed seat_no of every leg. A leg either names no seats or exactly
+    one per passenger; ValueError otherwise.
+    """
+    labels = [parse_seats(leg["seat_no"]) for leg in legs]
+    for leg, leg_labels in zip(legs, labels):
+        if leg_labels and len(leg_labels) != seats:
+            raise ValueError(
+                f"seat_no lists {len(leg_labels)} seat(s) for {seats} passenger(s) "
+                f"on flight {leg['flight_id']}"
+            )
+    return labels
+
+
+def _write_bookings(cursor, user_id: int, legs: list, encrypted: list) -> list:
+    """
+    All booking statements for one or more legs, inside the caller's
+    transaction (no commit). Every leg gets the same passengers.
+
+    legs: [{"flight_id", "seat_no", "price_paid"}, ...]
+    encrypted: output of _encrypt_passengers
+    Returns [(booking_id, booking_token), ...] in leg order.
+    """
+    # 1) One timestamp + one HMAC per leg
+    timestamp_str, tokens = _new_booking_tokens(user_id, legs)
+    seats = seats_for_passengers(encrypted)
+    labels = _legs_seats(legs, seats)
+    results = [None] * len(legs)
+
+    for i in _leg_order(legs):
+        leg = legs[i]
+
+        # 2) Seats first: locks the flight row, fails fast when sold out
+        take_seats(cursor, leg["flight_id"], seats)
+
+        # 3) Insert into bookings table
+        booking_values = (user_id, leg["flight_id"], leg["seat_no"], tokens[i],
+                          timestamp_str, leg["price_paid"])
+        cursor.execute(SQL_INSERT_BOOKING, booking_values)
+
+        booking_id = cursor.lastrowid  # newly created booking id
+
+        # 4) Seat map: claim the chosen seats
+        claim_seats(cursor, leg["flight_id"], labels[i], booking_id, user_id)
+        results[i] = (booking_id, tokens[i])
+
+    # 5) Passengers of every leg in one multi-row INSERT
+    rows = [row for booking_id, _ in results for row in _passenger_rows(booking_id, encrypted)]
+    if rows:
+        cursor.executemany(SQL_INSERT_PASSENGER, rows)
+
+    return results
+
+
+def _write_booking(cursor, user_id: int, flight_id: int, seat_no: str,
+                   encrypted: list, price_paid: float):
+    """Single-flight _write_bookings. Returns (booking_id, token)."""
+    leg = {"flight_id": flight_id, "seat_no": seat_no, "price_paid": price_paid}
+    return _write_bookings(cursor, user_id, [leg], encrypted)[0]
 
 
 def create_booking(user_id: int, flight_id: int, seat_no: str, passengers: list, price_paid: float):
     """
     Creates a booking:
+    - Takes one seat per passenger from the flight's seat inventory
+      (SeatsUnavailableError if not enough are left)
     - Generates an HMAC booking token
     - Inserts into bookings table
+    - Assigns the seat(s) in seat_no ("12A" or "12A,12B") to the booking
+      (ValueError unless it names one seat per passenger or none;
+      SeatTakenError if booked / held by another user)
     - Encrypts passenger ID & contact and inserts into passenger_details
 
     passengers: list of dicts like:
@@ -23,117 +236,212 @@ def create_booking(user_id: int, flight_id: int, seat_no: str, passengers: list,
             ...
         ]
     """
+    # Encrypt before borrowing a connection, so the transaction stays short
+    encrypted = _encrypt_passengers(passengers)
+
     conn = get_connection()
     cursor = conn.cursor()
 
     try:
-        # 1) Make a timestamp string (for both DB and token)
-        timestamp_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        booking_id, booking_token = _write_booking(
+            cursor, user_id, flight_id, seat_no, encrypted, price_paid
+        )
 
-        # 2) Generate booking token using HMAC
-        message = f"{user_id}:{flight_id}:{seat_no}:{timestamp_str}"
-        booking_token = compute_hmac(message)
+        # 4) Commit all changes
+        conn.commit()
+        _invalidate_flights([flight_id])
 
-        # 3) Insert into bookings table
-        sql_booking = """
-            INSERT INTO bookings
-                (user_id, flight_id, seat_no, booking_token, status, booked_at, price_paid)
-            VALUES
-                (%s, %s, %s, %s, 'CONFIRMED', %s, %s)
-        """
-        booking_values = (user_id, flight_id, seat_no, booking_token, timestamp_str, price_paid)
-        cursor.execute(sql_booking, booking_values)
+        return booking_id, booking_token
 
-        booking_id = cursor.lastrowid  # newly created booking id
+    except Exception as e:
+        conn.rollback()
+        raise e
 
-        # 4) Insert passengers into passenger_details
-        sql_passenger = """
-            INSERT INTO passenger_details
-                (booking_id, name, age, id_proof_encrypted, contact_encrypted)
-            VALUES
-                (%s, %s, %s, %s, %s)
-        """
-
-        for p in passengers:
-            id_enc = encrypt_sensitive(p["id_proof"])
-            contact_enc = encrypt_sensitive(p["contact"])
-
-            cursor.execute(
-                sql_passenger,
-                (booking_id, p["name"], p["age"], id_enc, contact_enc)
-            )
+    finally:
+        cursor.close()
+        conn.close()
 
-        # 5) Commit all changes
-        conn.commit()
 
-        return booking_id, booking_token
+def create_itinerary_booking(user_id: int, legs: list, passengers: list) -> list:
+    """
+    Books every leg of a multi-flight itinerary for the same passengers
+    in ONE transaction: either all legs are booked or none.
 
+    legs: [{"flight_id": 12, "seat_no": "4C", "price_paid": 5400.0}, ...]
+    Returns [{"flight_id", "booking_id", "booking_token"}, ...] in leg order.
+    """
+    encrypted = _encrypt_passengers(passengers)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        results = _write_bookings(cursor, user_id, legs, encrypted)
+        conn.commit()
     except Exception as e:
         conn.rollback()
         raise e
-
     finally:
         cursor.close()
         conn.close()
 
+    _invalidate_flights(leg["flight_id"] for leg in legs)
+    return _itinerary_result(legs, results)
+
+
+def _invalidate_flights(flight_ids):
+    for flight_id in set(flight_ids):
+        invalidate_seats(flight_id)
+        invalidate_seat_map(flight_id)
+
+
+def _itinerary_result(legs: list, results: list) -> list:
+    return [
+        {"flight_id": leg["flight_id"], "booking_id": booking_id, "booking_token": token}
+        for leg, (booking_id, token) in zip(legs, results)
+    ]
+
 
 def cancel_booking(booking_id: int, user_id: int) -> bool:
     """
     Cancels a booking by setting status = 'CANCELLED'
     Only if the booking belongs to the given user.
-    Returns True if a row was updated, else False.
+    Its seats go back to the flight's inventory in the same transaction.
+    Returns True if a row was updated, else False (also when it was
+    already cancelled).
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    with db_cursor(dictionary=True, commit=True) as cursor:
+        cursor.execute(SQL_CANCEL_BOOKING, (booking_id, user_id))
+        if cursor.rowcount == 0:
+            return False
+
+        cursor.execute(SQL_BOOKING_SEATS, (booking_id,))
+        row = cursor.fetchone()
+        return_seats(cursor, row["flight_id"], max(row["passengers"], 1))
+        release_booking_seats(cursor, booking_id)
 
-    sql = """
-        UPDATE bookings
-        SET status = 'CANCELLED'
-        WHERE booking_id = %s AND user_id = %s
+    invalidate_seats(row["flight_id"])
+    invalidate_seat_map(row["flight_id"])
+    return True
+
+
+def _user_bookings_query(user_id: int, limit: int, cursor: str | None) -> tuple:
+    after = keyset_params(cursor)
+    sql = SQL_USER_BOOKINGS_PAGE.format(after=AFTER_CURSOR_FILTER if after else "")
+    return sql, (user_id, *after, limit + 1)
+
+
+def get_user_bookings(user_id: int, limit: int = PAGE_SIZE_DEFAULT,
+                      cursor: str | None = None) -> dict:
     """
+    One page of a user's bookings with basic flight info, newest first.
+    Returns {"items": [...], "next_cursor": ...} (None on the last page).
+    """
+    sql, params = _user_bookings_query(user_id, limit, cursor)
+
+    with db_cursor(dictionary=True) as db_cur:
+        db_cur.execute(sql, params)
+        rows = db_cur.fetchall()
+
+    return page(rows, limit, "booked_at", "booking_id")
+
+
+# ------------------------------------------------------------------ #
+# Async versions (app/db_async.py), used by the async booking routes
+# ------------------------------------------------------------------ #
+
+async def _write_bookings_async(db, user_id: int, legs: list, encrypted: list) -> list:
+    """Async version of _write_bookings (db is an AsyncDB in a transaction)."""
+    timestamp_str, tokens = _new_booking_tokens(user_id, legs)
+    seats = seats_for_passengers(encrypted)
+    labels = _legs_seats(legs, seats)
+    results = [None] * len(legs)
+
+    for i in _leg_order(legs):
+        leg = legs[i]
+        await take_seats_async(db, leg["flight_id"], seats)
+
+        booking_id, _ = await db.execute(
+            SQL_INSERT_BOOKING,
+            (user_id, leg["flight_id"], leg["seat_no"], tokens[i], timestamp_str, leg["price_paid"]),
+        )
+        await claim_seats_async(db, leg["flight_id"], labels[i], booking_id, user_id)
+        results[i] = (booking_id, tokens[i])
+
+    rows = [row for booking_id, _ in results for row in _passenger_rows(booking_id, encrypted)]
+    if rows:
+        await db.executemany(SQL_INSERT_PASSENGER, rows)
+
+    return results
 
-    cursor.execute(sql, (booking_id, user_id))
-    conn.commit()
 
-    updated = cursor.rowcount > 0
+async def _encrypt_passengers_async(passengers: list) -> list:
+    if _parallel_encrypt(passengers):
+        return await asyncio.to_thread(_encrypt_passengers, passengers)
+    return _encrypt_passengers(passengers)
 
-    cursor.close()
-    conn.close()
 
-    return updated
+async def create_booking_async(user_id: int, flight_id: int, seat_no: str, passengers: list, price_paid: float):
+    """Async version of create_booking (same arguments and result)."""
+    encrypted = await _encrypt_passengers_async(passengers)
+    leg = {"flight_id": flight_id, "seat_no": seat_no, "price_paid": price_paid}
 
+    async with async_connection() as db:
+        async with db.transaction():
+            (booking_id, booking_token), = await _write_bookings_async(db, user_id, [leg], encrypted)
 
-def get_user_bookings(user_id: int):
+    _invalidate_flights([flight_id])
+    return booking_id, booking_token
+
+
+async def create_itinerary_booking_async(user_id: int, legs: list, passengers: list) -> list:
+    """Async version of create_itinerary_booking."""
+    encrypted = await _encrypt_passengers_async(passengers)
+
+    async with async_connection() as db:
+        async with db.transaction():
+            results = await _write_bookings_async(db, user_id, legs, encrypted)
+
+    _invalidate_flights(leg["flight_id"] for leg in legs)
+    return _itinerary_result(legs, results)
+
+
+async def cancel_booking_async(booking_id: int, user_id: int) -> bool:
+    """Async version of cancel_booking."""
+    async with async_connection() as db:
+        async with db.transaction():
+            _, rowcount = await db.execute(SQL_CANCEL_BOOKING, (booking_id, user_id))
+            if rowcount == 0:
+                return False
+
+            row = await db.fetch_one(SQL_BOOKING_SEATS, (booking_id,))
+            await return_seats_async(db, row["flight_id"], max(row["passengers"], 1))
+            await release_booking_seats_async(db, booking_id)
+
+    invalidate_seats(row["flight_id"])
+    invalidate_seat_map(row["flight_id"])
+    return True
+
+
+async def get_user_bookings_async(user_id: int, limit: int = PAGE_SIZE_DEFAULT,
+                                  cursor: str | None = None) -> dict:
+    """Async version of get_user_bookings."""
+    sql, params = _user_bookings_query(user_id, limit, cursor)
+    async with async_connection() as db:
+        rows = await db.fetch_all(sql, params)
+    return page(rows, limit, "booked_at", "booking_id")
+
+
+async def get_all_user_bookings_async(user_id: int) -> list:
     """
-    Returns all bookings for a user with basic flight info.
+    Every booking of a user, newest first: the unpaginated list /bookings/my
+    returns without limit / cursor. Read in PAGE_SIZE_MAX keyset pages.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    sql = """
-        SELECT
-            b.booking_id,
-            b.seat_no,
-            b.status,
-            b.booked_at,
-            b.price_paid,
-            b.booking_token,
-            f.flight_number,
-            f.departure_time,
-            f.arrival_time,
-            r.source_airport,
-            r.destination_airport
-        FROM bookings b
-        JOIN flights f ON b.flight_id = f.flight_id
-        JOIN routes r ON f.route_id = r.route_id
-        WHERE b.user_id = %s
-        ORDER BY b.booked_at DESC
-    """
-
-    cursor.execute(sql, (user_id,))
-    rows = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    return rows
+    bookings = []
+    cursor = None
+    while True:
+        result = await get_user_bookings_async(user_id, PAGE_SIZE_MAX, cursor)
+        bookings.extend(result["items"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return bookings
@@ -1,9 +1,73 @@
 # app/services/disruption_service.py
 
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+
 from app.db import get_connection
-from app.services.notification_service import add_notification
-from app.services.flight_service import search_flights
+from app.services.job_queue import enqueue_job, register_job_handler, wake_job_workers
+from app.services.journey_planner import invalidate_timetable
+from app.services.notification_broker import publish_notification
+from app.services.notification_service import insert_notifications
+
+# How many alternatives a disruption message suggests
+MAX_ALTERNATIVES = 3
+
+# Job kind for the notification fan-out (app/services/job_queue.py)
+JOB_DISRUPTION_NOTIFY = "disruption.notify"
+
+SQL_FLIGHT = """
+    SELECT
+        f.flight_id,
+        f.flight_number,
+        f.departure_time,
+        f.arrival_time,
+        f.status,
+        f.route_id,
+        r.source_airport,
+        r.destination_airport
+    FROM flights f
+    JOIN routes r ON f.route_id = r.route_id
+    WHERE f.flight_id = %s
+"""
+
+SQL_FLIGHT_FOR_UPDATE = SQL_FLIGHT + "    FOR UPDATE\n"
+
+SQL_UPDATE_STATUS = "UPDATE flights SET status = %s WHERE flight_id = %s"
+
+# Users with confirmed bookings on the flight (one row per user)
+SQL_AFFECTED_USERS = """
+    SELECT user_id, COUNT(*) AS bookings
+    FROM bookings
+    WHERE flight_id = %s AND status = 'CONFIRMED'
+    GROUP BY user_id
+"""
+
+# Other flights on the same route and day that still fly and have seats
+SQL_ALTERNATIVES = """
+    SELECT flight_id, flight_number, departure_time, arrival_time
+    FROM flights
+    WHERE route_id = %s
+      AND departure_time >= %s
+      AND departure_time < %s
+      AND flight_id <> %s
+      AND status <> 'CANCELLED'
+      AND (seats_available IS NULL OR seats_available > 0)
+    ORDER BY departure_time
+    LIMIT %s
+"""
+
+
+def _stage_timer():
+    """Returns stage(name), which records ms since the previous stage."""
+    timings = {}
+    mark = [time.perf_counter()]
+
+    def stage(name: str):
+        now = time.perf_counter()
+        timings[name] = round((now - mark[0]) * 1000, 3)
+        mark[0] = now
+
+    return timings, stage
 
 
 def update_flight_status_and_notify(flight_id: int, new_status: str):
@@ -11,86 +75,152 @@ def update_flight_status_and_notify(flight_id: int, new_status: str):
     Update flight status (ON_TIME / DELAYED / CANCELLED)
     and notify all users who have CONFIRMED bookings on that flight.
 
-    Also suggests alternative flights on the same route & date.
+    The notifications are sent by a background job (notify_disruption),
+    enqueued in the same transaction as the status change: the caller
+    returns right away, and the job exists if and only if the status
+    change committed.
 
-    Returns: dict with summary info.
+    Returns: dict with summary info, the job_id and timings_ms.
     """
     new_status = new_status.upper()
     if new_status not in ("ON_TIME", "DELAYED", "CANCELLED"):
         raise ValueError("Invalid status. Use ON_TIME, DELAYED or CANCELLED.")
 
+    start = time.perf_counter()
+    timings, stage = _stage_timer()
+
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        # 1) Get current flight info (route, date, etc.)
-        sql_flight = """
-            SELECT
-                f.flight_id,
-                f.flight_number,
-                f.departure_time,
-                f.arrival_time,
-                f.status,
-                r.source_airport,
-                r.destination_airport
-            FROM flights f
-            JOIN routes r ON f.route_id = r.route_id
-            WHERE f.flight_id = %s
-        """
-        cursor.execute(sql_flight, (flight_id,))
+        # 1) Current flight info (row locked until commit)
+        cursor.execute(SQL_FLIGHT_FOR_UPDATE, (flight_id,))
         flight = cursor.fetchone()
 
         if not flight:
             raise ValueError(f"Flight with id {flight_id} not found")
+        stage("load_flight")
 
         # 2) Update status
-        sql_update = "UPDATE flights SET status = %s WHERE flight_id = %s"
-        cursor.execute(sql_update, (new_status, flight_id))
+        cursor.execute(SQL_UPDATE_STATUS, (new_status, flight_id))
+        stage("update_status")
+
+        # 3) Fan-out job; a second update to the same status while the
+        # first job is still pending doesn't notify twice
+        job_id = enqueue_job(
+            JOB_DISRUPTION_NOTIFY,
+            {"flight_id": flight_id, "new_status": new_status},
+            dedup_key=f"disruption:{flight_id}:{new_status}",
+            cursor=cursor,
+        )
+        stage("enqueue")
+
         conn.commit()
+        stage("commit")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    wake_job_workers()
+
+    # Journey planner must stop (or start again) routing through this flight
+    invalidate_timetable(flight["departure_time"].date())
+
+    timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+
+    return {
+        "flight_id": flight_id,
+        "flight_number": flight["flight_number"],
+        "old_status": flight["status"],
+        "new_status": new_status,
+        "notification_job_id": job_id,
+        "timings_ms": timings,
+    }
 
-        # 3) Get all confirmed bookings for this flight
-        sql_bookings = """
-            SELECT b.booking_id, b.user_id, b.seat_no
-            FROM bookings b
-            WHERE b.flight_id = %s AND b.status = 'CONFIRMED'
-        """
-        cursor.execute(sql_bookings, (flight_id,))
-        bookings = cursor.fetchall()
-
-        notified_users = []
-
-        # 4) Find alternative flights on same route & date (if delayed/cancelled)
-        alternatives = []
-        if new_status in ("DELAYED", "CANCELLED"):
-            date_str = flight["departure_time"].strftime("%Y-%m-%d")
-            alternatives = search_flights(
-                flight["source_airport"],
-                flight["destination_airport"],
-                date_str
-            )
-            # Remove the same flight from alternatives list
-            alternatives = [f for f in alternatives if f["flight_id"] != flight_id]
-
-        # 5) Create message and notifications
-        for b in bookings:
-            user_id = b["user_id"]
-            msg = build_disruption_message(flight, new_status, alternatives)
-            add_notification(user_id, msg, "ALERT")
-            notified_users.append(user_id)
 
+def notify_disruption(job, payload: dict) -> dict:
+    """
+    Job handler: notify users with CONFIRMED bookings on the flight.
+
+    Runs on the job's own transaction (job.cursor), which also marks the
+    job DONE, so a retried or taken-over job never notifies twice: one
+    alternatives query, the message built once (it doesn't depend on the
+    booking) and one notification per affected user in a single
+    executemany. If the flight's status has changed since the job was
+    enqueued, nothing is sent (the newer status has its own job).
+    Returns the fan-out summary (stored as the job result).
+    """
+    flight_id = payload["flight_id"]
+    new_status = payload["new_status"]
+    cursor = job.cursor
+
+    start = time.perf_counter()
+    timings, stage = _stage_timer()
+
+    cursor.execute(SQL_FLIGHT, (flight_id,))
+    flight = cursor.fetchone()
+
+    if not flight:
+        raise ValueError(f"Flight with id {flight_id} not found")
+    stage("load_flight")
+
+    if flight["status"] != new_status:
         return {
             "flight_id": flight_id,
-            "flight_number": flight["flight_number"],
-            "old_status": flight["status"],
             "new_status": new_status,
-            "bookings_affected": len(bookings),
-            "users_notified": len(set(notified_users)),
-            "alternatives_found": len(alternatives),
+            "superseded": True,
+            "current_status": flight["status"],
         }
 
-    finally:
-        cursor.close()
-        conn.close()
+    # 1) Users with confirmed bookings on this flight
+    cursor.execute(SQL_AFFECTED_USERS, (flight_id,))
+    affected = cursor.fetchall()
+    stage("load_bookings")
+
+    # 2) Alternative flights on same route & date (if delayed/cancelled)
+    alternatives = []
+    if new_status in ("DELAYED", "CANCELLED") and affected:
+        day_start = datetime.combine(flight["departure_time"].date(), datetime.min.time())
+        cursor.execute(
+            SQL_ALTERNATIVES,
+            (flight["route_id"], day_start, day_start + timedelta(days=1),
+             flight_id, MAX_ALTERNATIVES),
+        )
+        alternatives = cursor.fetchall()
+    stage("alternatives")
+
+    # 3) One message, one notification row per user
+    if affected:
+        msg = build_disruption_message(flight, new_status, alternatives)
+        created = insert_notifications(
+            cursor, [row["user_id"] for row in affected], msg, "ALERT"
+        )
+
+        # 4) Push to users with an open /notifications/stream
+        def publish():
+            for notification in created:
+                publish_notification(notification)
+
+        job.after_commit(publish)
+    stage("notify")
+
+    timings["total"] = round((time.perf_counter() - start) * 1000, 3)
+
+    return {
+        "flight_id": flight_id,
+        "new_status": new_status,
+        "superseded": False,
+        "bookings_affected": sum(row["bookings"] for row in affected),
+        "users_notified": len(affected),
+        "alternatives_found": len(alternatives),
+        "timings_ms": timings,
+    }
+
+
+register_job_handler(JOB_DISRUPTION_NOTIFY, notify_disruption, transactional=True)
 
 
 def build_disruption_message(flight: dict, new_status: str, alternatives: list) -> str:
@@ -0,0 +1,392 @@
+# app/services/distance_matrix.py
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.config import DISTANCE_MATRIX_DIR, USE_DISTANCE_MATRIX
+from app.services.route_graph import RouteGraph
+
+# Precomputed all-pairs shortest distances + next hops, stored as .npy files
+# and opened with mmap so every worker process shares the same pages.
+#
+#   <dir>/meta.json            -> {"codes", "signature", "dist_file", "next_file", "built_at"}
+#   <dir>/dist-<sig>.npy       -> float64 [n, n], inf = unreachable
+#   <dir>/next-<sig>.npy       -> int32 [n, n], next airport index on the path i -> j
+#
+# meta.json is replaced last (atomically), so readers never pair a new
+# matrix with old airport codes. Matrix files are never modified once
+# written: a route change means a new generation under a new signature,
+# either patched from the previous one (new / shorter routes) or fully
+# rebuilt (removed / longer routes, new airports).
+META_FILE = "meta.json"
+RELOAD_CHECK_SECONDS = 2.0
+
+_lock = threading.Lock()
+_state = None          # dict with dist / next / index / signature / meta_mtime
+_checked_at = 0.0
+_rebuild_thread = None
+_pending_graph = None  # newest graph a rebuild was requested for
+_failed_signature = None  # not retried until the routes change again
+_matrix_graph = None   # graph the matrix on disk was last written for by this process
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "full_builds": 0,
+    "incremental_updates": 0,
+}
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+def _matrix_dir() -> Path:
+    return Path(DISTANCE_MATRIX_DIR)
+
+
+# ------------------------------------------------------------------ #
+# Building
+# ------------------------------------------------------------------ #
+
+def compute_matrices(graph: RouteGraph):
+    """
+    Floyd–Warshall over the route graph, vectorised one pivot at a time.
+    Returns (dist, next_hop) NumPy arrays.
+    """
+    n = graph.airport_count
+    idx = np.arange(n)
+
+    dist = np.full((n, n), np.inf)
+    dist[idx, idx] = 0.0
+    next_hop = np.full((n, n), -1, dtype=np.int32)
+    next_hop[idx, idx] = idx
+
+    src = np.repeat(idx, np.diff(np.asarray(graph.offsets)))
+    tgt = np.asarray(graph.targets, dtype=np.int64)
+    w = np.asarray(graph.weights, dtype=np.float64)
+
+    np.minimum.at(dist, (src, tgt), w)
+    off_diag = src != tgt
+    next_hop[src[off_diag], tgt[off_diag]] = tgt[off_diag]
+
+    for k in range(n):
+        via = dist[:, k, None] + dist[None, k, :]
+        better = via < dist
+        if better.any():
+            dist[better] = via[better]
+            next_hop[better] = np.broadcast_to(next_hop[:, k, None], (n, n))[better]
+
+    return dist, next_hop
+
+
+def _temp_path(path: Path) -> Path:
+    """Unique temp file next to `path`: workers writing the same file don't collide."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    os.close(fd)
+    return Path(tmp)
+
+
+def _write_array(path: Path, arr: np.ndarray):
+    tmp = _temp_path(path)
+    try:
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=arr.dtype, shape=arr.shape)
+        out[:] = arr
+        out.flush()
+        del out
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _write_meta(directory: Path, meta: dict):
+    tmp = _temp_path(directory / META_FILE)
+    try:
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, directory / META_FILE)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _remove_unused_files(directory: Path, keep: set):
+    for f in directory.glob("*.npy"):
+        if f.name not in keep:
+            try:
+                f.unlink()  # processes that still map it keep their pages
+            except OSError:
+                pass
+
+
+def _save(graph: RouteGraph, dist: np.ndarray, next_hop: np.ndarray):
+    """Write a new generation for `graph` and switch meta.json over to it."""
+    global _matrix_graph
+
+    directory = _matrix_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    sig = graph.signature
+    dist_file = f"dist-{sig}.npy"
+    next_file = f"next-{sig}.npy"
+    _write_array(directory / dist_file, dist)
+    _write_array(directory / next_file, next_hop)
+
+    _write_meta(directory, {
+        "codes": graph.codes,
+        "signature": sig,
+        "dist_file": dist_file,
+        "next_file": next_file,
+        "built_at": time.time(),
+    })
+    _remove_unused_files(directory, {dist_file, next_file})
+
+    with _lock:
+        _matrix_graph = graph
+
+    _load(force=True)
+
+
+def build_distance_matrix(graph: RouteGraph):
+    """
+    Compute and persist the matrix for `graph`, replacing any previous one.
+    """
+    dist, next_hop = compute_matrices(graph)
+    _save(graph, dist, next_hop)
+
+    _count("full_builds")
+
+
+# ------------------------------------------------------------------ #
+# Loading (memory-mapped, shared across processes)
+# ------------------------------------------------------------------ #
+
+def _load(force: bool = False):
+    """
+    (Re)map the matrix files if meta.json changed since the last check.
+    Returns the current state dict or None when no matrix is on disk.
+    """
+    global _state, _checked_at
+
+    now = time.monotonic()
+    with _lock:
+        if not force and now - _checked_at < RELOAD_CHECK_SECONDS:
+            return _state
+        _checked_at = now
+
+        meta_path = _matrix_dir() / META_FILE
+        try:
+            mtime = meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            _state = None
+            return None
+
+        if not force and _state is not None and _state["meta_mtime"] == mtime:
+            return _state
+
+        meta = json.loads(meta_path.read_text())
+        _state = {
+            "dist": np.load(_matrix_dir() / meta["dist_file"], mmap_mode="r"),
+            "next": np.load(_matrix_dir() / meta["next_file"], mmap_mode="r"),
+            "index": {code: i for i, code in enumerate(meta["codes"])},
+            "codes": meta["codes"],
+            "signature": meta["signature"],
+            "meta": meta,
+            "meta_mtime": mtime,
+        }
+        return _state
+
+
+def lookup_shortest_path(graph: RouteGraph, source: str, destination: str):
+    """
+    O(1) distance lookup + next-hop path reconstruction.
+
+    Returns {"total_distance", "route", "expanded"} or None when the matrix
+    is missing, doesn't match `graph` (routes changed since it was built),
+    or has no path for this pair. Callers fall back to a graph search.
+    A mismatch also starts a background rebuild for `graph`.
+    """
+    state = _load()
+    if state is None or state["signature"] != graph.signature:
+        _count("misses")
+        _schedule_rebuild(graph)
+        return None
+
+    i = state["index"].get(source)
+    j = state["index"].get(destination)
+    if i is None or j is None:
+        _count("misses")
+        return None
+
+    d = float(state["dist"][i, j])
+    if d == np.inf:
+        _count("misses")
+        return None
+
+    codes = state["codes"]
+    next_hop = state["next"]
+    route = [codes[i]]
+    node = i
+    while node != j:
+        node = int(next_hop[node, j])
+        if node < 0 or len(route) > len(codes):
+            # Broken next-hop chain; let the caller search instead
+            _count("misses")
+            return None
+        route.append(codes[node])
+
+    _count("hits")
+    return {
+        "total_distance": int(d) if d.is_integer() else d,
+        "route": route,
+        "expanded": 0,
+    }
+
+
+# ------------------------------------------------------------------ #
+# Incremental updates
+# ------------------------------------------------------------------ #
+
+def _edge_weights(graph: RouteGraph) -> dict:
+    """(i, j) -> shortest direct distance, over airport indexes."""
+    weights = {}
+    offsets, targets, w = graph.offsets, graph.targets, graph.weights
+    for i in range(graph.airport_count):
+        for e in range(offsets[i], offsets[i + 1]):
+            key = (i, targets[e])
+            if key not in weights or w[e] < weights[key]:
+                weights[key] = w[e]
+    return weights
+
+
+def _shortened_edges(old: RouteGraph, new: RouteGraph):
+    """
+    Edges of `new` that are new or shorter than in `old`, or None when
+    the change can lengthen some path (route removed / longer, airports
+    changed) and needs a full build.
+    """
+    if old.codes != new.codes:
+        return None
+    old_w = _edge_weights(old)
+    new_w = _edge_weights(new)
+    for key, w in old_w.items():
+        if key not in new_w or new_w[key] > w:
+            return None
+    return [(u, v, w) for (u, v), w in new_w.items() if w < old_w.get((u, v), np.inf)]
+
+
+def _relax_edge(dist: np.ndarray, next_hop: np.ndarray, u: int, v: int, w: float):
+    """Improve every pair whose shortest path can now go i -> u -> v -> j."""
+    via = dist[:, u, None] + w + dist[None, v, :]
+    better = via < dist
+    if not better.any():
+        return
+
+    rows, cols = np.nonzero(better)
+    hops = next_hop[rows, u].copy()
+    hops[rows == u] = v
+
+    dist[rows, cols] = via[rows, cols]
+    next_hop[rows, cols] = hops
+
+
+def update_distance_matrix(old: RouteGraph, graph: RouteGraph) -> bool:
+    """
+    Derive the matrix for `graph` from the one built for `old` when the
+    routes only got shorter / were added: one O(n^2) relaxation per
+    changed edge on a private copy, saved as a new generation.
+    Returns False (nothing written) when a full build is needed.
+    """
+    state = _load(force=True)
+    if state is None or state["signature"] != old.signature or state["codes"] != graph.codes:
+        return False
+    changed = _shortened_edges(old, graph)
+    if changed is None:
+        return False
+
+    dist = np.array(state["dist"])
+    next_hop = np.array(state["next"])
+    for u, v, w in changed:
+        _relax_edge(dist, next_hop, u, v, float(w))
+    _save(graph, dist, next_hop)
+
+    _count("incremental_updates")
+    return True
+
+
+# ------------------------------------------------------------------ #
+# Background rebuilds
+# ------------------------------------------------------------------ #
+
+def _rebuild_loop():
+    """
+    Build for the newest requested graph until no request is pending, so
+    route changes that arrive mid-build are not lost. Patches the
+    previous generation when possible, else runs a full build.
+    """
+    global _rebuild_thread, _pending_graph, _failed_signature
+
+    while True:
+        with _lock:
+            graph, _pending_graph = _pending_graph, None
+            if graph is None:
+                _rebuild_thread = None
+                return
+
+        state = _load(force=True)
+        if state is not None and state["signature"] == graph.signature:
+            continue  # already built (e.g. by another process)
+
+        try:
+            old = _matrix_graph
+            if old is None or not update_distance_matrix(old, graph):
+                build_distance_matrix(graph)
+        except Exception as e:
+            with _lock:
+                _failed_signature = graph.signature
+            print("Distance matrix build failed:", e)
+
+
+def _schedule_rebuild(graph: RouteGraph):
+    global _rebuild_thread, _pending_graph
+
+    with _lock:
+        if graph.signature == _failed_signature:
+            return
+        _pending_graph = graph
+        if _rebuild_thread is not None:
+            return  # the running thread picks it up when its build ends
+        _rebuild_thread = threading.Thread(target=_rebuild_loop, daemon=True)
+        _rebuild_thread.start()
+
+
+def init_distance_matrix(graph: RouteGraph):
+    """
+    Startup hook: build the matrix in the background if the one on disk
+    doesn't match the current routes.
+    """
+    if not USE_DISTANCE_MATRIX:
+        return
+
+    state = _load(force=True)
+    if state is None or state["signature"] != graph.signature:
+        _schedule_rebuild(graph)
+
+
+def get_distance_matrix_stats() -> dict:
+    state = _state
+    with _lock:
+        stats = dict(_stats)
+    return {
+        **stats,
+        "enabled": USE_DISTANCE_MATRIX,
+        "airports": len(state["codes"]) if state else 0,
+        "signature": state["signature"] if state else None,
+    }
@@ -0,0 +1,116 @@
+# app/services/export_service.py
+
+import asyncio
+import csv
+import io
+import json
+
+from app.config import EXPORT_CHUNK_SIZE, EXPORT_MAX_CONCURRENT
+from app.db_async import async_connection
+
+# Streaming exports of a user's history (bookings, notifications,
+# payments) as NDJSON or CSV.
+#
+# Rows come from AsyncDB.stream() (unbuffered cursor, fetchmany of
+# EXPORT_CHUNK_SIZE) and each chunk is encoded and yielded before the
+# next one is read, so memory stays flat whatever the account size.
+# An export holds a DB connection for as long as the client reads;
+# EXPORT_MAX_CONCURRENT caps how many do at once.
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_FORMAT_PATTERN = "^(ndjson|csv)$"
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# kind -> (columns, SQL). Encrypted payment details are never exported.
+EXPORTS = {
+    "bookings": (
+        (
+            "booking_id", "status", "seat_no", "booked_at", "price_paid", "booking_token",
+            "flight_number", "departure_time", "arrival_time",
+            "source_airport", "destination_airport",
+        ),
+        """
+            SELECT
+                b.booking_id, b.status, b.seat_no, b.booked_at, b.price_paid, b.booking_token,
+                f.flight_number, f.departure_time, f.arrival_time,
+                r.source_airport, r.destination_airport
+            FROM bookings b
+            JOIN flights f ON b.flight_id = f.flight_id
+            JOIN routes r ON f.route_id = r.route_id
+            WHERE b.user_id = %s
+            ORDER BY b.booked_at DESC, b.booking_id DESC
+        """,
+    ),
+    "notifications": (
+        ("notification_id", "type", "message", "created_at", "is_read"),
+        """
+            SELECT notification_id, type, message, created_at, is_read
+            FROM notifications
+            WHERE user_id = %s
+            ORDER BY created_at DESC, notification_id DESC
+        """,
+    ),
+    "payments": (
+        ("payment_id", "booking_id", "amount", "method", "status", "paid_at"),
+        """
+            SELECT p.payment_id, p.booking_id, p.amount, p.method, p.status, p.paid_at
+            FROM payments p
+            JOIN bookings b ON p.booking_id = b.booking_id
+            WHERE b.user_id = %s
+            ORDER BY p.paid_at DESC, p.payment_id DESC
+        """,
+    ),
+}
+
+_slots = asyncio.Semaphore(EXPORT_MAX_CONCURRENT)
+
+
+def _ndjson_chunk(rows: list) -> str:
+    return "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+
+def _csv_chunk(columns: tuple, rows: list) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows([row[col] for col in columns] for row in rows)
+    return buf.getvalue()
+
+
+def _csv_header(columns: tuple) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(columns)
+    return buf.getvalue()
+
+
+def export_headers(kind: str, fmt: str) -> dict:
+    """Response headers: download as <kind>.<fmt>."""
+    return {"Content-Disposition": f'attachment; filename="{kind}.{fmt}"'}
+
+
+async def export_rows_async(kind: str, user_id: int, fmt: str):
+    """
+    Async generator of text chunks: the user's `kind` rows, newest first,
+    as NDJSON (one object per line) or CSV (header line first).
+    """
+    if kind not in EXPORTS:
+        raise ValueError(f"Unknown export '{kind}'")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    columns, sql = EXPORTS[kind]
+
+    # First bytes go out before the query runs
+    if fmt == "csv":
+        yield _csv_header(columns)
+
+    async with _slots:
+        async with async_connection() as db:
+            async for rows in db.stream(sql, (user_id,), EXPORT_CHUNK_SIZE):
+                if fmt == "csv":
+                    yield _csv_chunk(columns, rows)
+                else:
+                    yield _ndjson_chunk(rows)
@@ -1,17 +1,14 @@
-from app.db import get_connection
+from app.services.airport_index import get_airport_index, get_airport_index_async
 
 def resolve_city_to_airport(city_name: str):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    """
+    City name (or airport code) -> airport code, case-insensitive.
+    Served from the in-memory airport index, no DB round-trip.
+    """
+    return get_airport_index().resolve(city_name)
 
-    cursor.execute(
-        "SELECT airport_code FROM airports WHERE city = %s",
-        (city_name,)
-    )
-    row = cursor.fetchone()
-    conn.close()
 
-    if not row:
-        return None
-
-    return row["airport_code"]
+async def resolve_city_to_airport_async(city_name: str):
+    """Async version of resolve_city_to_airport."""
+    index = await get_airport_index_async()
+    return index.resolve(city_name)
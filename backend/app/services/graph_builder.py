@@ -1,6 +1,35 @@
 from app.db import get_connection
+from app.db_async import async_connection
 
-def build_graph():
+SQL_ROUTE_ROWS = """
+    SELECT source_airport, destination_airport, distance_km
+    FROM routes
+"""
+
+
+def fetch_route_rows():
+    """
+    Read every (source_airport, destination_airport, distance_km) row
+    from the routes table.
+    """
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute(SQL_ROUTE_ROWS)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+async def fetch_route_rows_async():
+    """Async version of fetch_route_rows."""
+    async with async_connection() as db:
+        return await db.fetch_all(SQL_ROUTE_ROWS)
+
+
+def build_graph(rows=None, bidirectional: bool = False):
     """
     Builds adjacency list graph from routes table.
     Graph format:
@@ -9,28 +38,23 @@ def build_graph():
       'BLR': [('HYD', 570)],
       ...
     }
-    """
-    graph = {}
 
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+    rows: optional pre-fetched route rows (defaults to reading the table).
+    bidirectional: also add the reverse edge for every route.
+    """
+    if rows is None:
+        rows = fetch_route_rows()
 
-    cursor.execute("""
-        SELECT source_airport, destination_airport, distance_km
-        FROM routes
-    """)
+    graph = {}
 
-    for row in cursor.fetchall():
+    for row in rows:
         src = row["source_airport"]
         dst = row["destination_airport"]
         dist = row["distance_km"]
 
-        if src not in graph:
-            graph[src] = []
-
-        graph[src].append((dst, dist))
+        graph.setdefault(src, []).append((dst, dist))
 
-    cursor.close()
-    conn.close()
+        if bidirectional:
+            graph.setdefault(dst, []).append((src, dist))
 
     return graph
@@ -0,0 +1,492 @@
+# app/services/idempotency.py
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from app.config import (
+    IDEMPOTENCY_CACHE_SIZE,
+    IDEMPOTENCY_TTL_HOURS,
+    IDEMPOTENCY_LOCK_SECONDS,
+    IDEMPOTENCY_WAIT_SECONDS,
+)
+from app.db import db_cursor
+from app.db_async import async_connection, integrity_errors
+from app.security import compute_hmac
+
+# Idempotency-Key support for POSTs that create rows (bookings, payments).
+#
+# A key is scoped to (user_id, endpoint). The first request for a key
+# claims it by inserting its idempotency_keys row (migrations/006); the
+# primary key makes that claim atomic across workers. When the handler
+# finishes its outcome is stored in the row (and then in a bounded
+# in-process LRU), and every later request with the same key gets that
+# outcome back without running the handler again.
+#
+# - a duplicate arriving while the original is still running waits for it
+#   (up to IDEMPOTENCY_WAIT_SECONDS), then IdempotencyInProgressError
+# - the same key with a different body is IdempotencyKeyReusedError
+# - a handler failing with a 4xx (status_code < 500: validation, seat
+#   taken...) changed nothing, so its claim is deleted and the client can
+#   retry the key
+# - any other failure (5xx, unexpected exception) may have happened after
+#   the handler committed, so it is stored like a response and replayed as
+#   IdempotencyReplayedError; the key is never run twice
+# - a response older than IDEMPOTENCY_TTL_HOURS can be taken over
+#
+# The claim is a lease: locked_until = now + IDEMPOTENCY_LOCK_SECONDS,
+# pushed forward every IDEMPOTENCY_LOCK_SECONDS / 3 while the handler
+# runs. Only a claim whose owner stopped renewing it (crashed / killed
+# worker, cancelled request) expires and can be taken over, so a slow
+# handler is not run a second time. The handler's own transaction and the
+# stored outcome are separate commits: if storing fails the claim is kept
+# (not released), and a retry waits for the lease to expire.
+
+POLL_SECONDS = 0.1
+
+
+class IdempotencyKeyReusedError(Exception):
+    """The key was already used for a request with a different body."""
+
+
+class IdempotencyInProgressError(Exception):
+    """The original request for this key is still running."""
+
+
+class IdempotencyReplayedError(Exception):
+    """The original request for this key failed; replays its error."""
+
+    def __init__(self, status_code: int, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+SQL_CLAIM_KEY = """
+    INSERT INTO idempotency_keys
+        (user_id, scope, idem_key, request_hash, locked_until, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+SQL_GET_KEY = """
+    SELECT request_hash, response_body, locked_until, created_at
+    FROM idempotency_keys
+    WHERE user_id = %s AND scope = %s AND idem_key = %s
+"""
+
+# Take over an abandoned claim or an expired response. The WHERE clause
+# repeats the check, so only one of several racing requests gets it.
+SQL_TAKE_OVER_KEY = """
+    UPDATE idempotency_keys
+    SET request_hash = %s, response_body = NULL, locked_until = %s, created_at = %s
+    WHERE user_id = %s AND scope = %s AND idem_key = %s
+      AND ((response_body IS NULL AND locked_until < %s) OR created_at < %s)
+"""
+
+# Lease heartbeat of a running handler
+SQL_EXTEND_LOCK = """
+    UPDATE idempotency_keys
+    SET locked_until = %s
+    WHERE user_id = %s AND scope = %s AND idem_key = %s
+      AND request_hash = %s AND response_body IS NULL
+"""
+
+SQL_STORE_RESPONSE = """
+    UPDATE idempotency_keys
+    SET response_body = %s, locked_until = NULL
+    WHERE user_id = %s AND scope = %s AND idem_key = %s
+"""
+
+SQL_RELEASE_KEY = """
+    DELETE FROM idempotency_keys
+    WHERE user_id = %s AND scope = %s AND idem_key = %s AND response_body IS NULL
+"""
+
+SQL_PRUNE_KEYS = """
+    DELETE FROM idempotency_keys
+    WHERE created_at < %s
+"""
+
+
+# ------------------------------------------------------------------ #
+# In-process LRU of finished responses
+# ------------------------------------------------------------------ #
+
+_lock = threading.Lock()
+_responses = OrderedDict()  # (user_id, scope, key) -> (stored_at, request_hash, outcome)
+_stats = {
+    "executed": 0,
+    "replayed": 0,
+    "lru_hits": 0,
+    "waited": 0,
+    "conflicts": 0,
+    "errors_stored": 0,
+    "store_failures": 0,
+}
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+def _lru_get(full_key: tuple):
+    with _lock:
+        entry = _responses.get(full_key)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > IDEMPOTENCY_TTL_HOURS * 3600:
+            del _responses[full_key]
+            return None
+        _responses.move_to_end(full_key)
+        _stats["lru_hits"] += 1
+        return entry
+
+
+def _lru_put(full_key: tuple, request_hash: str, outcome: dict):
+    with _lock:
+        _responses[full_key] = (time.time(), request_hash, outcome)
+        _responses.move_to_end(full_key)
+        while len(_responses) > IDEMPOTENCY_CACHE_SIZE:
+            _responses.popitem(last=False)
+
+
+def get_idempotency_stats() -> dict:
+    with _lock:
+        return {"cached": len(_responses), **_stats}
+
+
+# ------------------------------------------------------------------ #
+# Helpers shared by the sync and async versions
+# ------------------------------------------------------------------ #
+
+def request_hash(payload) -> str:
+    """
+    Fingerprint of the request body (key order doesn't matter).
+    Keyed with SECRET_KEY (HMAC-SHA256): bodies carry card numbers / CVVs,
+    and a plain hash of a low-entropy field can be brute-forced from the
+    stored value.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return compute_hmac(canonical)
+
+
+def _check_hash(stored_hash: str, req_hash: str):
+    if stored_hash != req_hash:
+        _count("conflicts")
+        raise IdempotencyKeyReusedError(
+            "Idempotency-Key was already used with a different request body"
+        )
+
+
+def _claim_params(full_key: tuple, req_hash: str, now: datetime) -> tuple:
+    return (*full_key, req_hash, now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS), now)
+
+
+def _take_over_params(full_key: tuple, req_hash: str, now: datetime) -> tuple:
+    return (
+        req_hash,
+        now + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+        now,
+        *full_key,
+        now,
+        now - timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+    )
+
+
+def _as_datetime(value):
+    # aiosqlite hands DATETIME columns back as ISO strings
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _row_state(row: dict, req_hash: str, now: datetime) -> str:
+    """
+    What to do with an existing row:
+      "done"      -> replay response_body
+      "busy"      -> the original is still running, wait for it
+      "take_over" -> abandoned claim or expired response, claim it again
+    """
+    if _as_datetime(row["created_at"]) < now - timedelta(hours=IDEMPOTENCY_TTL_HOURS):
+        return "take_over"
+    _check_hash(row["request_hash"], req_hash)
+    if row["response_body"] is not None:
+        return "done"
+    if _as_datetime(row["locked_until"]) < now:
+        return "take_over"
+    return "busy"
+
+
+def _lease_until() -> datetime:
+    return datetime.now() + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+
+
+def _heartbeat_interval() -> float:
+    return max(IDEMPOTENCY_LOCK_SECONDS / 3, 0.1)
+
+
+def _outcome(exc: BaseException):
+    """
+    Stored outcome for a failed handler, or None when the claim should be
+    released (4xx) or left to expire (cancellation, interpreter exit).
+    """
+    status_code = getattr(exc, "status_code", None)
+    if status_code is not None and status_code < 500:
+        return None
+    if not isinstance(exc, Exception):
+        return None
+    return {"error": {
+        "status_code": status_code or 500,
+        "detail": getattr(exc, "detail", None) or "Internal server error",
+    }}
+
+
+def _replay(outcome: dict):
+    """Body of a stored outcome; a stored failure is raised again."""
+    _count("replayed")
+    if "error" in outcome:
+        error = outcome["error"]
+        raise IdempotencyReplayedError(error["status_code"], error["detail"])
+    return outcome["body"]
+
+
+def _in_progress_error() -> IdempotencyInProgressError:
+    return IdempotencyInProgressError(
+        "A request with this Idempotency-Key is still being processed, retry later"
+    )
+
+
+# ------------------------------------------------------------------ #
+# Sync version (sync routes, e.g. /payments/pay)
+# ------------------------------------------------------------------ #
+
+def _claim(full_key: tuple, req_hash: str):
+    """
+    Try to own the key. Returns ("owner", None), ("done", body)
+    or ("busy", None).
+    """
+    now = datetime.now()
+    try:
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(SQL_CLAIM_KEY, _claim_params(full_key, req_hash, now))
+        return "owner", None
+    except integrity_errors():
+        pass
+
+    with db_cursor(dictionary=True, commit=True) as cursor:
+        cursor.execute(SQL_GET_KEY, full_key)
+        row = cursor.fetchone()
+        if row is None:
+            return "busy", None  # released between our INSERT and SELECT; go again
+
+        state = _row_state(row, req_hash, now)
+        if state == "done":
+            return "done", json.loads(row["response_body"])
+        if state == "take_over":
+            cursor.execute(SQL_TAKE_OVER_KEY, _take_over_params(full_key, req_hash, now))
+            if cursor.rowcount == 1:
+                return "owner", None
+        return "busy", None
+
+
+def _store(full_key: tuple, req_hash: str, outcome: dict):
+    """Persist the outcome, then cache it. A failure keeps the claim."""
+    try:
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(SQL_STORE_RESPONSE, (json.dumps(outcome, default=str), *full_key))
+    except Exception as e:
+        _count("store_failures")
+        print("Idempotency response store failed:", e)
+        return
+    _lru_put(full_key, req_hash, outcome)
+
+
+def _heartbeat(full_key: tuple, req_hash: str, stop: threading.Event):
+    """Renew the claim until stop is set or the lease is lost."""
+    while not stop.wait(_heartbeat_interval()):
+        try:
+            with db_cursor(commit=True) as cursor:
+                cursor.execute(SQL_EXTEND_LOCK, (_lease_until(), *full_key, req_hash))
+                if cursor.rowcount == 0:
+                    return
+        except Exception as e:
+            print("Idempotency lease renewal failed:", e)
+
+
+def run_idempotent(user_id: int, scope: str, key: str, payload, handler):
+    """
+    Run handler() at most once per (user_id, scope, key).
+
+    Returns (body, replayed): the handler's return value (JSON-serialisable)
+    and whether it came from a stored earlier run. A replayed failure
+    raises IdempotencyReplayedError.
+    """
+    full_key = (user_id, scope, key)
+    req_hash = request_hash(payload)
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    waited = False
+
+    while True:
+        cached = _lru_get(full_key)
+        if cached is not None:
+            _check_hash(cached[1], req_hash)
+            return _replay(cached[2]), True
+
+        state, outcome = _claim(full_key, req_hash)
+        if state == "owner":
+            break
+        if state == "done":
+            _lru_put(full_key, req_hash, outcome)
+            return _replay(outcome), True
+
+        if not waited:
+            waited = True
+            _count("waited")
+        if time.monotonic() >= deadline:
+            raise _in_progress_error()
+        time.sleep(POLL_SECONDS)
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_heartbeat, args=(full_key, req_hash, stop), daemon=True
+    )
+    heartbeat.start()
+    try:
+        body = handler()
+    except BaseException as e:
+        outcome = _outcome(e)
+        stop.set()
+        heartbeat.join()
+        if outcome is not None:
+            _count("errors_stored")
+            _store(full_key, req_hash, outcome)
+        elif isinstance(e, Exception):
+            with db_cursor(commit=True) as cursor:
+                cursor.execute(SQL_RELEASE_KEY, full_key)
+        raise
+    stop.set()
+    heartbeat.join()
+
+    _count("executed")
+    _store(full_key, req_hash, {"body": body})
+    return body, False
+
+
+# ------------------------------------------------------------------ #
+# Async version (app/db_async.py)
+# ------------------------------------------------------------------ #
+
+async def _claim_async(full_key: tuple, req_hash: str):
+    """Async version of _claim."""
+    now = datetime.now()
+    async with async_connection() as db:
+        try:
+            await db.execute(SQL_CLAIM_KEY, _claim_params(full_key, req_hash, now))
+            return "owner", None
+        except integrity_errors():
+            pass
+
+        row = await db.fetch_one(SQL_GET_KEY, full_key)
+        if row is None:
+            return "busy", None
+
+        state = _row_state(row, req_hash, now)
+        if state == "done":
+            return "done", json.loads(row["response_body"])
+        if state == "take_over":
+            _, rowcount = await db.execute(
+                SQL_TAKE_OVER_KEY, _take_over_params(full_key, req_hash, now)
+            )
+            if rowcount == 1:
+                return "owner", None
+        return "busy", None
+
+
+async def _store_async(full_key: tuple, req_hash: str, outcome: dict):
+    """Async version of _store."""
+    try:
+        async with async_connection() as db:
+            await db.execute(SQL_STORE_RESPONSE, (json.dumps(outcome, default=str), *full_key))
+    except Exception as e:
+        _count("store_failures")
+        print("Idempotency response store failed:", e)
+        return
+    _lru_put(full_key, req_hash, outcome)
+
+
+async def _heartbeat_async(full_key: tuple, req_hash: str):
+    """Async version of _heartbeat; runs until cancelled or the lease is lost."""
+    while True:
+        await asyncio.sleep(_heartbeat_interval())
+        try:
+            async with async_connection() as db:
+                _, rowcount = await db.execute(
+                    SQL_EXTEND_LOCK, (_lease_until(), *full_key, req_hash)
+                )
+            if rowcount == 0:
+                return
+        except Exception as e:
+            print("Idempotency lease renewal failed:", e)
+
+
+async def run_idempotent_async(user_id: int, scope: str, key: str, payload, handler):
+    """Async version of run_idempotent; handler is an async callable."""
+    full_key = (user_id, scope, key)
+    req_hash = request_hash(payload)
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    waited = False
+
+    while True:
+        cached = _lru_get(full_key)
+        if cached is not None:
+            _check_hash(cached[1], req_hash)
+            return _replay(cached[2]), True
+
+        state, outcome = await _claim_async(full_key, req_hash)
+        if state == "owner":
+            break
+        if state == "done":
+            _lru_put(full_key, req_hash, outcome)
+            return _replay(outcome), True
+
+        if not waited:
+            waited = True
+            _count("waited")
+        if time.monotonic() >= deadline:
+            raise _in_progress_error()
+        await asyncio.sleep(POLL_SECONDS)
+
+    heartbeat = asyncio.create_task(_heartbeat_async(full_key, req_hash))
+    try:
+        body = await handler()
+    except BaseException as e:
+        outcome = _outcome(e)
+        heartbeat.cancel()
+        if outcome is not None:
+            _count("errors_stored")
+            await _store_async(full_key, req_hash, outcome)
+        elif isinstance(e, Exception):
+            async with async_connection() as db:
+                await db.execute(SQL_RELEASE_KEY, full_key)
+        raise
+    heartbeat.cancel()
+
+    _count("executed")
+    await _store_async(full_key, req_hash, {"body": body})
+    return body, False
+
+
+# ------------------------------------------------------------------ #
+# Retention
+# ------------------------------------------------------------------ #
+
+def prune_idempotency_keys(ttl_hours: int = IDEMPOTENCY_TTL_HOURS) -> int:
+    """Delete stored keys older than ttl_hours. Returns rows deleted."""
+    cutoff = datetime.now() - timedelta(hours=ttl_hours)
+    with db_cursor(commit=True) as cursor:
+        cursor.execute(SQL_PRUNE_KEYS, (cutoff,))
+        return cursor.rowcount
@@ -0,0 +1,185 @@
+# app/services/itinerary_search.py
+
+import heapq
+
+from app.services.route_graph import INF, RouteGraph
+
+# Give up after examining this many candidate routes per requested result
+# (only reachable when most candidates break the max_stops limit)
+MAX_EXAMINED_PER_RESULT = 20
+
+
+def _spur_search(graph: RouteGraph, spur: int, target: int, dist_to_target,
+                 blocked_nodes: bytearray, blocked_edges: set):
+    """
+    A* from spur to target, avoiding blocked nodes/edges.
+
+    The heuristic is the exact distance-to-target from the unrestricted
+    shortest-path tree. Blocking nodes/edges can only make distances longer,
+    so it stays admissible and consistent, and the search walks almost
+    straight to the target instead of re-exploring the whole graph.
+
+    Returns (cost, [node indexes]) or None.
+    """
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+
+    g = {spur: 0}
+    pred = {spur: -1}
+    pq = [(dist_to_target[spur], 0, spur)]
+
+    while pq:
+        _, d, u = heapq.heappop(pq)
+        if d > g[u]:
+            continue
+
+        if u == target:
+            path = []
+            while u != -1:
+                path.append(u)
+                u = pred[u]
+            path.reverse()
+            return d, path
+
+        for k in range(offsets[u], offsets[u + 1]):
+            v = targets[k]
+            if blocked_nodes[v] or (u, v) in blocked_edges:
+                continue
+            h = dist_to_target[v]
+            if h == INF:
+                continue
+            nd = d + weights[k]
+            if nd < g.get(v, INF):
+                g[v] = nd
+                pred[v] = u
+                heapq.heappush(pq, (nd + h, nd, v))
+
+    return None
+
+
+def _edge_weight(graph: RouteGraph, u: int, v: int):
+    for k in range(graph.offsets[u], graph.offsets[u + 1]):
+        if graph.targets[k] == v:
+            return graph.weights[k]
+    raise KeyError((u, v))
+
+
+def _prefix_costs(graph: RouteGraph, path: list) -> list:
+    costs = [0]
+    for a, b in zip(path, path[1:]):
+        costs.append(costs[-1] + _edge_weight(graph, a, b))
+    return costs
+
+
+def find_k_shortest_paths(
+    graph: RouteGraph,
+    source: str,
+    destination: str,
+    k: int = 3,
+    max_stops: int | None = None,
+    max_detour_ratio: float | None = None,
+) -> list:
+    """
+    Up to k loop-free routes from source to destination, shortest first
+    (Yen's algorithm).
+
+    max_stops: drop routes with more intermediate airports than this.
+    max_detour_ratio: drop routes longer than ratio * shortest distance
+                      (e.g. 1.5 = at most 50% longer than the best route).
+
+    The reverse shortest-path tree to the destination is computed once
+    (and memoised on the graph) and reused by every spur search: as the A*
+    heuristic, and to skip spur nodes that cannot produce a route within
+    the stop / detour limits at all.
+
+    Returns a list of {"total_distance", "route", "stops"}.
+    """
+    s = graph.index.get(source)
+    t = graph.index.get(destination)
+    if s is None or t is None or k < 1:
+        return []
+
+    dist_to_t, hops_to_t = graph.tree_to(t)
+    if dist_to_t[s] == INF:
+        return []
+
+    best_cost = dist_to_t[s]
+    max_cost = best_cost * max_detour_ratio if max_detour_ratio else INF
+    max_legs = max_stops + 1 if max_stops is not None else INF
+
+    if hops_to_t[s] > max_legs:
+        return []
+
+    # Shortest path = follow the tree greedily from the source
+    first = [s]
+    while first[-1] != t:
+        u = first[-1]
+        for k_ in range(graph.offsets[u], graph.offsets[u + 1]):
+            v = graph.targets[k_]
+            if dist_to_t[v] + graph.weights[k_] == dist_to_t[u]:
+                first.append(v)
+                break
+
+    accepted = []        # routes returned to the caller: (cost, path)
+    examined = []        # every route popped so far: (path, prefix_costs)
+    candidates = []      # heap of (cost, path tuple)
+    seen = set()
+
+    def consider(cost, path):
+        key = tuple(path)
+        if key not in seen and cost <= max_cost:
+            seen.add(key)
+            heapq.heappush(candidates, (cost, key))
+
+    # Routes over max_stops are still expanded (a deviation from them may
+    # have fewer stops), they just never make it into the result.
+    consider(best_cost, first)
+    n = graph.airport_count
+    budget = k * MAX_EXAMINED_PER_RESULT
+
+    while candidates and len(accepted) < k and len(examined) < budget:
+        cost, path = heapq.heappop(candidates)
+        path = list(path)
+        prefix = _prefix_costs(graph, path)
+        examined.append((path, prefix))
+
+        if len(path) - 1 <= max_legs:
+            accepted.append((cost, path))
+            if len(accepted) == k:
+                break
+
+        # Generate spur routes deviating from the route just examined
+        for i in range(len(path) - 1):
+            spur = path[i]
+            root = path[:i + 1]
+            root_cost = prefix[i]
+
+            # Lower bounds from the tree: skip hopeless spur nodes outright
+            if root_cost + dist_to_t[spur] > max_cost:
+                continue
+            if i + hops_to_t[spur] > max_legs:
+                continue
+
+            blocked_edges = set()
+            for other, _ in examined:
+                if len(other) > i + 1 and other[:i + 1] == root:
+                    blocked_edges.add((other[i], other[i + 1]))
+
+            blocked_nodes = bytearray(n)
+            for node in root[:-1]:
+                blocked_nodes[node] = 1
+
+            found = _spur_search(graph, spur, t, dist_to_t, blocked_nodes, blocked_edges)
+            if found is None:
+                continue
+
+            spur_cost, spur_path = found
+            consider(root_cost + spur_cost, root[:-1] + spur_path)
+
+    return [
+        {
+            "total_distance": cost,
+            "route": [graph.codes[i] for i in path],
+            "stops": len(path) - 2,
+        }
+        for cost, path in accepted
+    ]
@@ -0,0 +1,432 @@
+# app/services/job_queue.py
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.config import (
+    JOB_WORKERS,
+    JOB_POLL_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BACKOFF_SECONDS,
+    JOB_MAX_BACKOFF_SECONDS,
+    JOB_LEASE_SECONDS,
+    JOB_RETENTION_DAYS,
+)
+from app.db import db_cursor
+from app.db_async import integrity_errors
+
+# Durable background jobs, stored in the jobs table (migrations/007).
+#
+# enqueue_job() inserts a row -- optionally on the caller's cursor, so
+# the job commits (or rolls back) with the caller's own writes -- and a
+# pool of worker threads runs the handler registered for its kind.
+#
+# - at-least-once: a worker claims a job with a conditional UPDATE that
+#   leases it for JOB_LEASE_SECONDS; if the worker dies, the job is
+#   picked up again once the lease has passed. Handlers must tolerate
+#   running twice -- or be registered with transactional=True, so their
+#   writes commit in the same transaction that marks the job DONE and
+#   only one attempt's writes ever commit.
+# - retries: a handler exception re-queues the job with exponential
+#   backoff; after max_attempts it is FAILED (kept for inspection).
+# - dedup: a job enqueued with a dedup_key that is already QUEUED or
+#   RUNNING is not added again, the existing job_id is returned.
+
+SQL_INSERT_JOB = """
+    INSERT INTO jobs
+        (kind, payload, dedup_key, max_attempts, run_after, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+SQL_JOB_BY_DEDUP_KEY = "SELECT job_id FROM jobs WHERE dedup_key = %s"
+
+SQL_DUE_JOBS = """
+    SELECT job_id, kind, payload, attempts, max_attempts
+    FROM jobs
+    WHERE status IN ('QUEUED', 'RUNNING') AND run_after <= %s
+    ORDER BY run_after, job_id
+    LIMIT %s
+"""
+
+# Only one worker wins: the row must still be due when the UPDATE runs
+SQL_CLAIM_JOB = """
+    UPDATE jobs
+    SET status = 'RUNNING', attempts = attempts + 1, run_after = %s
+    WHERE job_id = %s AND status IN ('QUEUED', 'RUNNING') AND run_after <= %s
+"""
+
+# The attempts check keeps a worker whose lease expired from overwriting
+# the outcome of the attempt that took the job over.
+SQL_COMPLETE_JOB = """
+    UPDATE jobs
+    SET status = 'DONE', dedup_key = NULL, result = %s, last_error = NULL, finished_at = %s
+    WHERE job_id = %s AND attempts = %s AND status = 'RUNNING'
+"""
+
+SQL_RETRY_JOB = """
+    UPDATE jobs
+    SET status = 'QUEUED', run_after = %s, last_error = %s
+    WHERE job_id = %s AND attempts = %s AND status = 'RUNNING'
+"""
+
+SQL_FAIL_JOB = """
+    UPDATE jobs
+    SET status = 'FAILED', dedup_key = NULL, last_error = %s, finished_at = %s
+    WHERE job_id = %s AND attempts = %s AND status = 'RUNNING'
+"""
+
+SQL_GET_JOB = """
+    SELECT job_id, kind, payload, status, attempts, max_attempts,
+           run_after, result, last_error, created_at, finished_at
+    FROM jobs
+    WHERE job_id = %s
+"""
+
+SQL_QUEUE_DEPTH = """
+    SELECT status, COUNT(*) AS jobs, MIN(run_after) AS oldest_run_after
+    FROM jobs
+    GROUP BY status
+"""
+
+SQL_PRUNE_JOBS = """
+    DELETE FROM jobs
+    WHERE status IN ('DONE', 'FAILED') AND finished_at < %s
+"""
+
+
+# kind -> (handler, transactional); handler returns a JSON-serialisable result
+_handlers = {}
+
+
+class JobContext:
+    """What a transactional handler gets besides the payload."""
+
+    __slots__ = ("job_id", "attempts", "cursor", "_after_commit")
+
+    def __init__(self, job_id: int, attempts: int, cursor):
+        self.job_id = job_id
+        self.attempts = attempts
+        self.cursor = cursor  # dictionary cursor in the job's transaction
+        self._after_commit = []
+
+    def after_commit(self, fn):
+        """Run fn() once the transaction has committed (e.g. push events)."""
+        self._after_commit.append(fn)
+
+
+class _LeaseLostError(Exception):
+    """Another attempt took the job over; this attempt's writes were rolled back."""
+
+
+def register_job_handler(kind: str, handler, transactional: bool = False):
+    """
+    Register the function that runs jobs of this kind.
+
+    By default it is called as handler(payload). With transactional=True
+    it is called as handler(job, payload), job being a JobContext: its
+    writes go through job.cursor and commit together with the job's DONE
+    status, or not at all.
+    """
+    _handlers[kind] = (handler, transactional)
+
+
+def _backoff(attempts: int) -> float:
+    return min(JOB_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1), JOB_MAX_BACKOFF_SECONDS)
+
+
+def _insert_job(cursor, params: tuple, dedup_key) -> int:
+    for _ in range(2):
+        try:
+            cursor.execute(SQL_INSERT_JOB, params)
+            return cursor.lastrowid
+        except integrity_errors():
+            if dedup_key is None:
+                raise
+
+        cursor.execute(SQL_JOB_BY_DEDUP_KEY, (dedup_key,))
+        row = cursor.fetchone()
+        if row is not None:
+            return row["job_id"] if isinstance(row, dict) else row[0]
+        # The other job finished in between; try the insert once more
+
+    raise RuntimeError(f"Could not enqueue job with dedup_key '{dedup_key}'")
+
+
+def enqueue_job(kind: str, payload: dict, dedup_key: str | None = None,
+                max_attempts: int = JOB_MAX_ATTEMPTS, delay_seconds: float = 0,
+                cursor=None) -> int:
+    """
+    Add a job. Returns its job_id (or the pending job's id for a
+    duplicate dedup_key).
+
+    With cursor=..., the job is inserted in the caller's transaction and
+    becomes visible when the caller commits; call wake_job_workers()
+    after the commit to have it picked up right away.
+    """
+    now = datetime.now()
+    params = (
+        kind,
+        json.dumps(payload, default=str),
+        dedup_key,
+        max_attempts,
+        now + timedelta(seconds=delay_seconds),
+        now,
+    )
+
+    if cursor is not None:
+        return _insert_job(cursor, params, dedup_key)
+
+    with db_cursor(commit=True) as own_cursor:
+        job_id = _insert_job(own_cursor, params, dedup_key)
+    wake_job_workers()
+    return job_id
+
+
+def get_job(job_id: int):
+    """Job row (payload / result decoded), or None."""
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute(SQL_GET_JOB, (job_id,))
+        job = cursor.fetchone()
+
+    if job is not None:
+        job["payload"] = json.loads(job["payload"])
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+    return job
+
+
+def prune_finished_jobs(retention_days: int = JOB_RETENTION_DAYS) -> int:
+    """Delete DONE / FAILED jobs finished more than retention_days ago."""
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    with db_cursor(commit=True) as cursor:
+        cursor.execute(SQL_PRUNE_JOBS, (cutoff,))
+        return cursor.rowcount
+
+
+# ------------------------------------------------------------------ #
+# Workers
+# ------------------------------------------------------------------ #
+
+class JobWorkerPool:
+    """
+    `workers` threads, each claiming and running one job at a time.
+    Idle workers poll every `poll_seconds`, or sooner when wake() is
+    called after an enqueue.
+    """
+
+    def __init__(self, workers: int, poll_seconds: float):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+        self._stats = {
+            "claimed": 0,
+            "succeeded": 0,
+            "retried": 0,
+            "failed": 0,
+            "claim_errors": 0,
+            "finish_errors": 0,
+            "lease_lost": 0,
+            "busy_workers": 0,
+            "last_run_ms": 0.0,
+            "max_run_ms": 0.0,
+        }
+        self._run_total_ms = 0.0
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        """Let running jobs finish, then stop the threads."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _count(self, name: str):
+        with self._cond:
+            self._stats[name] += 1
+
+    def _claim(self):
+        now = datetime.now()
+        with db_cursor(dictionary=True, commit=True) as cursor:
+            cursor.execute(SQL_DUE_JOBS, (now, self.workers))
+            for job in cursor.fetchall():
+                lease_until = now + timedelta(seconds=JOB_LEASE_SECONDS)
+                cursor.execute(SQL_CLAIM_JOB, (lease_until, job["job_id"], now))
+                if cursor.rowcount == 1:
+                    job["attempts"] += 1
+                    return job
+        return None
+
+    def _finish(self, sql: str, params: tuple):
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(sql, params)
+
+    def _run_transactional(self, job: dict, handler, payload: dict):
+        """Handler writes + DONE in one transaction, then after_commit hooks."""
+        job_id, attempts = job["job_id"], job["attempts"]
+
+        with db_cursor(dictionary=True, commit=True) as cursor:
+            ctx = JobContext(job_id, attempts, cursor)
+            result = handler(ctx, payload)
+            cursor.execute(
+                SQL_COMPLETE_JOB,
+                (json.dumps(result, default=str), datetime.now(), job_id, attempts),
+            )
+            if cursor.rowcount != 1:
+                raise _LeaseLostError()
+
+        for fn in ctx._after_commit:
+            try:
+                fn()
+            except Exception as e:
+                print(f"after_commit hook of job {job_id} failed:", e)
+
+    def _execute(self, job: dict):
+        job_id, attempts = job["job_id"], job["attempts"]
+        start = time.perf_counter()
+        transactional = False
+
+        try:
+            if attempts > job["max_attempts"]:
+                # Leases kept expiring (worker killed mid-job)
+                raise RuntimeError(f"Gave up after {attempts - 1} attempts")
+            if job["kind"] not in _handlers:
+                raise LookupError(f"No handler registered for job kind '{job['kind']}'")
+            handler, transactional = _handlers[job["kind"]]
+            payload = json.loads(job["payload"])
+            if transactional:
+                self._run_transactional(job, handler, payload)
+            else:
+                result = handler(payload)
+        except _LeaseLostError:
+            self._count("lease_lost")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            now = datetime.now()
+            if attempts >= job["max_attempts"]:
+                self._finish(SQL_FAIL_JOB, (error, now, job_id, attempts))
+                self._count("failed")
+            else:
+                retry_at = now + timedelta(seconds=_backoff(attempts))
+                self._finish(SQL_RETRY_JOB, (retry_at, error, job_id, attempts))
+                self._count("retried")
+        else:
+            if not transactional:
+                self._finish(
+                    SQL_COMPLETE_JOB,
+                    (json.dumps(result, default=str), datetime.now(), job_id, attempts),
+                )
+            self._count("succeeded")
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._cond:
+            self._stats["last_run_ms"] = round(elapsed_ms, 3)
+            self._stats["max_run_ms"] = round(max(self._stats["max_run_ms"], elapsed_ms), 3)
+            self._run_total_ms += elapsed_ms
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+
+            try:
+                job = self._claim()
+            except Exception:
+                self._count("claim_errors")
+                job = None
+
+            if job is None:
+                with self._cond:
+                    if not self._stopping:
+                        self._cond.wait(self.poll_seconds)
+                continue
+
+            with self._cond:
+                self._stats["claimed"] += 1
+                self._stats["busy_workers"] += 1
+            try:
+                self._execute(job)
+            except Exception:
+                # Outcome couldn't be recorded; the lease will expire and
+                # the job runs again
+                self._count("finish_errors")
+            finally:
+                with self._cond:
+                    self._stats["busy_workers"] -= 1
+
+    def stats(self) -> dict:
+        with self._cond:
+            finished = self._stats["succeeded"] + self._stats["retried"] + self._stats["failed"]
+            return {
+                "workers": self.workers,
+                "running": bool(self._threads) and not self._stopping,
+                **self._stats,
+                "avg_run_ms": round(self._run_total_ms / finished, 3) if finished else 0.0,
+            }
+
+
+job_workers = JobWorkerPool(workers=JOB_WORKERS, poll_seconds=JOB_POLL_SECONDS)
+
+
+def start_job_workers():
+    """Start the worker threads (called from the app lifespan)."""
+    job_workers.start()
+
+
+def stop_job_workers():
+    job_workers.stop()
+
+
+def wake_job_workers():
+    """Have idle workers look for jobs now instead of at the next poll."""
+    job_workers.wake()
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def get_job_queue_stats() -> dict:
+    """
+    Metrics for the /health/jobs endpoint:
+    - depth: jobs per status
+    - lag_seconds: how long the oldest due QUEUED job has been waiting
+    - workers: in-process counters of this worker pool
+    """
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute(SQL_QUEUE_DEPTH)
+        rows = cursor.fetchall()
+
+    depth = {"QUEUED": 0, "RUNNING": 0, "DONE": 0, "FAILED": 0}
+    lag_seconds = 0.0
+    for row in rows:
+        depth[row["status"]] = row["jobs"]
+        if row["status"] == "QUEUED" and row["oldest_run_after"] is not None:
+            waiting = (datetime.now() - _as_datetime(row["oldest_run_after"])).total_seconds()
+            lag_seconds = round(max(waiting, 0.0), 3)
+
+    return {"depth": depth, "lag_seconds": lag_seconds, "workers": job_workers.stats()}
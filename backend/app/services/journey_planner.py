@@ -0,0 +1,327 @@
+# app/services/journey_planner.py
+
+import asyncio
+import threading
+import time
+from array import array
+from datetime import date as date_cls, datetime, timedelta
+
+from app.config import (
+    MIN_CONNECTION_MINUTES,
+    TIMETABLE_CACHE_SECONDS,
+    TIMETABLE_CACHE_DAYS,
+    JOURNEY_MAX_LEGS,
+)
+from app.db import get_connection
+from app.db_async import async_connection
+
+INF = float("inf")
+
+
+class DayTimetable:
+    """
+    All flights departing on one date, as parallel arrays sorted by departure
+    (the "connection array" of the Connection Scan Algorithm).
+
+    Times are minutes since midnight of that date; airports are interned to
+    ints local to this timetable.
+    """
+
+    __slots__ = (
+        "day", "codes", "index",
+        "dep_stop", "arr_stop", "dep_min", "arr_min",
+        "flights",
+    )
+
+    def __init__(self, day: date_cls, rows: list):
+        self.day = day
+        midnight = datetime.combine(day, datetime.min.time())
+
+        # Skip rows with broken times (arrival before departure)
+        rows = [r for r in rows if r["arrival_time"] > r["departure_time"]]
+        rows.sort(key=lambda r: (r["departure_time"], r["arrival_time"]))
+
+        self.codes = sorted(
+            {r["source_airport"] for r in rows} | {r["destination_airport"] for r in rows}
+        )
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+        def minutes(dt):
+            return int((dt - midnight).total_seconds() // 60)
+
+        self.dep_stop = array("l", [self.index[r["source_airport"]] for r in rows])
+        self.arr_stop = array("l", [self.index[r["destination_airport"]] for r in rows])
+        self.dep_min = array("l", [minutes(r["departure_time"]) for r in rows])
+        self.arr_min = array("l", [minutes(r["arrival_time"]) for r in rows])
+        self.flights = rows
+
+    def __len__(self):
+        return len(self.flights)
+
+    def _first_departing_at_or_after(self, minute: int) -> int:
+        lo, hi = 0, len(self.dep_min)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.dep_min[mid] < minute:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _legs(self, conns: list) -> list:
+        legs = []
+        for c in conns:
+            f = self.flights[c]
+            legs.append({
+                "flight_id": f["flight_id"],
+                "flight_number": f["flight_number"],
+                "from": f["source_airport"],
+                "to": f["destination_airport"],
+                "departure_time": f["departure_time"],
+                "arrival_time": f["arrival_time"],
+            })
+        return legs
+
+    def _journey(self, conns: list) -> dict:
+        first = self.flights[conns[0]]
+        last = self.flights[conns[-1]]
+        return {
+            "departure_time": first["departure_time"],
+            "arrival_time": last["arrival_time"],
+            "duration_minutes": self.arr_min[conns[-1]] - self.dep_min[conns[0]],
+            "transfers": len(conns) - 1,
+            "legs": self._legs(conns),
+        }
+
+    def earliest_arrival(self, source: str, destination: str,
+                         depart_after: int = 0, min_connection: int = MIN_CONNECTION_MINUTES):
+        """
+        Single forward scan over the connections (CSA).
+        Returns the journey arriving first at destination, or None.
+        """
+        s = self.index.get(source)
+        t = self.index.get(destination)
+        if s is None or t is None or s == t:
+            return None
+
+        n = len(self.codes)
+        dep_stop, arr_stop = self.dep_stop, self.arr_stop
+        dep_min, arr_min = self.dep_min, self.arr_min
+
+        arrival = [INF] * n
+        in_conn = array("l", [-1]) * n
+        arrival[s] = depart_after - min_connection  # no MCT before the first flight
+
+        for c in range(self._first_departing_at_or_after(depart_after), len(dep_min)):
+            dep = dep_min[c]
+            if dep >= arrival[t]:
+                break  # sorted by departure: nothing later can arrive earlier
+            u = dep_stop[c]
+            v = arr_stop[c]
+            if dep >= arrival[u] + min_connection and arr_min[c] < arrival[v]:
+                arrival[v] = arr_min[c]
+                in_conn[v] = c
+
+        if in_conn[t] == -1:
+            return None
+
+        conns = []
+        node = t
+        while node != s:
+            c = in_conn[node]
+            conns.append(c)
+            node = dep_stop[c]
+        conns.reverse()
+        return self._journey(conns)
+
+    def fewest_transfers(self, source: str, destination: str,
+                         depart_after: int = 0, min_connection: int = MIN_CONNECTION_MINUTES,
+                         max_legs: int = JOURNEY_MAX_LEGS):
+        """
+        Round-based CSA: round k allows at most k flights.
+        The first round that reaches the destination gives the minimum
+        number of transfers; among those journeys, the earliest arrival.
+        """
+        s = self.index.get(source)
+        t = self.index.get(destination)
+        if s is None or t is None or s == t:
+            return None
+
+        n = len(self.codes)
+        dep_stop, arr_stop = self.dep_stop, self.arr_stop
+        dep_min, arr_min = self.dep_min, self.arr_min
+        start = self._first_departing_at_or_after(depart_after)
+
+        prev = [INF] * n
+        prev[s] = depart_after - min_connection
+        rounds = []  # in_conn per round
+
+        for _ in range(max_legs):
+            cur = list(prev)
+            in_conn = array("l", [-1]) * n
+
+            for c in range(start, len(dep_min)):
+                u = dep_stop[c]
+                v = arr_stop[c]
+                # Only extend journeys from the previous round (one more flight)
+                if dep_min[c] >= prev[u] + min_connection and arr_min[c] < cur[v]:
+                    cur[v] = arr_min[c]
+                    in_conn[v] = c
+
+            rounds.append(in_conn)
+
+            if cur[t] < INF:
+                conns = []
+                node = t
+                k = len(rounds) - 1
+                while node != s:
+                    # Walk back to the round where this airport was last improved
+                    while rounds[k][node] == -1:
+                        k -= 1
+                    c = rounds[k][node]
+                    conns.append(c)
+                    node = dep_stop[c]
+                    k -= 1
+                conns.reverse()
+                return self._journey(conns)
+
+            if cur == prev:
+                break  # nothing new reachable
+            prev = cur
+
+        return None
+
+
+# ------------------------------------------------------------------ #
+# Date-partitioned timetable cache
+# ------------------------------------------------------------------ #
+
+_lock = threading.Lock()
+_partitions = {}  # date -> (loaded_at, DayTimetable)
+
+
+SQL_DAY_FLIGHTS = """
+    SELECT
+        f.flight_id,
+        f.flight_number,
+        f.departure_time,
+        f.arrival_time,
+        r.source_airport,
+        r.destination_airport
+    FROM flights f
+    JOIN routes r ON f.route_id = r.route_id
+    WHERE f.departure_time >= %s
+      AND f.departure_time < %s
+      AND f.status <> 'CANCELLED'
+"""
+
+
+def _day_bounds(day: date_cls):
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+
+def _load_day(day: date_cls) -> DayTimetable:
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute(SQL_DAY_FLIGHTS, _day_bounds(day))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return DayTimetable(day, rows)
+
+
+def _cached(day: date_cls):
+    with _lock:
+        entry = _partitions.get(day)
+        if entry and time.monotonic() - entry[0] < TIMETABLE_CACHE_SECONDS:
+            return entry[1]
+    return None
+
+
+def _store(day: date_cls, timetable: DayTimetable):
+    with _lock:
+        _partitions[day] = (time.monotonic(), timetable)
+        while len(_partitions) > TIMETABLE_CACHE_DAYS:
+            oldest = min(_partitions, key=lambda d: _partitions[d][0])
+            del _partitions[oldest]
+
+
+def get_timetable(day: date_cls) -> DayTimetable:
+    """
+    Connection array for one date, loaded once and kept for
+    TIMETABLE_CACHE_SECONDS. At most TIMETABLE_CACHE_DAYS dates are kept.
+    """
+    timetable = _cached(day)
+    if timetable is None:
+        # Load outside the lock so one slow date doesn't block the others
+        timetable = _load_day(day)
+        _store(day, timetable)
+    return timetable
+
+
+async def get_timetable_async(day: date_cls) -> DayTimetable:
+    """Async version of get_timetable; the arrays are built in a worker thread."""
+    timetable = _cached(day)
+    if timetable is None:
+        async with async_connection() as db:
+            rows = await db.fetch_all(SQL_DAY_FLIGHTS, _day_bounds(day))
+        timetable = await asyncio.to_thread(DayTimetable, day, rows)
+        _store(day, timetable)
+    return timetable
+
+
+def invalidate_timetable(day: date_cls | None = None):
+    """Drop one cached date (or all of them) after flights change."""
+    with _lock:
+        if day is None:
+            _partitions.clear()
+        else:
+            _partitions.pop(day, None)
+
+
+def preload_timetables(days: int = 2):
+    """Load today's and the next days' timetables (called at startup)."""
+    today = date_cls.today()
+    for offset in range(days):
+        get_timetable(today + timedelta(days=offset))
+
+
+def _plan(timetable: DayTimetable, source: str, destination: str,
+          depart_after_minutes: int, min_connection: int) -> dict:
+    return {
+        "earliest_arrival": timetable.earliest_arrival(
+            source, destination, depart_after_minutes, min_connection
+        ),
+        "fewest_transfers": timetable.fewest_transfers(
+            source, destination, depart_after_minutes, min_connection
+        ),
+        "connections_scanned": len(timetable),
+    }
+
+
+def plan_journeys(source: str, destination: str, day: date_cls,
+                  depart_after_minutes: int = 0,
+                  min_connection: int = MIN_CONNECTION_MINUTES) -> dict:
+    """
+    Timetable-based itineraries for a given date:
+    - earliest_arrival: arrives first, any number of transfers
+    - fewest_transfers: fewest flights, earliest arrival among those
+    Either may be None when no journey exists that day.
+    """
+    timetable = get_timetable(day)
+    return _plan(timetable, source, destination, depart_after_minutes, min_connection)
+
+
+async def plan_journeys_async(source: str, destination: str, day: date_cls,
+                              depart_after_minutes: int = 0,
+                              min_connection: int = MIN_CONNECTION_MINUTES) -> dict:
+    """Async version of plan_journeys; the scans run in a worker thread."""
+    timetable = await get_timetable_async(day)
+    return await asyncio.to_thread(
+        _plan, timetable, source, destination, depart_after_minutes, min_connection
+    )
@@ -0,0 +1,139 @@
+# app/services/notification_broker.py
+
+import asyncio
+import threading
+from collections import deque
+
+from app.config import NOTIFICATION_STREAM_QUEUE_SIZE, NOTIFICATION_STREAM_MAX_PER_USER
+
+# In-process pub/sub for new notifications, feeding /notifications/stream.
+#
+# publish() may be called from any thread (sync routes, job workers) or
+# from the event loop. Each open stream is a Subscription: a deque capped
+# at NOTIFICATION_STREAM_QUEUE_SIZE (oldest events are dropped and the
+# stream is told to resync) plus an asyncio.Event to wake it. An idle
+# stream is just that object and a parked coroutine.
+#
+# Only streams connected to this process see its publishes; run the job
+# workers in the API process (the default) so disruption alerts are pushed.
+
+
+class TooManyStreamsError(Exception):
+    """The user already has NOTIFICATION_STREAM_MAX_PER_USER open streams."""
+
+
+class Subscription:
+    __slots__ = ("user_id", "events", "overflowed", "_loop", "_wake")
+
+    def __init__(self, user_id: int, max_events: int):
+        self.user_id = user_id
+        self.events = deque(maxlen=max_events)
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+
+    def push(self, event: dict) -> bool:
+        """Queue an event (any thread). False if an older one was dropped."""
+        dropped = len(self.events) == self.events.maxlen
+        if dropped:
+            self.overflowed = True
+        self.events.append(event)
+        self._loop.call_soon_threadsafe(self._wake.set)
+        return not dropped
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for events; False on timeout."""
+        if self.events:
+            return True
+        self._wake.clear()
+        if self.events:  # pushed between the check and clear()
+            return True
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def drain(self) -> list:
+        events = []
+        while self.events:
+            events.append(self.events.popleft())
+        return events
+
+
+class NotificationBroker:
+    def __init__(self, max_events: int, max_per_user: int):
+        self.max_events = max_events
+        self.max_per_user = max_per_user
+
+        self._lock = threading.Lock()
+        self._subs = {}  # user_id -> set of Subscription
+
+        self._stats = {"published": 0, "delivered": 0, "dropped": 0, "rejected": 0}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Open a subscription (call from the event loop)."""
+        sub = Subscription(user_id, self.max_events)
+        with self._lock:
+            subs = self._subs.setdefault(user_id, set())
+            if len(subs) >= self.max_per_user:
+                self._stats["rejected"] += 1
+                raise TooManyStreamsError(
+                    f"At most {self.max_per_user} notification streams per user"
+                )
+            subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.user_id]
+
+    def publish(self, user_id: int, event: dict):
+        """Push one notification to the user's open streams, if any."""
+        with self._lock:
+            self._stats["published"] += 1
+            subs = list(self._subs.get(user_id, ()))
+
+        delivered = dropped = 0
+        for sub in subs:
+            try:
+                if not sub.push(event):
+                    dropped += 1
+                delivered += 1
+            except RuntimeError:
+                # Event loop already closed (shutdown)
+                self.unsubscribe(sub)
+
+        if subs:
+            with self._lock:
+                self._stats["delivered"] += delivered
+                self._stats["dropped"] += dropped
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._subs),
+                "subscriptions": sum(len(s) for s in self._subs.values()),
+                "max_events": self.max_events,
+                **self._stats,
+            }
+
+
+notification_broker = NotificationBroker(
+    max_events=NOTIFICATION_STREAM_QUEUE_SIZE,
+    max_per_user=NOTIFICATION_STREAM_MAX_PER_USER,
+)
+
+
+def publish_notification(notification: dict):
+    """Push a stored notification row (must include user_id) to live streams."""
+    notification_broker.publish(notification["user_id"], notification)
+
+
+def get_notification_broker_stats() -> dict:
+    """Metrics for the /health/notifications endpoint."""
+    return notification_broker.stats()
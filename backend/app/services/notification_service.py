@@ -1,6 +1,106 @@
 # app/services/notification_service.py
 
-from app.db import get_connection
+from collections import Counter
+from datetime import datetime
+
+from app.config import PAGE_SIZE_DEFAULT
+from app.db import get_connection, db_cursor
+from app.db_async import async_connection
+from app.services.notification_broker import publish_notification
+from app.services.pagination import keyset_params, page
+
+# SQL shared by the sync and async versions below
+
+SQL_INSERT_NOTIFICATION = """
+    INSERT INTO notifications (user_id, message, type)
+    VALUES (%s, %s, %s)
+"""
+
+# Rows of one insert_notifications batch, read back by the first id the
+# multi-row INSERT generated. {ids} is a placeholder list, one per user.
+SQL_BATCH_NOTIFICATIONS = """
+    SELECT notification_id, user_id, message, type,
+           created_at, is_read
+    FROM notifications
+    WHERE notification_id >= %s AND user_id IN ({ids})
+      AND message = %s AND type = %s
+    ORDER BY notification_id
+"""
+
+# Missed notifications when a stream reconnects (Last-Event-ID)
+SQL_NOTIFICATIONS_AFTER = """
+    SELECT notification_id, user_id, message, type,
+           created_at, is_read
+    FROM notifications
+    WHERE user_id = %s AND notification_id > %s
+    ORDER BY notification_id
+    LIMIT %s
+"""
+
+# One page, newest first. {unread} / {after} are "" or the filters below.
+SQL_NOTIFICATIONS_PAGE = """
+    SELECT notification_id, user_id, message, type,
+           created_at, is_read
+    FROM notifications
+    WHERE user_id = %s {unread}{after}
+    ORDER BY created_at DESC, notification_id DESC
+    LIMIT %s
+"""
+
+UNREAD_FILTER = "AND is_read = FALSE "
+AFTER_CURSOR_FILTER = "AND (created_at < %s OR (created_at = %s AND notification_id < %s)) "
+
+# Only unread rows of this user change, so rowcount is exactly what the
+# unread counter has to drop by.
+SQL_MARK_READ = """
+    UPDATE notifications
+    SET is_read = TRUE
+    WHERE notification_id = %s AND user_id = %s AND is_read = FALSE
+"""
+
+SQL_MARK_ALL_READ = """
+    UPDATE notifications
+    SET is_read = TRUE
+    WHERE user_id = %s AND is_read = FALSE
+"""
+
+# Per-user unread counter (notification_counters, migrations/008).
+# Updated after the notifications rows in every transaction, so writers
+# always lock in the same order.
+SQL_INCREMENT_UNREAD = """
+    INSERT INTO notification_counters (user_id, unread)
+    VALUES (%s, 1)
+    ON DUPLICATE KEY UPDATE unread = unread + 1
+"""
+
+SQL_DECREMENT_UNREAD = """
+    UPDATE notification_counters
+    SET unread = GREATEST(unread - %s, 0)
+    WHERE user_id = %s
+"""
+
+SQL_UNREAD_COUNT = "SELECT unread FROM notification_counters WHERE user_id = %s"
+
+
+def _page_query(user_id: int, include_read: bool, limit: int, cursor: str | None) -> tuple:
+    after = keyset_params(cursor)
+    sql = SQL_NOTIFICATIONS_PAGE.format(
+        unread="" if include_read else UNREAD_FILTER,
+        after=AFTER_CURSOR_FILTER if after else "",
+    )
+    return sql, (user_id, *after, limit + 1)
+
+
+def _new_notification(notification_id: int, user_id: int, message: str, ntype: str) -> dict:
+    """Row as the stream sends it, without reading it back."""
+    return {
+        "notification_id": notification_id,
+        "user_id": user_id,
+        "message": message,
+        "type": ntype,
+        "created_at": datetime.now().replace(microsecond=0),
+        "is_read": False,
+    }
 
 
 def add_notification(user_id: int, message: str, ntype: str = "INFO"):
@@ -13,79 +113,98 @@ def add_notification(user_id: int, message: str, ntype: str = "INFO"):
     conn = get_connection()
     cursor = conn.cursor()
 
-    sql = """
-        INSERT INTO notifications (user_id, message, type)
-        VALUES (%s, %s, %s)
-    """
     values = (user_id, message, ntype)
 
     try:
-        cursor.execute(sql, values)
+        cursor.execute(SQL_INSERT_NOTIFICATION, values)
+        notification_id = cursor.lastrowid
+        cursor.execute(SQL_INCREMENT_UNREAD, (user_id,))
         conn.commit()
-        return cursor.lastrowid
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         cursor.close()
         conn.close()
 
+    publish_notification(_new_notification(notification_id, user_id, message, ntype))
+    return notification_id
 
-def get_notifications(user_id: int, include_read: bool = True):
-    """
-    Fetch notifications for a user.
-    If include_read=False, only unread notifications are returned.
+
+def insert_notifications(cursor, user_ids: list, message: str, ntype: str = "INFO") -> list:
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    if include_read:
-        sql = """
-            SELECT notification_id, user_id, message, type,
-                   created_at, is_read
-            FROM notifications
-            WHERE user_id = %s
-            ORDER BY created_at DESC
-        """
-        cursor.execute(sql, (user_id,))
-    else:
-        sql = """
-            SELECT notification_id, user_id, message, type,
-                   created_at, is_read
-            FROM notifications
-            WHERE user_id = %s AND is_read = FALSE
-            ORDER BY created_at DESC
-        """
-        cursor.execute(sql, (user_id,))
-
-    rows = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    return rows
-
-
-def mark_notification_read(notification_id: int) -> bool:
+    Insert the same message for many users with one executemany, on the
+    caller's (dictionary) cursor and transaction. Returns the new rows;
+    publish them with publish_notification() once the caller has committed.
     """
-    Mark a single notification as read.
-    Returns True if a row was updated, else False.
+    if not user_ids:
+        return []
+
+    # Same lock order on notification_counters in every batch, so two
+    # fan-outs sharing users can't deadlock
+    user_ids = sorted(user_ids)
+
+    # executemany sends one multi-row INSERT and lastrowid is the first id
+    # it generated. The others are not necessarily first_id + 1, + 2...
+    # (innodb_autoinc_lock_mode=2 interleaves concurrent inserts,
+    # auto_increment_increment > 1 under group replication), so the rows
+    # are read back: the first matches at or after first_id for each user.
+    cursor.executemany(SQL_INSERT_NOTIFICATION, [(uid, message, ntype) for uid in user_ids])
+    first_id = cursor.lastrowid
+    cursor.executemany(SQL_INCREMENT_UNREAD, [(uid,) for uid in user_ids])
+
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    cursor.execute(
+        SQL_BATCH_NOTIFICATIONS.format(ids=placeholders),
+        (first_id, *user_ids, message, ntype),
+    )
+    remaining = Counter(user_ids)
+    created = []
+    for row in cursor.fetchall():
+        if remaining[row["user_id"]] > 0:
+            remaining[row["user_id"]] -= 1
+            created.append(row)
+    return created
+
+
+def get_notifications(user_id: int, include_read: bool = True,
+                      limit: int = PAGE_SIZE_DEFAULT, cursor: str | None = None) -> dict:
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    One page of a user's notifications, newest first.
+    If include_read=False, only unread notifications are returned.
 
-    sql = """
-        UPDATE notifications
-        SET is_read = TRUE
-        WHERE notification_id = %s
+    Returns {"items": [...], "next_cursor": ...}; pass next_cursor back
+    to get the following page (None on the last one).
     """
+    sql, params = _page_query(user_id, include_read, limit, cursor)
 
-    cursor.execute(sql, (notification_id,))
-    conn.commit()
+    with db_cursor(dictionary=True) as db_cur:
+        db_cur.execute(sql, params)
+        rows = db_cur.fetchall()
 
-    updated = cursor.rowcount > 0
+    return page(rows, limit, "created_at", "notification_id")
 
-    cursor.close()
-    conn.close()
 
-    return updated
+def get_unread_count(user_id: int) -> int:
+    """Unread notifications of a user (one primary-key lookup)."""
+    with db_cursor() as cursor:
+        cursor.execute(SQL_UNREAD_COUNT, (user_id,))
+        row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def mark_notification_read(notification_id: int, user_id: int) -> bool:
+    """
+    Mark a single notification of this user as read.
+    Returns True if a row was updated, else False (not found, someone
+    else's, or already read).
+    """
+    with db_cursor(commit=True) as cursor:
+        cursor.execute(SQL_MARK_READ, (notification_id, user_id))
+        updated = cursor.rowcount
+        if updated:
+            cursor.execute(SQL_DECREMENT_UNREAD, (updated, user_id))
+        return updated > 0
 
 
 def mark_all_read(user_id: int) -> int:
@@ -93,21 +212,68 @@ def mark_all_read(user_id: int) -> int:
     Mark all notifications for a user as read.
     Returns the number of rows updated.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    with db_cursor(commit=True) as cursor:
+        cursor.execute(SQL_MARK_ALL_READ, (user_id,))
+        updated = cursor.rowcount
+        if updated:
+            cursor.execute(SQL_DECREMENT_UNREAD, (updated, user_id))
+        return updated
 
-    sql = """
-        UPDATE notifications
-        SET is_read = TRUE
-        WHERE user_id = %s AND is_read = FALSE
-    """
 
-    cursor.execute(sql, (user_id,))
-    conn.commit()
+# ------------------------------------------------------------------ #
+# Async versions (app/db_async.py)
+# ------------------------------------------------------------------ #
+
+async def add_notification_async(user_id: int, message: str, ntype: str = "INFO"):
+    """Async version of add_notification."""
+    async with async_connection() as db:
+        async with db.transaction():
+            notification_id, _ = await db.execute(SQL_INSERT_NOTIFICATION, (user_id, message, ntype))
+            await db.execute(SQL_INCREMENT_UNREAD, (user_id,))
+
+    publish_notification(_new_notification(notification_id, user_id, message, ntype))
+    return notification_id
+
+
+async def get_notifications_async(user_id: int, include_read: bool = True,
+                                  limit: int = PAGE_SIZE_DEFAULT,
+                                  cursor: str | None = None) -> dict:
+    """Async version of get_notifications."""
+    sql, params = _page_query(user_id, include_read, limit, cursor)
+    async with async_connection() as db:
+        rows = await db.fetch_all(sql, params)
+    return page(rows, limit, "created_at", "notification_id")
+
 
-    count = cursor.rowcount
+async def get_unread_count_async(user_id: int) -> int:
+    """Async version of get_unread_count."""
+    async with async_connection() as db:
+        row = await db.fetch_one(SQL_UNREAD_COUNT, (user_id,))
+    return row["unread"] if row else 0
+
+
+async def mark_notification_read_async(notification_id: int, user_id: int) -> bool:
+    """Async version of mark_notification_read."""
+    async with async_connection() as db:
+        async with db.transaction():
+            _, updated = await db.execute(SQL_MARK_READ, (notification_id, user_id))
+            if updated:
+                await db.execute(SQL_DECREMENT_UNREAD, (updated, user_id))
+    return updated > 0
+
+
+async def mark_all_read_async(user_id: int) -> int:
+    """Async version of mark_all_read."""
+    async with async_connection() as db:
+        async with db.transaction():
+            _, updated = await db.execute(SQL_MARK_ALL_READ, (user_id,))
+            if updated:
+                await db.execute(SQL_DECREMENT_UNREAD, (updated, user_id))
+    return updated
 
-    cursor.close()
-    conn.close()
 
-    return count
+async def get_notifications_after_async(user_id: int, after_id: int,
+                                        limit: int = 100):
+    """Notifications newer than after_id, oldest first (stream catch-up)."""
+    async with async_connection() as db:
+        return await db.fetch_all(SQL_NOTIFICATIONS_AFTER, (user_id, after_id, limit))
@@ -0,0 +1,58 @@
+# app/services/pagination.py
+
+import base64
+import json
+from datetime import datetime
+
+# Keyset ("seek") pagination helpers.
+#
+# Lists are ordered newest first by (timestamp, id). A page cursor is the
+# (timestamp, id) of the last row of the previous page, and the next page
+# is the rows strictly before it:
+#
+#     WHERE ... AND (ts < %s OR (ts = %s AND id < %s))
+#     ORDER BY ts DESC, id DESC
+#     LIMIT page_size + 1
+#
+# With an index on (user_id, ts, id) every page costs the same, however
+# deep it is. The extra row only tells whether there is a next page.
+
+
+class InvalidCursorError(ValueError):
+    """The cursor string wasn't produced by encode_cursor."""
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = json.dumps([ts.isoformat() if isinstance(ts, datetime) else ts, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Cursor -> (datetime, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise InvalidCursorError("Invalid page cursor")
+
+
+def keyset_params(cursor: str | None) -> tuple:
+    """Parameters for the (ts < %s OR (ts = %s AND id < %s)) condition."""
+    if cursor is None:
+        return ()
+    ts, row_id = decode_cursor(cursor)
+    return (ts, ts, row_id)
+
+
+def page(rows: list, limit: int, ts_field: str, id_field: str) -> dict:
+    """
+    rows: up to limit + 1 rows in page order.
+    Returns {"items": [...], "next_cursor": str or None}.
+    """
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last[ts_field], last[id_field])
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,44 +1,78 @@
-from app.db import get_connection
-import heapq
+import asyncio
 
-def find_shortest_path(source, destination):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+from app.config import PATH_SEARCH_ALGORITHM, USE_DISTANCE_MATRIX
+from app.services.distance_matrix import lookup_shortest_path
+from app.services.itinerary_search import find_k_shortest_paths
+from app.services.route_graph_cache import get_route_graph, get_route_graph_async
 
-    cursor.execute("SELECT source_airport, destination_airport, distance_km FROM routes")
-    rows = cursor.fetchall()
 
-    conn.close()
+def _shortest(graph, source, destination, algorithm):
+    if algorithm is None and USE_DISTANCE_MATRIX:
+        result = lookup_shortest_path(graph, source, destination)
+        if result is not None:
+            return result
 
-    # Build graph
-    graph = {}
-    for row in rows:
-        s = row["source_airport"]
-        d = row["destination_airport"]
-        w = row["distance_km"]
+    return graph.shortest_path(source, destination, algorithm or PATH_SEARCH_ALGORITHM)
 
-        graph.setdefault(s, []).append((d, w))
-        graph.setdefault(d, []).append((s, w))  # bidirectional
 
-    # Dijkstra
-    pq = [(0, source, [source])]
-    visited = set()
+def find_shortest_path(source, destination, algorithm: str | None = None):
+    """
+    Shortest route between two airport codes by total distance_km.
 
-    while pq:
-        dist, node, path = heapq.heappop(pq)
+    algorithm: "dijkstra", "bidirectional" or "astar"
+               (defaults to PATH_SEARCH_ALGORITHM from config).
+    Raises ValueError for an unknown algorithm.
 
-        if node == destination:
-            return {
-                "total_distance": dist,
-                "route": path
-            }
+    Without an explicit algorithm, the precomputed distance matrix is tried
+    first (when USE_DISTANCE_MATRIX is on and it matches the current routes).
+    """
+    # Graph comes from the process-wide cache (both directions of every route,
+    # CSR arrays over interned airport ids), so a search only costs the
+    # walk itself.
+    graph = get_route_graph()
+    return _shortest(graph, source, destination, algorithm)
 
-        if node in visited:
-            continue
-        visited.add(node)
 
-        for neigh, w in graph.get(node, []):
-            if neigh not in visited:
-                heapq.heappush(pq, (dist + w, neigh, path + [neigh]))
+def find_alternative_routes(
+    source,
+    destination,
+    k: int = 3,
+    max_stops: int | None = None,
+    max_detour_ratio: float | None = None,
+):
+    """
+    Up to k ranked routes (shortest first) between two airport codes.
+    See itinerary_search.find_k_shortest_paths for the limits.
+    """
+    graph = get_route_graph()
+    return find_k_shortest_paths(
+        graph, source, destination,
+        k=k, max_stops=max_stops, max_detour_ratio=max_detour_ratio,
+    )
 
-    return None
+
+# ------------------------------------------------------------------ #
+# Async versions: only a cache reload touches the DB (via app/db_async.py);
+# the searches are CPU-bound and run in a worker thread, off the event loop
+# ------------------------------------------------------------------ #
+
+async def find_shortest_path_async(source, destination, algorithm: str | None = None):
+    """Async version of find_shortest_path."""
+    graph = await get_route_graph_async()
+    return await asyncio.to_thread(_shortest, graph, source, destination, algorithm)
+
+
+async def find_alternative_routes_async(
+    source,
+    destination,
+    k: int = 3,
+    max_stops: int | None = None,
+    max_detour_ratio: float | None = None,
+):
+    """Async version of find_alternative_routes."""
+    graph = await get_route_graph_async()
+    return await asyncio.to_thread(
+        find_k_shortest_paths,
+        graph, source, destination,
+        k=k, max_stops=max_stops, max_detour_ratio=max_detour_ratio,
+    )
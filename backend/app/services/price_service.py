@@ -1,18 +1,57 @@
 # app/services/price_service.py
 
+import asyncio
 from datetime import datetime, date
 from pathlib import Path
 from typing import Dict, Any
 
 import joblib
+import numpy as np
 
-from app.db import get_connection
-from app.services.weather_api_service import fetch_and_store_weather
+from app.db import get_connection, db_cursor
+from app.db_async import async_connection
+from app.config import WEATHER_MAX_WAIT_SECONDS
+from app.services.weather_api_service import get_weather_cached
+from app.services.weather_prefetch import is_prefetch_running
 
 # Global model cache, so we don't reload model on every request
 _model = None
 MODEL_PATH = Path("app/ml/model/price_model.pkl")
 
+# Fallback capacity for flights without a seat inventory yet
+# (same as in generator)
+TOTAL_SEATS = 180
+
+# SQL shared by the sync and async versions below
+
+SQL_FLIGHT_FOR_PRICING = """
+    SELECT
+        f.flight_id,
+        f.departure_time,
+        f.base_price,
+        f.seats_available,
+        r.source_airport,
+        r.destination_airport
+    FROM flights f
+    JOIN routes r ON f.route_id = r.route_id
+    WHERE f.flight_id = %s
+"""
+
+# Batch version: flight + route + seats left for many flights at once.
+# {ids} is replaced with one "%s" placeholder per flight id.
+SQL_FLIGHTS_FOR_PRICING_BATCH = """
+    SELECT
+        f.flight_id,
+        f.departure_time,
+        f.base_price,
+        f.seats_available,
+        r.source_airport,
+        r.destination_airport
+    FROM flights f
+    JOIN routes r ON f.route_id = r.route_id
+    WHERE f.flight_id IN ({ids})
+"""
+
 
 def get_model():
     """Load the trained price model from disk (if not already loaded)."""
@@ -37,43 +76,25 @@ def compute_route_popularity(source: str, destination: str) -> float:
     return round(base, 2)
 
 
-def get_flight_context(flight_id: int) -> Dict[str, Any]:
+def _weather_delay_risk(source: str) -> str:
     """
-    Fetch flight info + route info from DB and compute:
-    - base_price
-    - departure_date
-    - days_to_departure
-    - is_weekend
-    - route_popularity
-    - seats_left (approx, based on bookings)
-    - delay_risk (from weather service)
+    Delay risk for the source airport, from the weather cache.
+    MEDIUM if the weather API fails or is slower than WEATHER_MAX_WAIT_SECONDS
+    on a cold cache (the fetch finishes in the background for next time).
+    While the prefetcher keeps the cache warm we don't wait at all.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # 1) Get flight + route info
-    cursor.execute(
-        """
-        SELECT
-            f.flight_id,
-            f.departure_time,
-            f.base_price,
-            r.source_airport,
-            r.destination_airport
-        FROM flights f
-        JOIN routes r ON f.route_id = r.route_id
-        WHERE f.flight_id = %s
-        """,
-        (flight_id,),
-    )
-    flight = cursor.fetchone()
+    max_wait = 0 if is_prefetch_running() else WEATHER_MAX_WAIT_SECONDS
+    try:
+        weather_info = get_weather_cached(source, max_wait=max_wait)
+        return weather_info.get("delay_risk", "MEDIUM")
+    except Exception:
+        # If weather API fails, fall back to MEDIUM
+        return "MEDIUM"
 
-    if not flight:
-        cursor.close()
-        conn.close()
-        raise ValueError(f"Flight with id {flight_id} not found")
 
-    # 2) Compute days_to_departure & weekend
+def _build_context(flight: dict, delay_risk: str) -> Dict[str, Any]:
+    """Turn the DB rows + weather into the feature context dict."""
+    # Days to departure & weekend
     departure_dt: datetime = flight["departure_time"]
     departure_date = departure_dt.date()
     today = date.today()
@@ -81,41 +102,18 @@ def get_flight_context(flight_id: int) -> Dict[str, Any]:
     days_to_departure = max((departure_date - today).days, 0)
     is_weekend = 1 if departure_date.weekday() >= 5 else 0
 
-    # 3) Approximate seats_left from bookings
-    # We assume a fixed capacity of 180 (same as in generator)
-    TOTAL_SEATS = 180
-
-    cursor.execute(
-        """
-        SELECT COUNT(*) AS booked_count
-        FROM bookings
-        WHERE flight_id = %s
-        """,
-        (flight_id,),
-    )
-    row = cursor.fetchone()
-    booked_count = row["booked_count"] if row and row["booked_count"] is not None else 0
-    seats_left = max(TOTAL_SEATS - booked_count, 0)
-
-    # 4) Route popularity
-    source = flight["source_airport"]
-    dest = flight["destination_airport"]
-    route_popularity = compute_route_popularity(source, dest)
+    # Seats left from the flight's seat inventory (seat_inventory.py)
+    seats_left = flight["seats_available"]
+    if seats_left is None:
+        seats_left = TOTAL_SEATS
 
-    # 5) Delay risk from weather service
-    # We use source airport code for weather
-    try:
-        weather_info = fetch_and_store_weather(source)
-        delay_risk = weather_info.get("delay_risk", "MEDIUM")
-    except Exception:
-        # If weather API fails, fall back to MEDIUM
-        delay_risk = "MEDIUM"
-
-    cursor.close()
-    conn.close()
+    # Route popularity
+    route_popularity = compute_route_popularity(
+        flight["source_airport"], flight["destination_airport"]
+    )
 
     return {
-        "flight_id": flight_id,
+        "flight_id": flight["flight_id"],
         "base_price": float(flight["base_price"]),
         "days_to_departure": days_to_departure,
         "seats_left": seats_left,
@@ -125,41 +123,62 @@ def get_flight_context(flight_id: int) -> Dict[str, Any]:
     }
 
 
+def get_flight_context(flight_id: int) -> Dict[str, Any]:
+    """
+    Fetch flight info + route info from DB and compute:
+    - base_price
+    - departure_date
+    - days_to_departure
+    - is_weekend
+    - route_popularity
+    - seats_left (flights.seats_available)
+    - delay_risk (from weather service)
+    """
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        # 1) Get flight + route info (incl. seats left)
+        cursor.execute(SQL_FLIGHT_FOR_PRICING, (flight_id,))
+        flight = cursor.fetchone()
+
+        if not flight:
+            raise ValueError(f"Flight with id {flight_id} not found")
+    finally:
+        cursor.close()
+        conn.close()
+
+    # 2) Delay risk from weather service (source airport)
+    delay_risk = _weather_delay_risk(flight["source_airport"])
+
+    return _build_context(flight, delay_risk)
+
+
 def map_delay_risk_to_num(delay_risk: str) -> int:
     """Convert delay_risk string to numeric, just like in training."""
     risk_map = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
     return risk_map.get(delay_risk.upper(), 1)  # default MEDIUM
 
 
-def predict_price_for_flight(flight_id: int) -> Dict[str, Any]:
+def _features(ctx: Dict[str, Any]) -> list:
     """
-    Main function called by FastAPI route.
-    1) Get context for this flight
-    2) Build feature vector
-    3) Call ML model
-    4) Return prediction + details
+    Feature row in the same order as training:
+    ["base_price", "days_to_departure", "seats_left",
+     "is_weekend", "delay_risk_num", "route_popularity"]
     """
-    model = get_model()
-    ctx = get_flight_context(flight_id)
-
-    delay_risk_num = map_delay_risk_to_num(ctx["delay_risk"])
-
-    # Features must be in same order as training:
-    # ["base_price", "days_to_departure", "seats_left",
-    #  "is_weekend", "delay_risk_num", "route_popularity"]
-    features = [[
+    return [
         ctx["base_price"],
         ctx["days_to_departure"],
         ctx["seats_left"],
         ctx["is_weekend"],
-        delay_risk_num,
+        map_delay_risk_to_num(ctx["delay_risk"]),
         ctx["route_popularity"],
-    ]]
+    ]
 
-    predicted_price = float(model.predict(features)[0])
 
+def _prediction_result(ctx: Dict[str, Any], predicted_price: float) -> Dict[str, Any]:
     return {
-        "flight_id": flight_id,
+        "flight_id": ctx["flight_id"],
         "base_price": ctx["base_price"],
         "predicted_price": round(predicted_price, 2),
         "days_to_departure": ctx["days_to_departure"],
@@ -168,3 +187,136 @@ def predict_price_for_flight(flight_id: int) -> Dict[str, Any]:
         "route_popularity": ctx["route_popularity"],
         "model_version": "v1_random_forest",
     }
+
+
+def predict_price_for_flight(flight_id: int) -> Dict[str, Any]:
+    """
+    Main function called by FastAPI route.
+    1) Get context for this flight
+    2) Build feature vector
+    3) Call ML model
+    4) Return prediction + details
+    """
+    model = get_model()
+    ctx = get_flight_context(flight_id)
+
+    predicted_price = float(model.predict([_features(ctx)])[0])
+
+    return _prediction_result(ctx, predicted_price)
+
+
+# ------------------------------------------------------------------ #
+# Async versions (app/db_async.py)
+# ------------------------------------------------------------------ #
+
+async def get_flight_context_async(flight_id: int) -> Dict[str, Any]:
+    """Async version of get_flight_context."""
+    async with async_connection() as db:
+        flight = await db.fetch_one(SQL_FLIGHT_FOR_PRICING, (flight_id,))
+        if not flight:
+            raise ValueError(f"Flight with id {flight_id} not found")
+
+    # Weather client is blocking HTTP; keep it off the event loop
+    delay_risk = await asyncio.to_thread(_weather_delay_risk, flight["source_airport"])
+
+    return _build_context(flight, delay_risk)
+
+
+async def predict_price_for_flight_async(flight_id: int) -> Dict[str, Any]:
+    """Async version of predict_price_for_flight."""
+    model = get_model()
+    ctx = await get_flight_context_async(flight_id)
+
+    # RandomForest predict is CPU work; run it in a worker thread
+    prediction = await asyncio.to_thread(model.predict, [_features(ctx)])
+
+    return _prediction_result(ctx, float(prediction[0]))
+
+
+# ------------------------------------------------------------------ #
+# Batch prediction (search results pages)
+# ------------------------------------------------------------------ #
+
+def _batch_sql(flight_ids: list) -> tuple:
+    placeholders = ", ".join(["%s"] * len(flight_ids))
+    sql = SQL_FLIGHTS_FOR_PRICING_BATCH.format(ids=placeholders)
+    return sql, tuple(flight_ids)
+
+
+def _predict_batch(model, flight_ids: list, rows: list, risk_by_airport: dict) -> Dict[str, Any]:
+    """
+    Build the feature matrix for all found flights and run one vectorised
+    model.predict. Results follow the order of flight_ids.
+    """
+    by_id = {row["flight_id"]: row for row in rows}
+
+    contexts = [
+        _build_context(
+            by_id[fid],
+            risk_by_airport.get(by_id[fid]["source_airport"], "MEDIUM"),
+        )
+        for fid in flight_ids
+        if fid in by_id
+    ]
+
+    predictions = []
+    if contexts:
+        features = np.array([_features(ctx) for ctx in contexts], dtype=float)
+        prices = model.predict(features)
+        predictions = [
+            _prediction_result(ctx, float(price))
+            for ctx, price in zip(contexts, prices)
+        ]
+
+    return {
+        "predictions": predictions,
+        "not_found": [fid for fid in flight_ids if fid not in by_id],
+    }
+
+
+def predict_prices_for_flights(flight_ids: list) -> Dict[str, Any]:
+    """
+    Predict prices for many flights in one go:
+    - one query for flight, route and seats left
+    - one weather lookup per distinct source airport
+    - one model.predict over the whole feature matrix
+
+    Returns {"predictions": [...], "not_found": [flight_id, ...]}.
+    """
+    flight_ids = list(dict.fromkeys(flight_ids))  # dedupe, keep order
+    if not flight_ids:
+        return {"predictions": [], "not_found": []}
+
+    model = get_model()
+    sql, params = _batch_sql(flight_ids)
+
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    airports = {row["source_airport"] for row in rows}
+    risk_by_airport = {code: _weather_delay_risk(code) for code in airports}
+
+    return _predict_batch(model, flight_ids, rows, risk_by_airport)
+
+
+async def predict_prices_for_flights_async(flight_ids: list) -> Dict[str, Any]:
+    """Async version of predict_prices_for_flights."""
+    flight_ids = list(dict.fromkeys(flight_ids))
+    if not flight_ids:
+        return {"predictions": [], "not_found": []}
+
+    model = get_model()
+    sql, params = _batch_sql(flight_ids)
+
+    async with async_connection() as db:
+        rows = await db.fetch_all(sql, params)
+
+    # Weather for all source airports concurrently
+    airports = sorted({row["source_airport"] for row in rows})
+    risks = await asyncio.gather(
+        *(asyncio.to_thread(_weather_delay_risk, code) for code in airports)
+    )
+    risk_by_airport = dict(zip(airports, risks))
+
+    return await asyncio.to_thread(_predict_batch, model, flight_ids, rows, risk_by_airport)
@@ -0,0 +1,408 @@
+# app/services/route_graph.py
+
+import hashlib
+import heapq
+from array import array
+
+from app.services.airport_coords import great_circle_km
+
+INF = float("inf")
+
+SEARCH_ALGORITHMS = ("dijkstra", "bidirectional", "astar")
+
+
+def _pack_csr(n: int, pairs):
+    """
+    Counting-sort (from_index, to_index, weight) triples into CSR arrays.
+    Returns (offsets, targets, weights).
+    """
+    typecode = "q" if all(isinstance(w, int) for _, _, w in pairs) else "d"
+
+    counts = [0] * (n + 1)
+    for i, _, _ in pairs:
+        counts[i + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+
+    offsets = array("l", counts)
+    targets = array("l", [0]) * len(pairs)
+    weights = array(typecode, [0]) * len(pairs)
+
+    cursor = counts[:-1]
+    for i, j, w in pairs:
+        k = cursor[i]
+        targets[k] = j
+        weights[k] = w
+        cursor[i] = k + 1
+
+    return offsets, targets, weights
+
+
+class RouteGraph:
+    """
+    Compact, read-only route network for path search.
+
+    Airport codes are interned to ints (0..n-1) and edges are stored in
+    CSR form:
+        offsets[i] .. offsets[i + 1]  -> slice of targets/weights for airport i
+        targets[k]                    -> neighbour airport index
+        weights[k]                    -> distance_km of that edge
+
+    A second CSR over reversed edges backs the backward half of the
+    bidirectional search (shared with the forward one when the graph is
+    symmetric). Searches keep a predecessor array instead of copying the
+    path on every heap push, so memory per search is O(airports).
+
+    Every search returns {"total_distance", "route", "expanded"}, where
+    expanded is the number of airports settled (used by the benchmark).
+    """
+
+    __slots__ = (
+        "codes", "index", "offsets", "targets", "weights",
+        "r_offsets", "r_targets", "r_weights",
+        "lat", "lon", "heuristic_scale", "signature", "_trees",
+    )
+
+    def __init__(self, codes, forward, reverse, coords=None):
+        self.codes = codes
+        self.index = {code: i for i, code in enumerate(codes)}
+        self.offsets, self.targets, self.weights = forward
+        self.r_offsets, self.r_targets, self.r_weights = reverse
+
+        coords = coords or {}
+        self.lat = array("d", [coords[c][0] if c in coords else INF for c in codes])
+        self.lon = array("d", [coords[c][1] if c in coords else INF for c in codes])
+        self.heuristic_scale = self._compute_heuristic_scale()
+        self.signature = self._compute_signature()
+        self._trees = {}
+
+    @classmethod
+    def from_edges(cls, edges, coords=None, symmetric: bool = False):
+        """
+        Build from an iterable of directed (source, destination, distance) tuples.
+
+        coords: optional {airport_code: (lat, lon)} for the A* heuristic.
+        symmetric: every edge is known to have its reverse in `edges`,
+                   so the reverse CSR can share the forward arrays.
+        """
+        edges = list(edges)
+
+        codes = sorted({s for s, _, _ in edges} | {d for _, d, _ in edges})
+        index = {code: i for i, code in enumerate(codes)}
+
+        pairs = [(index[s], index[d], w) for s, d, w in edges]
+        forward = _pack_csr(len(codes), pairs)
+
+        if symmetric:
+            reverse = forward
+        else:
+            reverse = _pack_csr(len(codes), [(j, i, w) for i, j, w in pairs])
+
+        return cls(codes, forward, reverse, coords)
+
+    def _compute_signature(self) -> str:
+        """Content hash of the network (airports + edges), e.g. to tell
+        whether a precomputed distance matrix still matches this graph."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update("\n".join(self.codes).encode())
+        h.update(self.offsets.tobytes())
+        h.update(self.targets.tobytes())
+        h.update(array("d", self.weights).tobytes())
+        return h.hexdigest()
+
+    @property
+    def airport_count(self) -> int:
+        return len(self.codes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def neighbours(self, i: int):
+        """Yield (neighbour_index, weight) for airport index i."""
+        targets, weights = self.targets, self.weights
+        for k in range(self.offsets[i], self.offsets[i + 1]):
+            yield targets[k], weights[k]
+
+    def path_from_predecessors(self, pred, target: int) -> list:
+        """Walk a predecessor array back from target and return airport codes."""
+        path = []
+        node = target
+        while node != -1:
+            path.append(self.codes[node])
+            node = pred[node]
+        path.reverse()
+        return path
+
+    # ------------------------------------------------------------------ #
+    # Shortest-path trees towards a destination (reused across searches)
+    # ------------------------------------------------------------------ #
+
+    TREE_CACHE_SIZE = 128
+
+    def tree_to(self, target: int):
+        """
+        Reverse shortest-path tree rooted at `target`:
+            dist[v] = shortest distance from v to target
+            hops[v] = fewest legs from v to target
+        Unreachable airports get INF in both.
+
+        The graph is immutable, so trees are memoised per target (bounded).
+        """
+        tree = self._trees.get(target)
+        if tree is not None:
+            return tree
+
+        n = len(self.codes)
+        offsets, targets, weights = self.r_offsets, self.r_targets, self.r_weights
+
+        dist = [INF] * n
+        dist[target] = 0
+        pq = [(0, target)]
+        while pq:
+            d, u = heapq.heappop(pq)
+            if d > dist[u]:
+                continue
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(pq, (nd, v))
+
+        hops = [INF] * n
+        hops[target] = 0
+        frontier = [target]
+        while frontier:
+            nxt = []
+            for u in frontier:
+                for k in range(offsets[u], offsets[u + 1]):
+                    v = targets[k]
+                    if hops[v] == INF:
+                        hops[v] = hops[u] + 1
+                        nxt.append(v)
+            frontier = nxt
+
+        if len(self._trees) >= self.TREE_CACHE_SIZE:
+            try:
+                self._trees.pop(next(iter(self._trees)), None)
+            except (StopIteration, RuntimeError):
+                # Another request evicted concurrently, nothing to do
+                pass
+        tree = self._trees[target] = (dist, hops)
+        return tree
+
+    # ------------------------------------------------------------------ #
+    # A* heuristic
+    # ------------------------------------------------------------------ #
+
+    def _great_circle(self, i: int, j: int) -> float:
+        if self.lat[i] == INF or self.lat[j] == INF:
+            return 0.0
+        return great_circle_km(self.lat[i], self.lon[i], self.lat[j], self.lon[j])
+
+    def _compute_heuristic_scale(self) -> float:
+        """
+        Largest factor c <= 1 such that c * great_circle(u, v) <= distance_km
+        for every edge with known coordinates.
+
+        With that scale the great-circle heuristic never overestimates
+        (route distances in the table are not guaranteed to be >= the
+        geodesic), so A* still returns exact shortest paths.
+        """
+        scale = 1.0
+        for u in range(len(self.codes)):
+            for k in range(self.offsets[u], self.offsets[u + 1]):
+                gc = self._great_circle(u, self.targets[k])
+                if gc > 0:
+                    scale = min(scale, float(self.weights[k]) / gc)
+        return max(scale, 0.0)
+
+    # ------------------------------------------------------------------ #
+    # Searches
+    # ------------------------------------------------------------------ #
+
+    def shortest_path(self, source: str, destination: str, algorithm: str = "dijkstra"):
+        """Dispatch to one of SEARCH_ALGORITHMS."""
+        if algorithm == "dijkstra":
+            return self.dijkstra(source, destination)
+        if algorithm == "bidirectional":
+            return self.bidirectional_dijkstra(source, destination)
+        if algorithm == "astar":
+            return self.astar(source, destination)
+        raise ValueError(
+            f"Unknown search algorithm '{algorithm}'. "
+            f"Use one of: {', '.join(SEARCH_ALGORITHMS)}."
+        )
+
+    def dijkstra(self, source: str, destination: str):
+        """
+        Plain one-directional Dijkstra from source to destination.
+
+        Returns the result dict or None when either airport is unknown or
+        unreachable.
+        """
+        s = self.index.get(source)
+        t = self.index.get(destination)
+        if s is None or t is None:
+            return None
+
+        n = len(self.codes)
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        dist = [INF] * n
+        pred = array("l", [-1]) * n
+        done = bytearray(n)
+        expanded = 0
+
+        dist[s] = 0
+        pq = [(0, s)]
+
+        while pq:
+            d, u = heapq.heappop(pq)
+
+            if done[u]:
+                continue
+            done[u] = 1
+            expanded += 1
+
+            if u == t:
+                return {
+                    "total_distance": d,
+                    "route": self.path_from_predecessors(pred, t),
+                    "expanded": expanded,
+                }
+
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(pq, (nd, v))
+
+        return None
+
+    def bidirectional_dijkstra(self, source: str, destination: str):
+        """
+        Dijkstra run from both ends at once (forward over the route graph,
+        backward over the reversed one), always advancing the smaller
+        frontier. Stops once the two queue minima together can no longer
+        beat the best meeting point found so far.
+        """
+        s = self.index.get(source)
+        t = self.index.get(destination)
+        if s is None or t is None:
+            return None
+        if s == t:
+            return {"total_distance": 0, "route": [source], "expanded": 1}
+
+        n = len(self.codes)
+        sides = (
+            (self.offsets, self.targets, self.weights),
+            (self.r_offsets, self.r_targets, self.r_weights),
+        )
+        dist = ([INF] * n, [INF] * n)
+        pred = (array("l", [-1]) * n, array("l", [-1]) * n)
+        done = (bytearray(n), bytearray(n))
+        pqs = ([(0, s)], [(0, t)])
+        dist[0][s] = 0
+        dist[1][t] = 0
+
+        best = INF
+        meet = -1
+        expanded = 0
+
+        while pqs[0] and pqs[1]:
+            if pqs[0][0][0] + pqs[1][0][0] >= best:
+                break
+
+            side = 0 if len(pqs[0]) <= len(pqs[1]) else 1
+            other = 1 - side
+            offsets, targets, weights = sides[side]
+            my_dist, my_pred, my_done = dist[side], pred[side], done[side]
+            other_dist = dist[other]
+
+            d, u = heapq.heappop(pqs[side])
+            if my_done[u]:
+                continue
+            my_done[u] = 1
+            expanded += 1
+
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < my_dist[v]:
+                    my_dist[v] = nd
+                    my_pred[v] = u
+                    heapq.heappush(pqs[side], (nd, v))
+                if other_dist[v] < INF and nd + other_dist[v] < best:
+                    best = nd + other_dist[v]
+                    meet = v
+
+        if meet == -1:
+            return None
+
+        # Forward half: source .. meet, backward half: meet .. destination
+        route = self.path_from_predecessors(pred[0], meet)
+        node = pred[1][meet]
+        while node != -1:
+            route.append(self.codes[node])
+            node = pred[1][node]
+
+        return {"total_distance": best, "route": route, "expanded": expanded}
+
+    def astar(self, source: str, destination: str):
+        """
+        A* with a (scaled) great-circle-distance heuristic towards the
+        destination. Airports without coordinates get h = 0, which keeps the
+        search exact but unguided around them.
+        """
+        s = self.index.get(source)
+        t = self.index.get(destination)
+        if s is None or t is None:
+            return None
+
+        n = len(self.codes)
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        scale = self.heuristic_scale
+
+        h_cache = {}
+
+        def h(v):
+            hv = h_cache.get(v)
+            if hv is None:
+                hv = h_cache[v] = scale * self._great_circle(v, t)
+            return hv
+
+        g = [INF] * n
+        pred = array("l", [-1]) * n
+        expanded = 0
+
+        g[s] = 0
+        pq = [(h(s), 0, s)]
+
+        while pq:
+            _, d, u = heapq.heappop(pq)
+
+            # Stale entry (a shorter way to u was found after this push)
+            if d > g[u]:
+                continue
+            expanded += 1
+
+            if u == t:
+                return {
+                    "total_distance": d,
+                    "route": self.path_from_predecessors(pred, t),
+                    "expanded": expanded,
+                }
+
+            for k in range(offsets[u], offsets[u + 1]):
+                v = targets[k]
+                nd = d + weights[k]
+                if nd < g[v]:
+                    g[v] = nd
+                    pred[v] = u
+                    heapq.heappush(pq, (nd + h(v), nd, v))
+
+        return None
@@ -0,0 +1,130 @@
+# app/services/route_graph_cache.py
+
+import asyncio
+import threading
+import time
+
+from app.config import ROUTE_GRAPH_MAX_AGE_SECONDS
+from app.services.airport_coords import AIRPORT_COORDS
+from app.services.graph_builder import fetch_route_rows, fetch_route_rows_async
+from app.services.route_graph import RouteGraph
+
+# Process-wide route graph, shared by every search request.
+# Rebuilt lazily when the version changes (invalidate) or when it gets too old.
+_lock = threading.Lock()
+_graph = None         # RouteGraph (CSR) used by the searches
+_version = 0          # bumped on every change to the routes table we know about
+_built_version = -1   # version the current _graph corresponds to
+_built_at = 0.0
+
+_stats = {
+    "hits": 0,
+    "rebuilds": 0,
+    "invalidations": 0,
+}
+
+
+def _is_fresh() -> bool:
+    if _graph is None or _built_version != _version:
+        return False
+    if ROUTE_GRAPH_MAX_AGE_SECONDS > 0:
+        return (time.monotonic() - _built_at) < ROUTE_GRAPH_MAX_AGE_SECONDS
+    return True
+
+
+def _pack(edges: dict) -> RouteGraph:
+    return RouteGraph.from_edges(
+        ((s, d, w) for (s, d), w in edges.items()),
+        coords=AIRPORT_COORDS,
+        symmetric=True,
+    )
+
+
+def _rebuild(rows=None):
+    """Reload the graph from the routes table. Caller must hold _lock."""
+    global _graph, _built_version, _built_at
+
+    if rows is None:
+        rows = fetch_route_rows()
+
+    edges = {}
+    for row in rows:
+        src = row["source_airport"]
+        dst = row["destination_airport"]
+        dist = row["distance_km"]
+        # Duplicate / asymmetric rows for a pair: keep the shortest, as a
+        # search over the parallel edges would
+        for key in ((src, dst), (dst, src)):
+            if key not in edges or dist < edges[key]:
+                edges[key] = dist
+
+    _graph = _pack(edges)
+    _built_version = _version
+    _built_at = time.monotonic()
+    _stats["rebuilds"] += 1
+
+
+def get_route_graph() -> RouteGraph:
+    """
+    Return the cached CSR route graph (both directions of every route).
+
+    Only the first call (or the first call after invalidation/expiry)
+    touches the database.
+    """
+    with _lock:
+        if _is_fresh():
+            _stats["hits"] += 1
+        else:
+            _rebuild()
+        return _graph
+
+
+def _rebuild_from_rows(rows: list, version: int) -> RouteGraph:
+    with _lock:
+        # Another request may have rebuilt meanwhile.
+        # If the routes changed while we were reading, serve what we have
+        # and let the next call reload.
+        if not _is_fresh() and (_version == version or _graph is None):
+            _rebuild(rows)
+        return _graph
+
+
+async def get_route_graph_async() -> RouteGraph:
+    """
+    Async version of get_route_graph: the (rare) reload reads the routes
+    table through the async DB layer and packs the graph in a worker
+    thread, so neither blocks the event loop.
+    """
+    with _lock:
+        if _is_fresh():
+            _stats["hits"] += 1
+            return _graph
+        version = _version
+
+    rows = await fetch_route_rows_async()
+    return await asyncio.to_thread(_rebuild_from_rows, rows, version)
+
+
+def invalidate_route_graph():
+    """
+    Mark the cached graph as stale.
+    The next get_route_graph() call rebuilds it from the routes table.
+    """
+    global _version
+
+    with _lock:
+        _version += 1
+        _stats["invalidations"] += 1
+
+
+def get_route_graph_stats() -> dict:
+    """Cache metrics for the health endpoint."""
+    with _lock:
+        return {
+            **_stats,
+            "version": _version,
+            "built_version": _built_version,
+            "airports": _graph.airport_count if _graph else 0,
+            "edges": _graph.edge_count if _graph else 0,
+            "age_seconds": round(time.monotonic() - _built_at, 1) if _graph is not None else None,
+        }
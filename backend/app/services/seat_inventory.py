@@ -0,0 +1,131 @@
+# app/services/seat_inventory.py
+
+import threading
+import time
+
+from app.config import SEAT_CACHE_SECONDS
+from app.db import db_cursor
+from app.db_async import async_connection
+
+# Seat inventory: flights.seats_available (migrations/004) is the source
+# of truth. Bookings take seats with a conditional UPDATE inside the
+# booking transaction, so two concurrent bookings can never both take the
+# last seat; cancellations give them back in the cancellation transaction.
+#
+# Reads go through a small in-process cache (SEAT_CACHE_SECONDS). Writes
+# made by this process drop the cached value after commit.
+
+
+class SeatsUnavailableError(RuntimeError):
+    """Not enough seats left on the flight (or the flight doesn't exist)."""
+
+
+SQL_TAKE_SEATS = """
+    UPDATE flights
+    SET seats_available = seats_available - %s
+    WHERE flight_id = %s AND seats_available >= %s
+"""
+
+SQL_RETURN_SEATS = """
+    UPDATE flights
+    SET seats_available = seats_available + %s
+    WHERE flight_id = %s
+"""
+
+SQL_SEATS_AVAILABLE = """
+    SELECT seats_available
+    FROM flights
+    WHERE flight_id = %s
+"""
+
+
+def seats_for_passengers(passengers: list) -> int:
+    """One seat per passenger, at least one per booking."""
+    return max(len(passengers), 1)
+
+
+def _not_enough(flight_id: int, seats: int) -> SeatsUnavailableError:
+    return SeatsUnavailableError(f"Not enough seats left on flight {flight_id} (need {seats})")
+
+
+def take_seats(cursor, flight_id: int, seats: int):
+    """
+    Take seats inside the caller's transaction.
+    Raises SeatsUnavailableError if fewer than `seats` are left.
+    """
+    cursor.execute(SQL_TAKE_SEATS, (seats, flight_id, seats))
+    if cursor.rowcount == 0:
+        raise _not_enough(flight_id, seats)
+
+
+def return_seats(cursor, flight_id: int, seats: int):
+    """Give seats back inside the caller's transaction."""
+    cursor.execute(SQL_RETURN_SEATS, (seats, flight_id))
+
+
+async def take_seats_async(db, flight_id: int, seats: int):
+    """Async version of take_seats (db is an AsyncDB in a transaction)."""
+    _, rowcount = await db.execute(SQL_TAKE_SEATS, (seats, flight_id, seats))
+    if rowcount == 0:
+        raise _not_enough(flight_id, seats)
+
+
+async def return_seats_async(db, flight_id: int, seats: int):
+    """Async version of return_seats."""
+    await db.execute(SQL_RETURN_SEATS, (seats, flight_id))
+
+
+# ------------------------------------------------------------------ #
+# Read cache
+# ------------------------------------------------------------------ #
+
+_lock = threading.Lock()
+_cache = {}  # flight_id -> (loaded_at, seats_available)
+
+
+def _cached(flight_id: int):
+    with _lock:
+        entry = _cache.get(flight_id)
+        if entry and time.monotonic() - entry[0] < SEAT_CACHE_SECONDS:
+            return entry
+    return None
+
+
+def _store(flight_id: int, seats):
+    with _lock:
+        _cache[flight_id] = (time.monotonic(), seats)
+
+
+def invalidate_seats(flight_id: int):
+    """Drop the cached count (call after committing a seat change)."""
+    with _lock:
+        _cache.pop(flight_id, None)
+
+
+def get_seats_available(flight_id: int):
+    """Seats left on a flight, or None if the flight doesn't exist."""
+    entry = _cached(flight_id)
+    if entry:
+        return entry[1]
+
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute(SQL_SEATS_AVAILABLE, (flight_id,))
+        row = cursor.fetchone()
+
+    seats = row["seats_available"] if row else None
+    _store(flight_id, seats)
+    return seats
+
+
+async def get_seats_available_async(flight_id: int):
+    """Async version of get_seats_available."""
+    entry = _cached(flight_id)
+    if entry:
+        return entry[1]
+
+    async with async_connection() as db:
+        row = await db.fetch_one(SQL_SEATS_AVAILABLE, (flight_id,))
+
+    seats = row["seats_available"] if row else None
+    _store(flight_id, seats)
+    return seats
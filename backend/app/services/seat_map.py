@@ -0,0 +1,349 @@
+# app/services/seat_map.py
+
+import base64
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.config import SEAT_HOLD_SECONDS, SEAT_MAP_CACHE_SECONDS
+from app.db_async import async_connection, integrity_errors
+
+# Seat map per flight.
+#
+# The DB (seat_allocations, migrations/005) owns the truth: a seat is
+# taken when its (flight_id, seat_no) row has a booking_id, and held when
+# it has held_by with hold_expires_at in the future. Claims never lock
+# more than the seat's own row:
+#   1) conditional UPDATE of an existing row that is free for us
+#      (no booking, and held by us or the hold expired) - optimistic lock
+#   2) otherwise INSERT; the primary key rejects a concurrent claimer
+# so a flash sale on one flight only contends per seat, never per table.
+#
+# Seat labels follow the aircraft's layout (aircraft.seat_letters,
+# migrations/009): with "ABCD", seat 0 is 1A, 3 is 1D and 4 is 2A.
+#
+# In memory each flight's map is two bitsets (taken, held) over the seat
+# indexes, rebuilt from the DB at most every SEAT_MAP_CACHE_SECONDS. It
+# serves /bookings/seatmap and lets obviously-taken seats fail fast
+# without a DB round trip.
+
+# Layout of aircraft without seat_letters
+SEAT_LETTERS = "ABCDEF"
+
+
+class SeatTakenError(RuntimeError):
+    """Seat already booked or held by someone else."""
+
+
+SQL_FLIGHT_CAPACITY = """
+    SELECT a.seat_capacity, a.seat_letters
+    FROM flights f
+    JOIN aircraft a ON a.aircraft_id = f.aircraft_id
+    WHERE f.flight_id = %s
+"""
+
+SQL_FLIGHT_ALLOCATIONS = """
+    SELECT seat_no, booking_id, held_by, hold_expires_at
+    FROM seat_allocations
+    WHERE flight_id = %s
+"""
+
+# Take over a row that is free for this caller
+SQL_CLAIM_EXISTING = """
+    UPDATE seat_allocations
+    SET booking_id = %s, held_by = NULL, hold_expires_at = NULL
+    WHERE flight_id = %s AND seat_no = %s
+      AND booking_id IS NULL
+      AND (held_by = %s OR hold_expires_at IS NULL OR hold_expires_at < %s)
+"""
+
+SQL_HOLD_EXISTING = """
+    UPDATE seat_allocations
+    SET held_by = %s, hold_expires_at = %s
+    WHERE flight_id = %s AND seat_no = %s
+      AND booking_id IS NULL
+      AND (held_by = %s OR hold_expires_at IS NULL OR hold_expires_at < %s)
+"""
+
+SQL_SEAT_ALLOCATION = """
+    SELECT booking_id, held_by
+    FROM seat_allocations
+    WHERE flight_id = %s AND seat_no = %s
+"""
+
+SQL_INSERT_ALLOCATION = """
+    INSERT INTO seat_allocations
+        (flight_id, seat_no, booking_id, held_by, hold_expires_at)
+    VALUES
+        (%s, %s, %s, %s, %s)
+"""
+
+SQL_RELEASE_HOLD = """
+    DELETE FROM seat_allocations
+    WHERE flight_id = %s AND seat_no = %s AND held_by = %s AND booking_id IS NULL
+"""
+
+SQL_RELEASE_BOOKING_SEATS = """
+    DELETE FROM seat_allocations
+    WHERE booking_id = %s
+"""
+
+
+# ------------------------------------------------------------------ #
+# Seat labels <-> bit indexes
+# ------------------------------------------------------------------ #
+
+def parse_seats(seat_no: str) -> list:
+    """'12a, 12B' -> ['12A', '12B'] (order kept, duplicates dropped)."""
+    seats = [s.strip().upper() for s in (seat_no or "").split(",") if s.strip()]
+    return list(dict.fromkeys(seats))
+
+
+def seat_index(label: str, capacity: int, letters: str = SEAT_LETTERS) -> int:
+    """
+    '1A' -> 0, '1B' -> 1, ... '2A' -> len(letters).
+    ValueError if not on this aircraft.
+    """
+    row, letter = label[:-1], label[-1:]
+    if not row.isdigit() or not letter or letter not in letters or int(row) < 1:
+        raise ValueError(f"Invalid seat '{label}'")
+    index = (int(row) - 1) * len(letters) + letters.index(letter)
+    if index >= capacity:
+        raise ValueError(f"Seat '{label}' does not exist on this aircraft")
+    return index
+
+
+def seat_label(index: int, letters: str = SEAT_LETTERS) -> str:
+    row, col = divmod(index, len(letters))
+    return f"{row + 1}{letters[col]}"
+
+
+def _layout(row) -> tuple:
+    """(capacity, seat letters) from a SQL_FLIGHT_CAPACITY row (dict or tuple)."""
+    if isinstance(row, dict):
+        capacity, letters = row["seat_capacity"], row["seat_letters"]
+    else:
+        capacity, letters = row[0], row[1]
+    return capacity, (letters or SEAT_LETTERS).upper()
+
+
+class SeatMap:
+    """Bitsets of taken / held seats for one flight."""
+
+    __slots__ = ("flight_id", "capacity", "letters", "taken", "held", "loaded_at")
+
+    def __init__(self, flight_id: int, capacity: int, rows: list, now: datetime,
+                 letters: str = SEAT_LETTERS):
+        self.flight_id = flight_id
+        self.capacity = capacity
+        self.letters = letters
+        size = (capacity + 7) // 8
+        self.taken = bytearray(size)
+        self.held = bytearray(size)
+        self.loaded_at = time.monotonic()
+
+        for row in rows:
+            try:
+                i = seat_index(row["seat_no"], capacity, letters)
+            except ValueError:
+                continue  # legacy / free-text seat numbers
+            if row["booking_id"] is not None:
+                self.taken[i >> 3] |= 1 << (i & 7)
+            elif row["hold_expires_at"] is not None and row["hold_expires_at"] > now:
+                self.held[i >> 3] |= 1 << (i & 7)
+
+    def is_taken(self, i: int) -> bool:
+        return bool(self.taken[i >> 3] & (1 << (i & 7)))
+
+    def is_held(self, i: int) -> bool:
+        return bool(self.held[i >> 3] & (1 << (i & 7)))
+
+    def to_dict(self) -> dict:
+        taken = [seat_label(i, self.letters) for i in range(self.capacity) if self.is_taken(i)]
+        held = [seat_label(i, self.letters) for i in range(self.capacity) if self.is_held(i)]
+        unavailable = bytes(a | b for a, b in zip(self.taken, self.held))
+        return {
+            "flight_id": self.flight_id,
+            "capacity": self.capacity,
+            "seat_letters": self.letters,
+            "rows": (self.capacity + len(self.letters) - 1) // len(self.letters),
+            "available": self.capacity - len(taken) - len(held),
+            "taken": taken,
+            "held": held,
+            # bit i set = seat i not available (LSB first), base64
+            "bitmap": base64.b64encode(unavailable).decode(),
+        }
+
+
+_lock = threading.Lock()
+_maps = {}  # flight_id -> SeatMap
+
+
+def _cached(flight_id: int):
+    with _lock:
+        seat_map = _maps.get(flight_id)
+    if seat_map and time.monotonic() - seat_map.loaded_at < SEAT_MAP_CACHE_SECONDS:
+        return seat_map
+    return None
+
+
+def invalidate_seat_map(flight_id: int):
+    with _lock:
+        _maps.pop(flight_id, None)
+
+
+def _check_seats(flight_id: int, capacity_row, seats: list):
+    """
+    ValueError for unknown flights / seats not on the aircraft; then
+    SeatTakenError for seats the (fresh) in-memory map shows as booked.
+    """
+    if not capacity_row:
+        raise ValueError(f"Flight with id {flight_id} not found")
+    capacity, letters = _layout(capacity_row)
+    indexes = [seat_index(label, capacity, letters) for label in seats]
+
+    seat_map = _cached(flight_id)
+    if seat_map is None:
+        return
+    for label, i in zip(seats, indexes):
+        if seat_map.is_taken(i):
+            raise SeatTakenError(f"Seat {label} is already taken")
+
+
+async def get_seat_map_async(flight_id: int):
+    """SeatMap for a flight, or None if the flight doesn't exist."""
+    seat_map = _cached(flight_id)
+    if seat_map is not None:
+        return seat_map
+
+    async with async_connection() as db:
+        row = await db.fetch_one(SQL_FLIGHT_CAPACITY, (flight_id,))
+        if not row:
+            return None
+        allocations = await db.fetch_all(SQL_FLIGHT_ALLOCATIONS, (flight_id,))
+
+    capacity, letters = _layout(row)
+    seat_map = SeatMap(flight_id, capacity, allocations, datetime.now(), letters)
+    with _lock:
+        _maps[flight_id] = seat_map
+    return seat_map
+
+
+async def _validate_async(flight_id: int, seats: list) -> SeatMap:
+    seat_map = await get_seat_map_async(flight_id)
+    if seat_map is None:
+        raise ValueError(f"Flight with id {flight_id} not found")
+    for label in seats:
+        seat_index(label, seat_map.capacity, seat_map.letters)
+    return seat_map
+
+
+# ------------------------------------------------------------------ #
+# Holds (checkout)
+# ------------------------------------------------------------------ #
+
+async def hold_seats_async(flight_id: int, seats: list, user_id: int) -> datetime:
+    """
+    Hold seats for a user for SEAT_HOLD_SECONDS (all or nothing).
+    Holding again extends the hold. Returns the expiry time.
+    Raises SeatTakenError if any seat is booked or held by someone else.
+    """
+    seats = parse_seats(",".join(seats))
+    seat_map = await _validate_async(flight_id, seats)
+    for label in seats:
+        i = seat_index(label, seat_map.capacity, seat_map.letters)
+        if seat_map.is_taken(i):
+            raise SeatTakenError(f"Seat {label} is already taken")
+
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=SEAT_HOLD_SECONDS)
+
+    try:
+        async with async_connection() as db:
+            async with db.transaction():
+                for label in seats:
+                    _, rowcount = await db.execute(
+                        SQL_HOLD_EXISTING, (user_id, expires_at, flight_id, label, user_id, now)
+                    )
+                    if rowcount:
+                        continue
+                    # MySQL reports 0 for a matched but unchanged row (same
+                    # hold again within a second), so only INSERT when
+                    # there is no row at all
+                    row = await db.fetch_one(SQL_SEAT_ALLOCATION, (flight_id, label))
+                    if row is None:
+                        await db.execute(
+                            SQL_INSERT_ALLOCATION, (flight_id, label, None, user_id, expires_at)
+                        )
+                    elif row["booking_id"] is not None or row["held_by"] != user_id:
+                        raise SeatTakenError(f"Seat {label} is already taken")
+    except integrity_errors():
+        raise SeatTakenError("One or more seats are no longer available")
+    finally:
+        invalidate_seat_map(flight_id)
+
+    return expires_at
+
+
+async def release_hold_async(flight_id: int, seats: list, user_id: int) -> int:
+    """Drop the user's holds on these seats. Returns how many were released."""
+    seats = parse_seats(",".join(seats))
+    await _validate_async(flight_id, seats)
+
+    released = 0
+    async with async_connection() as db:
+        async with db.transaction():
+            for label in seats:
+                _, rowcount = await db.execute(SQL_RELEASE_HOLD, (flight_id, label, user_id))
+                released += rowcount
+    invalidate_seat_map(flight_id)
+    return released
+
+
+# ------------------------------------------------------------------ #
+# Booking: claim / release inside the booking transaction
+# ------------------------------------------------------------------ #
+
+def claim_seats(cursor, flight_id: int, seats: list, booking_id: int, user_id: int):
+    """
+    Assign seats to a booking inside the caller's transaction.
+    A seat held by this user (or not held / hold expired) can be claimed.
+    Raises SeatTakenError otherwise.
+    """
+    cursor.execute(SQL_FLIGHT_CAPACITY, (flight_id,))
+    _check_seats(flight_id, cursor.fetchone(), seats)
+
+    now = datetime.now()
+    try:
+        for label in seats:
+            cursor.execute(SQL_CLAIM_EXISTING, (booking_id, flight_id, label, user_id, now))
+            if cursor.rowcount == 0:
+                cursor.execute(SQL_INSERT_ALLOCATION, (flight_id, label, booking_id, None, None))
+    except integrity_errors():
+        raise SeatTakenError(f"Seat {label} is already taken")
+
+
+async def claim_seats_async(db, flight_id: int, seats: list, booking_id: int, user_id: int):
+    """Async version of claim_seats (db is an AsyncDB in a transaction)."""
+    _check_seats(flight_id, await db.fetch_one(SQL_FLIGHT_CAPACITY, (flight_id,)), seats)
+
+    now = datetime.now()
+    try:
+        for label in seats:
+            _, rowcount = await db.execute(
+                SQL_CLAIM_EXISTING, (booking_id, flight_id, label, user_id, now)
+            )
+            if rowcount == 0:
+                await db.execute(SQL_INSERT_ALLOCATION, (flight_id, label, booking_id, None, None))
+    except integrity_errors():
+        raise SeatTakenError(f"Seat {label} is already taken")
+
+
+def release_booking_seats(cursor, booking_id: int):
+    """Free a cancelled booking's seats inside the caller's transaction."""
+    cursor.execute(SQL_RELEASE_BOOKING_SEATS, (booking_id,))
+
+
+async def release_booking_seats_async(db, booking_id: int):
+    """Async version of release_booking_seats."""
+    await db.execute(SQL_RELEASE_BOOKING_SEATS, (booking_id,))
@@ -1,10 +1,24 @@
 # app/services/weather_api_service.py
+import asyncio
 import os
+import threading
+import time
 import requests
 from datetime import datetime
 
 from dotenv import load_dotenv  # 👈 add this
-from app.db import get_connection
+from app.services.weather_log_writer import queue_weather_log
+from app.config import (
+    OPENWEATHER_BASE_URL,
+    WEATHER_CACHE_TTL_SECONDS,
+    WEATHER_STALE_SECONDS,
+    WEATHER_HTTP_TIMEOUT,
+    WEATHER_HTTP_POOL_SIZE,
+    WEATHER_HTTP_RETRIES,
+    WEATHER_HTTP_RETRY_BACKOFF,
+    WEATHER_BREAKER_FAILURES,
+    WEATHER_BREAKER_RESET_SECONDS,
+)
 
 load_dotenv()  # 👈 this reads your .env file
 
@@ -25,24 +39,143 @@ def airport_to_city(airport_code: str) -> str:
     return AIRPORT_CITY_MAP.get(airport_code.upper(), airport_code)
 
 
-def fetch_weather_from_api(airport_code: str):
-    """
-    Call OpenWeather and return (raw_json, simplified_dict)
-    """
+# ------------------------------------------------------------------ #
+# HTTP client
+# - one pooled keep-alive requests.Session (sync) and one httpx.AsyncClient
+#   (async), so calls reuse TCP/TLS connections
+# - retries with exponential backoff on timeouts, connection errors,
+#   429 and 5xx
+# - a circuit breaker shared by both: after WEATHER_BREAKER_FAILURES
+#   failed calls in a row we stop calling for WEATHER_BREAKER_RESET_SECONDS,
+#   then let one trial call through
+# ------------------------------------------------------------------ #
+
+class WeatherCircuitOpenError(RuntimeError):
+    """The weather API failed repeatedly; calls are paused for a while."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """True if a call may go out now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            # Half-open: a single trial call decides
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+_breaker = CircuitBreaker(WEATHER_BREAKER_FAILURES, WEATHER_BREAKER_RESET_SECONDS)
+
+_client_lock = threading.Lock()
+_session = None        # requests.Session
+_async_client = None   # httpx.AsyncClient
+_client_stats = {
+    "requests": 0,
+    "retries": 0,
+    "failures": 0,
+    "short_circuited": 0,
+}
+
+
+def _count(key: str):
+    with _client_lock:
+        _client_stats[key] += 1
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _client_lock:
+            if _session is None:
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=WEATHER_HTTP_POOL_SIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _get_async_client():
+    global _async_client
+    if _async_client is None:
+        import httpx
+
+        _async_client = httpx.AsyncClient(
+            timeout=WEATHER_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=WEATHER_HTTP_POOL_SIZE,
+                max_keepalive_connections=WEATHER_HTTP_POOL_SIZE,
+            ),
+        )
+    return _async_client
+
+
+async def close_weather_clients():
+    """Close pooled connections (called on app shutdown)."""
+    global _session, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+def _request_params(airport_code: str) -> dict:
     if not OPENWEATHER_API_KEY:
         raise RuntimeError("OPENWEATHER_API_KEY not set in environment/.env")
+    return {
+        "q": airport_to_city(airport_code),
+        "appid": OPENWEATHER_API_KEY,
+        "units": "metric",
+    }
 
-    city = airport_to_city(airport_code)
 
-    url = (
-        "https://api.openweathermap.org/data/2.5/weather"
-        f"?q={city}&appid={OPENWEATHER_API_KEY}&units=metric"
-    )
+def _retryable_status(status: int) -> bool:
+    return status == 429 or status >= 500
 
-    resp = requests.get(url, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
 
+def _simplify(airport_code: str, data: dict) -> dict:
     temp_c = data["main"]["temp"]
     condition = data["weather"][0]["description"].lower()
 
@@ -53,42 +186,303 @@ def fetch_weather_from_api(airport_code: str):
     else:
         delay_risk = "LOW"
 
-    simplified = {
+    return {
         "airport_code": airport_code.upper(),
-        "city": city,
+        "city": airport_to_city(airport_code),
         "temp_c": float(temp_c),
         "condition": condition,
         "delay_risk": delay_risk,
     }
 
-    return data, simplified
+
+def _record_error(outage: bool):
+    """
+    Count a failed call. Only outages (connection errors, timeouts, 5xx,
+    429) trip the breaker; any other error means the API did answer.
+    """
+    _count("failures")
+    if outage:
+        _breaker.record_failure()
+    else:
+        _breaker.record_success()
+
+
+def _check_breaker(airport_code: str):
+    if not _breaker.allow():
+        _count("short_circuited")
+        raise WeatherCircuitOpenError(
+            f"Weather API circuit open, skipping {airport_code.upper()}"
+        )
+
+
+def fetch_weather_from_api(airport_code: str):
+    """
+    Call OpenWeather and return (raw_json, simplified_dict)
+    """
+    params = _request_params(airport_code)
+    _check_breaker(airport_code)
+    session = _get_session()
+    url = f"{OPENWEATHER_BASE_URL}/weather"
+
+    for attempt in range(WEATHER_HTTP_RETRIES + 1):
+        if attempt:
+            _count("retries")
+            time.sleep(WEATHER_HTTP_RETRY_BACKOFF * 2 ** (attempt - 1))
+        _count("requests")
+        try:
+            resp = session.get(url, params=params, timeout=WEATHER_HTTP_TIMEOUT)
+            if _retryable_status(resp.status_code) and attempt < WEATHER_HTTP_RETRIES:
+                continue
+            resp.raise_for_status()
+            data = resp.json()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt < WEATHER_HTTP_RETRIES:
+                continue
+            _record_error(outage=True)
+            raise
+        except requests.HTTPError as e:
+            _record_error(outage=_retryable_status(e.response.status_code))
+            raise
+        except Exception:
+            _record_error(outage=False)
+            raise
+
+        _breaker.record_success()
+        return data, _simplify(airport_code, data)
+
+
+async def fetch_weather_from_api_async(airport_code: str):
+    """Async version of fetch_weather_from_api (httpx, shared client)."""
+    import httpx
+
+    params = _request_params(airport_code)
+    _check_breaker(airport_code)
+    client = _get_async_client()
+    url = f"{OPENWEATHER_BASE_URL}/weather"
+
+    for attempt in range(WEATHER_HTTP_RETRIES + 1):
+        if attempt:
+            _count("retries")
+            await asyncio.sleep(WEATHER_HTTP_RETRY_BACKOFF * 2 ** (attempt - 1))
+        _count("requests")
+        try:
+            resp = await client.get(url, params=params)
+            if _retryable_status(resp.status_code) and attempt < WEATHER_HTTP_RETRIES:
+                continue
+            resp.raise_for_status()
+            data = resp.json()
+        except httpx.TransportError:
+            if attempt < WEATHER_HTTP_RETRIES:
+                continue
+            _record_error(outage=True)
+            raise
+        except httpx.HTTPStatusError as e:
+            _record_error(outage=_retryable_status(e.response.status_code))
+            raise
+        except Exception:
+            _record_error(outage=False)
+            raise
+
+        _breaker.record_success()
+        return data, _simplify(airport_code, data)
+
+
+async def fetch_weather_many(codes: list, concurrency: int = WEATHER_HTTP_POOL_SIZE):
+    """
+    Fetch many airports concurrently over the shared async client.
+    At most `concurrency` requests are in flight at once.
+
+    Returns (results, errors):
+        results: {airport_code: simplified_dict}
+        errors:  {airport_code: exception}
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(code):
+        async with sem:
+            return (await fetch_weather_from_api_async(code))[1]
+
+    codes = list(dict.fromkeys(c.upper() for c in codes))
+    outcomes = await asyncio.gather(*(one(c) for c in codes), return_exceptions=True)
+
+    results, errors = {}, {}
+    for code, outcome in zip(codes, outcomes):
+        if isinstance(outcome, Exception):
+            errors[code] = outcome
+        else:
+            results[code] = outcome
+    return results, errors
+
+
+def get_weather_client_stats() -> dict:
+    with _client_lock:
+        stats = dict(_client_stats)
+    return {"circuit": _breaker.state, **stats}
+
+
+def weather_log_row(simplified: dict, observed_at: datetime | None = None) -> tuple:
+    """One weather_log row (see weather_log_writer) for a simplified weather dict."""
+    observed_at = observed_at or datetime.now()
+    return (
+        simplified["airport_code"],
+        simplified["temp_c"],
+        simplified["condition"],      # goes into weather_condition column
+        simplified["delay_risk"],
+        observed_at.strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
 
 def fetch_and_store_weather(airport_code: str):
     raw, simplified = fetch_weather_from_api(airport_code)
 
-    conn = get_connection()
-    cursor = conn.cursor()
+    # Written in batches by the weather_log writer
+    queue_weather_log([weather_log_row(simplified)])
+
+    _cache_put(simplified["airport_code"], simplified)
+    return simplified
+
+
+# ------------------------------------------------------------------ #
+# Per-airport weather cache
+# - fresh for WEATHER_CACHE_TTL_SECONDS
+# - then served stale for up to WEATHER_STALE_SECONDS while one
+#   background refresh runs (stale-while-revalidate)
+# - concurrent misses for the same airport share one upstream call
+# ------------------------------------------------------------------ #
+
+class WeatherUnavailableError(RuntimeError):
+    """No cached weather and the upstream call didn't finish in time."""
+
+
+class _Refresh:
+    """One in-flight upstream call that any number of callers can wait on."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
 
+_cache_lock = threading.Lock()
+_cache = {}     # airport_code -> (fetched_at, simplified)
+_inflight = {}  # airport_code -> _Refresh
+_cache_stats = {
+    "hits": 0,
+    "stale_hits": 0,
+    "misses": 0,
+    "coalesced": 0,
+    "upstream_calls": 0,
+    "upstream_errors": 0,
+    "wait_timeouts": 0,
+}
+
+
+def _cache_put(airport_code: str, simplified: dict):
+    with _cache_lock:
+        _cache[airport_code] = (time.monotonic(), simplified)
+
+
+def cache_weather(simplified: dict):
+    """Put an already-fetched observation into the cache (used by the prefetcher)."""
+    _cache_put(simplified["airport_code"], simplified)
+
+
+def _run_refresh(airport_code: str, refresh: _Refresh):
     try:
-        sql = """
-            INSERT INTO weather_log
-                (airport_code, temperature, weather_condition, delay_risk, timestamp)
-            VALUES
-                (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(
-            sql,
-            (
-                simplified["airport_code"],
-                simplified["temp_c"],
-                simplified["condition"],      # goes into weather_condition column
-                simplified["delay_risk"],
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            ),
-        )
-        conn.commit()
+        refresh.result = fetch_and_store_weather(airport_code)  # also fills the cache
+    except Exception as e:
+        refresh.error = e
+        with _cache_lock:
+            _cache_stats["upstream_errors"] += 1
     finally:
-        cursor.close()
-        conn.close()
+        with _cache_lock:
+            _inflight.pop(airport_code, None)
+        refresh.done.set()
+
+
+def _start_refresh(airport_code: str) -> _Refresh:
+    """Start a background refresh, or join the one already running."""
+    with _cache_lock:
+        refresh = _inflight.get(airport_code)
+        if refresh is not None:
+            _cache_stats["coalesced"] += 1
+            return refresh
+        refresh = _Refresh()
+        _inflight[airport_code] = refresh
+        _cache_stats["upstream_calls"] += 1
+
+    threading.Thread(
+        target=_run_refresh,
+        args=(airport_code, refresh),
+        name=f"weather-refresh-{airport_code}",
+        daemon=True,
+    ).start()
+    return refresh
+
+
+def get_weather_cached(airport_code: str, max_wait: float | None = None) -> dict:
+    """
+    Simplified weather for an airport, from the cache when possible.
+
+    - fresh entry: returned directly
+    - stale entry: returned directly, a background refresh is started
+    - no usable entry: waits for the (shared) upstream call, at most
+      max_wait seconds (None = no limit), then raises
+      WeatherUnavailableError. The call keeps running and fills the cache.
+    Upstream errors are re-raised to the waiting callers.
+    """
+    code = airport_code.upper()
+
+    with _cache_lock:
+        entry = _cache.get(code)
+        if entry:
+            age = time.monotonic() - entry[0]
+            if age < WEATHER_CACHE_TTL_SECONDS:
+                _cache_stats["hits"] += 1
+                return entry[1]
+            if age < WEATHER_CACHE_TTL_SECONDS + WEATHER_STALE_SECONDS:
+                _cache_stats["stale_hits"] += 1
+            else:
+                entry = None
+        if entry is None:
+            _cache_stats["misses"] += 1
+
+    if entry:
+        _start_refresh(code)
+        return entry[1]
+
+    refresh = _start_refresh(code)
+    if not refresh.done.wait(max_wait):
+        with _cache_lock:
+            _cache_stats["wait_timeouts"] += 1
+        raise WeatherUnavailableError(
+            f"Weather for {code} not available within {max_wait}s"
+        )
+    if refresh.error is not None:
+        raise refresh.error
+    return refresh.result
+
+
+def invalidate_weather_cache(airport_code: str | None = None):
+    """Drop one airport (or every airport) from the cache."""
+    with _cache_lock:
+        if airport_code is None:
+            _cache.clear()
+        else:
+            _cache.pop(airport_code.upper(), None)
+
 
-    return simplified
\ No newline at end of file
+def get_weather_cache_stats() -> dict:
+    """Metrics for the /health/weather endpoint."""
+    with _cache_lock:
+        stats = {
+            "airports_cached": len(_cache),
+            "in_flight": len(_inflight),
+            "ttl_seconds": WEATHER_CACHE_TTL_SECONDS,
+            "stale_seconds": WEATHER_STALE_SECONDS,
+            **_cache_stats,
+        }
+    stats["client"] = get_weather_client_stats()
+    return stats
\ No newline at end of file
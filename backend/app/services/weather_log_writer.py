@@ -0,0 +1,213 @@
+# app/services/weather_log_writer.py
+
+import atexit
+import threading
+import time
+from collections import deque
+
+from app.config import (
+    WEATHER_LOG_BATCH_SIZE,
+    WEATHER_LOG_FLUSH_SECONDS,
+    WEATHER_LOG_MAX_QUEUE,
+)
+from app.db import db_cursor
+
+# Write-behind buffer for weather_log.
+#
+# Callers queue rows and return immediately; one background thread writes
+# them with executemany + a single commit per batch, when
+# WEATHER_LOG_BATCH_SIZE rows are waiting or WEATHER_LOG_FLUSH_SECONDS
+# have passed. If the DB is down, rows stay queued (up to
+# WEATHER_LOG_MAX_QUEUE, oldest dropped first) and are retried on the
+# next flush. close() writes whatever is left (app shutdown / atexit).
+#
+# Each flush also upserts the newest row per airport into current_weather
+# (migrations/002_current_weather.sql) in the same transaction.
+
+SQL_INSERT_WEATHER_LOG = """
+    INSERT INTO weather_log
+        (airport_code, temperature, weather_condition, delay_risk, timestamp)
+    VALUES
+        (%s, %s, %s, %s, %s)
+"""
+
+# observed_at is assigned last so the IF()s above still compare against
+# the old value (MySQL evaluates the assignments left to right).
+SQL_UPSERT_CURRENT_WEATHER = """
+    INSERT INTO current_weather
+        (airport_code, temperature, weather_condition, delay_risk, observed_at)
+    VALUES
+        (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        temperature = IF(VALUES(observed_at) >= observed_at, VALUES(temperature), temperature),
+        weather_condition = IF(VALUES(observed_at) >= observed_at, VALUES(weather_condition), weather_condition),
+        delay_risk = IF(VALUES(observed_at) >= observed_at, VALUES(delay_risk), delay_risk),
+        observed_at = GREATEST(observed_at, VALUES(observed_at))
+"""
+
+
+def _latest_per_airport(rows: list) -> list:
+    latest = {}
+    for row in rows:
+        code, observed_at = row[0], row[4]
+        if code not in latest or observed_at >= latest[code][4]:
+            latest[code] = row
+    return list(latest.values())
+
+
+class WeatherLogWriter:
+    def __init__(self, batch_size: int, flush_seconds: float, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._thread = None
+        self._closed = False
+        self._flush_lock = threading.Lock()  # one executemany at a time
+
+        self._stats = {
+            "rows_queued": 0,
+            "rows_written": 0,
+            "rows_dropped": 0,
+            "flushes": 0,
+            "flush_errors": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+        }
+        self._flush_total_ms = 0.0
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="weather-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def submit_many(self, rows: list):
+        """Queue rows (tuples matching SQL_INSERT_WEATHER_LOG)."""
+        if not rows:
+            return
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("weather_log writer is closed")
+            self._ensure_thread()
+            self._queue.extend(rows)
+            self._stats["rows_queued"] += len(rows)
+            overflow = len(self._queue) - self.max_queue
+            for _ in range(max(overflow, 0)):
+                self._queue.popleft()
+                self._stats["rows_dropped"] += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def submit(self, row: tuple):
+        self.submit_many([row])
+
+    def _take_batch(self) -> list:
+        with self._cond:
+            n = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(n)]
+
+    def _write(self, batch: list) -> bool:
+        start = time.perf_counter()
+        try:
+            with db_cursor(commit=True) as cursor:
+                cursor.executemany(SQL_INSERT_WEATHER_LOG, batch)
+                cursor.executemany(SQL_UPSERT_CURRENT_WEATHER, _latest_per_airport(batch))
+        except Exception as e:
+            with self._cond:
+                # Put the batch back in front so the order is kept
+                self._queue.extendleft(reversed(batch))
+                overflow = len(self._queue) - self.max_queue
+                for _ in range(max(overflow, 0)):
+                    self._queue.popleft()
+                    self._stats["rows_dropped"] += 1
+                self._stats["flush_errors"] += 1
+            print("weather_log flush failed:", e)
+            return False
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._cond:
+            self._stats["flushes"] += 1
+            self._stats["rows_written"] += len(batch)
+            self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+            self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed_ms), 3)
+            self._flush_total_ms += elapsed_ms
+        return True
+
+    def _drain(self) -> bool:
+        """Write batches until the queue is empty. False if a write failed."""
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return True
+                if not self._write(batch):
+                    return False
+
+    def flush(self) -> bool:
+        """Write everything queued right now. False if the DB write failed."""
+        return self._drain()
+
+    def _run(self):
+        failed = False
+        while True:
+            with self._cond:
+                # After a failed write, wait a full interval before retrying
+                if (failed or len(self._queue) < self.batch_size) and not self._closed:
+                    self._cond.wait(self.flush_seconds)
+                closed = self._closed
+            failed = not self._drain()
+            if closed:
+                return
+
+    def close(self, timeout: float = 10.0):
+        """Stop the background thread after a final flush."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        else:
+            self.flush()
+
+    def stats(self) -> dict:
+        with self._cond:
+            flushes = self._stats["flushes"]
+            return {
+                "queue_depth": len(self._queue),
+                "batch_size": self.batch_size,
+                "flush_seconds": self.flush_seconds,
+                **self._stats,
+                "avg_flush_ms": round(self._flush_total_ms / flushes, 3) if flushes else 0.0,
+            }
+
+
+weather_log_writer = WeatherLogWriter(
+    batch_size=WEATHER_LOG_BATCH_SIZE,
+    flush_seconds=WEATHER_LOG_FLUSH_SECONDS,
+    max_queue=WEATHER_LOG_MAX_QUEUE,
+)
+
+# Scripts (main.py, seed scripts) don't run the app lifespan
+atexit.register(weather_log_writer.close)
+
+
+def queue_weather_log(rows: list):
+    """Queue weather_log rows for the next batched write."""
+    weather_log_writer.submit_many(rows)
+
+
+def close_weather_log_writer():
+    """Final flush on app shutdown."""
+    weather_log_writer.close()
+
+
+def get_weather_log_writer_stats() -> dict:
+    """Metrics for the /health/weather endpoint."""
+    return weather_log_writer.stats()
@@ -0,0 +1,149 @@
+# app/services/weather_prefetch.py
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.config import (
+    WEATHER_PREFETCH_INTERVAL_SECONDS,
+    WEATHER_PREFETCH_HORIZON_HOURS,
+    WEATHER_PREFETCH_CONCURRENCY,
+    WEATHER_PREFETCH_MAX_BACKOFF_SECONDS,
+)
+from app.db_async import async_connection
+from app.services.weather_api_service import (
+    fetch_weather_many,
+    cache_weather,
+    weather_log_row,
+)
+from app.services.weather_log_writer import queue_weather_log
+
+# Keeps the weather cache warm for every airport with upcoming departures,
+# so request paths (pricing) read a cached delay risk and never wait on
+# the weather API.
+#
+# One asyncio task, started from the api_main lifespan:
+# - each cycle refreshes all target airports through fetch_weather_many
+#   (shared keep-alive client), at most WEATHER_PREFETCH_CONCURRENCY
+#   upstream calls at a time
+# - cycles are WEATHER_PREFETCH_INTERVAL_SECONDS apart, +/-10% jitter so
+#   several workers don't hit the API in lockstep
+# - an airport that fails is retried with exponential backoff
+#   (capped at WEATHER_PREFETCH_MAX_BACKOFF_SECONDS)
+# - all observations of a cycle are queued for weather_log together
+#   (written by the batched weather_log writer)
+
+SQL_UPCOMING_SOURCE_AIRPORTS = """
+    SELECT DISTINCT r.source_airport
+    FROM flights f
+    JOIN routes r ON f.route_id = r.route_id
+    WHERE f.departure_time >= %s
+      AND f.departure_time < %s
+      AND f.status <> 'CANCELLED'
+"""
+
+BACKOFF_BASE_SECONDS = 30
+
+_task = None
+_backoff = {}  # airport_code -> (consecutive_failures, retry_at monotonic)
+_stats = {
+    "cycles": 0,
+    "airports_targeted": 0,
+    "refreshed": 0,
+    "failures": 0,
+    "skipped_backoff": 0,
+    "last_cycle_at": None,
+    "last_cycle_seconds": None,
+}
+
+
+async def _target_airports() -> list:
+    now = datetime.now()
+    horizon = now + timedelta(hours=WEATHER_PREFETCH_HORIZON_HOURS)
+    async with async_connection() as db:
+        rows = await db.fetch_all(SQL_UPCOMING_SOURCE_AIRPORTS, (now, horizon))
+    return sorted(row["source_airport"] for row in rows)
+
+
+def _record_failure(airport_code: str):
+    failures = _backoff.get(airport_code, (0, 0.0))[0] + 1
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** (failures - 1), WEATHER_PREFETCH_MAX_BACKOFF_SECONDS)
+    # Jitter the retry too, so failing airports spread out
+    _backoff[airport_code] = (failures, time.monotonic() + delay * random.uniform(0.8, 1.2))
+    _stats["failures"] += 1
+
+
+async def refresh_all() -> int:
+    """
+    One prefetch cycle. Returns the number of airports refreshed.
+    """
+    start = time.monotonic()
+    airports = await _target_airports()
+
+    now = time.monotonic()
+    due = [code for code in airports if _backoff.get(code, (0, 0.0))[1] <= now]
+
+    results, errors = await fetch_weather_many(due, concurrency=WEATHER_PREFETCH_CONCURRENCY)
+    for code in errors:
+        _record_failure(code)
+    for code, simplified in results.items():
+        _backoff.pop(code, None)
+        cache_weather(simplified)
+    observations = list(results.values())
+
+    observed_at = datetime.now()
+    queue_weather_log([weather_log_row(s, observed_at) for s in observations])
+
+    _stats["cycles"] += 1
+    _stats["airports_targeted"] = len(airports)
+    _stats["refreshed"] += len(observations)
+    _stats["skipped_backoff"] += len(airports) - len(due)
+    _stats["last_cycle_at"] = datetime.now().isoformat(timespec="seconds")
+    _stats["last_cycle_seconds"] = round(time.monotonic() - start, 3)
+    return len(observations)
+
+
+async def _run():
+    # Small random start delay so workers started together don't sync up
+    await asyncio.sleep(random.uniform(0, 5))
+    while True:
+        try:
+            await refresh_all()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("Weather prefetch cycle failed:", e)
+        await asyncio.sleep(WEATHER_PREFETCH_INTERVAL_SECONDS * random.uniform(0.9, 1.1))
+
+
+def start_weather_prefetch():
+    """Start the background task (call from the app lifespan)."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_run(), name="weather-prefetch")
+
+
+async def stop_weather_prefetch():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def is_prefetch_running() -> bool:
+    return _task is not None and not _task.done()
+
+
+def get_weather_prefetch_stats() -> dict:
+    """Metrics for the /health/weather endpoint."""
+    return {
+        "running": is_prefetch_running(),
+        "interval_seconds": WEATHER_PREFETCH_INTERVAL_SECONDS,
+        "backing_off": len(_backoff),
+        **_stats,
+    }
@@ -0,0 +1,79 @@
+# app/services/weather_retention.py
+
+from datetime import date as date_cls, timedelta
+
+from app.config import WEATHER_LOG_RETENTION_DAYS
+from app.db import db_cursor
+
+# Retention for weather_log: raw rows older than WEATHER_LOG_RETENTION_DAYS
+# are rolled up into weather_log_daily (one row per airport and day) and
+# then deleted. Each day is rolled up and deleted in its own transaction,
+# so an interrupted run can simply be started again.
+
+SQL_OLD_DAYS = """
+    SELECT DISTINCT DATE(timestamp) AS day
+    FROM weather_log
+    WHERE timestamp < %s
+    ORDER BY day
+"""
+
+# Adds to an existing rollup row (a day can be rolled up in several runs,
+# e.g. late rows arriving after the first run)
+SQL_ROLLUP_DAY = """
+    INSERT INTO weather_log_daily
+        (airport_code, day, observations, temperature_sum, temperature_samples,
+         min_temperature, max_temperature,
+         high_risk_count, medium_risk_count, low_risk_count)
+    SELECT
+        airport_code,
+        DATE(timestamp),
+        COUNT(*),
+        COALESCE(SUM(temperature), 0),
+        COUNT(temperature),
+        MIN(temperature),
+        MAX(temperature),
+        SUM(delay_risk = 'HIGH'),
+        SUM(delay_risk = 'MEDIUM'),
+        SUM(delay_risk = 'LOW')
+    FROM weather_log
+    WHERE timestamp >= %s AND timestamp < %s
+    GROUP BY airport_code, DATE(timestamp)
+    ON DUPLICATE KEY UPDATE
+        observations = observations + VALUES(observations),
+        temperature_sum = temperature_sum + VALUES(temperature_sum),
+        temperature_samples = temperature_samples + VALUES(temperature_samples),
+        min_temperature = LEAST(COALESCE(min_temperature, VALUES(min_temperature)),
+                                COALESCE(VALUES(min_temperature), min_temperature)),
+        max_temperature = GREATEST(COALESCE(max_temperature, VALUES(max_temperature)),
+                                   COALESCE(VALUES(max_temperature), max_temperature)),
+        high_risk_count = high_risk_count + VALUES(high_risk_count),
+        medium_risk_count = medium_risk_count + VALUES(medium_risk_count),
+        low_risk_count = low_risk_count + VALUES(low_risk_count)
+"""
+
+SQL_DELETE_DAY = """
+    DELETE FROM weather_log
+    WHERE timestamp >= %s AND timestamp < %s
+"""
+
+
+def rollup_and_prune_weather_log(retention_days: int = WEATHER_LOG_RETENTION_DAYS) -> dict:
+    """
+    Roll up and delete weather_log rows older than retention_days
+    (whole days only). Returns {"days": n, "rows_deleted": n}.
+    """
+    cutoff = date_cls.today() - timedelta(days=retention_days)
+
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute(SQL_OLD_DAYS, (cutoff,))
+        days = [row["day"] for row in cursor.fetchall()]
+
+    rows_deleted = 0
+    for day in days:
+        bounds = (day, day + timedelta(days=1))
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(SQL_ROLLUP_DAY, bounds)
+            cursor.execute(SQL_DELETE_DAY, bounds)
+            rows_deleted += cursor.rowcount
+
+    return {"days": len(days), "rows_deleted": rows_deleted}
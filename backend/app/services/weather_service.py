@@ -1,54 +1,36 @@
 # app/services/weather_service.py
 
 from datetime import datetime
-from app.db import get_connection
+from app.db import db_cursor
+from app.services.weather_log_writer import queue_weather_log
 
 
 def add_weather_record(airport_code: str, condition: str, delay_risk: str):
     """
     Insert a weather record for an airport.
     delay_risk should be one of: 'LOW', 'MEDIUM', 'HIGH'.
-    """
-    conn = get_connection()
-    cursor = conn.cursor()
 
-    sql = """
-        INSERT INTO weather_log (airport_code, weather_condition, delay_risk, timestamp)
-        VALUES (%s, %s, %s, %s)
+    The row is queued and written in a batch by the weather_log writer
+    (within WEATHER_LOG_FLUSH_SECONDS), so no id is returned.
     """
-
     now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    values = (airport_code, condition, delay_risk, now_str)
-
-    try:
-        cursor.execute(sql, values)
-        conn.commit()
-        return cursor.lastrowid
-    finally:
-        cursor.close()
-        conn.close()
+    queue_weather_log([(airport_code, None, condition, delay_risk, now_str)])
 
 
 def get_latest_weather(airport_code: str):
     """
     Get the most recent weather record for the given airport.
     Returns a dictionary with condition, delay_risk, timestamp or None.
-    """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
 
+    Reads the current_weather snapshot (primary key lookup), which the
+    weather_log writer keeps up to date on every flush.
+    """
     sql = """
-        SELECT airport_code, weather_condition, delay_risk, timestamp
-        FROM weather_log
+        SELECT airport_code, weather_condition, delay_risk, observed_at AS timestamp
+        FROM current_weather
         WHERE airport_code = %s
-        ORDER BY timestamp DESC
-        LIMIT 1
     """
 
-    cursor.execute(sql, (airport_code,))
-    row = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
-
-    return row
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute(sql, (airport_code,))
+        return cursor.fetchone()
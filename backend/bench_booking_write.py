@@ -0,0 +1,104 @@
+# bench_booking_write.py
+#
+# Time the booking write path for 1 / 10 / 100-passenger bookings:
+#   - encryption of passenger fields
+#   - the DB statements (seat inventory, booking row, passengers)
+# comparing one INSERT per passenger with the executemany path.
+# Every booking runs in a transaction that is rolled back, so the
+# database is left unchanged.
+#
+#   python bench_booking_write.py <flight_id> [user_id] [repeats]
+#
+# The flight needs at least 100 free seats.
+
+import statistics
+import sys
+import time
+
+from app.db import get_connection
+from app.services.booking_service import (
+    SQL_INSERT_BOOKING,
+    SQL_INSERT_PASSENGER,
+    _encrypt_passenger,
+    _encrypt_passengers,
+    _new_booking_tokens,
+    _passenger_rows,
+    _write_booking,
+)
+from app.services.seat_inventory import seats_for_passengers, take_seats
+
+GROUP_SIZES = (1, 10, 100)
+
+
+def _passengers(n: int) -> list:
+    return [
+        {"name": f"Passenger {i}", "age": 30, "id_proof": f"AADHAAR{i:08d}", "contact": "9876543210"}
+        for i in range(n)
+    ]
+
+
+def _row_by_row(cursor, user_id, flight_id, encrypted, price_paid):
+    """The old path: same statements as _write_booking, but one INSERT per passenger."""
+    leg = {"flight_id": flight_id, "seat_no": "", "price_paid": price_paid}
+    timestamp_str, (token,) = _new_booking_tokens(user_id, [leg])
+    take_seats(cursor, flight_id, seats_for_passengers(encrypted))
+    cursor.execute(SQL_INSERT_BOOKING, (user_id, flight_id, "", token, timestamp_str, price_paid))
+    booking_id = cursor.lastrowid
+    for row in _passenger_rows(booking_id, encrypted):
+        cursor.execute(SQL_INSERT_PASSENGER, row)
+
+
+def _bulk(cursor, user_id, flight_id, encrypted, price_paid):
+    _write_booking(cursor, user_id, flight_id, "", encrypted, price_paid)
+
+
+def _time_db(write, user_id, flight_id, encrypted, repeats) -> float:
+    timings = []
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            write(cursor, user_id, flight_id, encrypted, 1000.0)
+            timings.append(time.perf_counter() - t0)
+            conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+    return statistics.median(timings) * 1000
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python bench_booking_write.py <flight_id> [user_id] [repeats]")
+        sys.exit(1)
+
+    flight_id = int(sys.argv[1])
+    user_id = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    print(f"{'passengers':>10} {'encrypt':>10} {'encrypt*':>10} {'row-by-row':>11} {'executemany':>12}")
+    for n in GROUP_SIZES:
+        passengers = _passengers(n)
+
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            [_encrypt_passenger(p) for p in passengers]
+        serial_ms = (time.perf_counter() - t0) / repeats * 1000
+
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            encrypted = _encrypt_passengers(passengers)
+        encrypt_ms = (time.perf_counter() - t0) / repeats * 1000
+
+        row_ms = _time_db(_row_by_row, user_id, flight_id, encrypted, repeats)
+        bulk_ms = _time_db(_bulk, user_id, flight_id, encrypted, repeats)
+
+        print(f"{n:>10} {serial_ms:>8.2f}ms {encrypt_ms:>8.2f}ms {row_ms:>9.2f}ms {bulk_ms:>10.2f}ms")
+
+    print("encrypt* = _encrypt_passengers (thread pool for large groups); "
+          "DB times are medians, all rolled back")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench_path_search.py
+#
+# Compare how many airports each search strategy expands on a synthetic
+# dense domestic network (no DB needed).
+#
+#   python bench_path_search.py [max_leg_km] [detour_max]
+
+import random
+import sys
+import time
+
+from app.services.airport_coords import AIRPORT_COORDS, great_circle_km
+from app.services.route_graph import RouteGraph, SEARCH_ALGORITHMS
+
+
+def build_synthetic_network(max_leg_km: float = 1500, detour_max: float = 1.15, seed: int = 42):
+    """
+    Connect every pair of bundled airports closer than max_leg_km.
+    Route distance = great-circle distance * random detour factor.
+    """
+    rng = random.Random(seed)
+    codes = sorted(AIRPORT_COORDS)
+    edges = []
+
+    for i, a in enumerate(codes):
+        for b in codes[i + 1:]:
+            gc = great_circle_km(*AIRPORT_COORDS[a], *AIRPORT_COORDS[b])
+            if gc <= max_leg_km:
+                dist = int(gc * rng.uniform(1.0, detour_max))
+                edges.append((a, b, dist))
+                edges.append((b, a, dist))
+
+    return RouteGraph.from_edges(edges, coords=AIRPORT_COORDS, symmetric=True)
+
+
+def main():
+    max_leg_km = float(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    detour_max = float(sys.argv[2]) if len(sys.argv) > 2 else 1.15
+
+    graph = build_synthetic_network(max_leg_km, detour_max)
+    print(f"Network: {graph.airport_count} airports, {graph.edge_count} directed edges")
+    print(f"Heuristic scale: {graph.heuristic_scale:.3f}")
+
+    pairs = [(a, b) for a in graph.codes for b in graph.codes if a != b]
+
+    baseline = {}
+    for algorithm in SEARCH_ALGORITHMS:
+        expanded = 0
+        start = time.perf_counter()
+
+        for a, b in pairs:
+            result = graph.shortest_path(a, b, algorithm)
+            expanded += result["expanded"]
+
+            # Every strategy must agree on the shortest distance
+            if algorithm == "dijkstra":
+                baseline[(a, b)] = result["total_distance"]
+            elif result["total_distance"] != baseline[(a, b)]:
+                raise AssertionError(f"{algorithm} disagrees on {a}->{b}")
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"{algorithm:>14}: {expanded / len(pairs):6.1f} airports expanded/query, "
+            f"{elapsed_ms / len(pairs):.3f} ms/query"
+        )
+
+
+if __name__ == "__main__":
+    main()
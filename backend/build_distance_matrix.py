@@ -0,0 +1,22 @@
+# build_distance_matrix.py
+#
+# Precompute the all-pairs distance / next-hop matrix from the routes table
+# and write it to DISTANCE_MATRIX_DIR, where API workers memory-map it.
+
+from app.config import DISTANCE_MATRIX_DIR
+from app.services.distance_matrix import build_distance_matrix
+from app.services.route_graph_cache import get_route_graph
+
+
+def main():
+    print("Loading routes...")
+    graph = get_route_graph()
+    print(f"{graph.airport_count} airports, {graph.edge_count} directed edges")
+
+    print("Computing all-pairs shortest distances...")
+    build_distance_matrix(graph)
+    print(f"Distance matrix saved to: {DISTANCE_MATRIX_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# loadtest_db_paths.py
+#
+# Compare the sync data-access path (blocking mysql.connector calls in a
+# thread pool, which is how FastAPI runs sync `def` routes) with the async
+# path (app/db_async.py on the event loop) for the same read query.
+#
+#   python loadtest_db_paths.py <user_id> [requests] [concurrency]
+
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db_async import init_async_pool, close_async_pool
+from app.services.booking_service import get_user_bookings, get_user_bookings_async
+
+# Starlette's default threadpool size for sync routes
+SYNC_WORKERS = 40
+
+
+def _report(label: str, latencies: list, elapsed: float):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:>5}: {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+        f"p99 {p99 * 1000:7.2f} ms"
+    )
+
+
+def run_sync(user_id: int, requests: int):
+    latencies = []
+
+    def one(_):
+        t0 = time.perf_counter()
+        get_user_bookings(user_id)
+        latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as pool:
+        list(pool.map(one, range(requests)))
+    _report("sync", latencies, time.perf_counter() - start)
+
+
+async def run_async(user_id: int, requests: int, concurrency: int):
+    await init_async_pool()
+    latencies = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            t0 = time.perf_counter()
+            await get_user_bookings_async(user_id)
+            latencies.append(time.perf_counter() - t0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    _report("async", latencies, time.perf_counter() - start)
+    await close_async_pool()
+
+
+def main():
+    user_id = int(sys.argv[1])
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    print(f"{requests} requests, get_user_bookings({user_id})")
+    run_sync(user_id, requests)
+    asyncio.run(run_async(user_id, requests, concurrency))
+
+
+if __name__ == "__main__":
+    main()
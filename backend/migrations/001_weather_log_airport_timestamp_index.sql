@@ -0,0 +1,3 @@
+-- Latest / range reads of weather_log are always per airport, newest first.
+CREATE INDEX idx_weather_log_airport_ts
+    ON weather_log (airport_code, timestamp);
@@ -0,0 +1,26 @@
+-- One row per airport: the latest observation, kept up to date by the
+-- weather_log writer (upsert on every flush). get_latest_weather reads it
+-- by primary key instead of sorting weather_log.
+CREATE TABLE IF NOT EXISTS current_weather (
+    airport_code      VARCHAR(10)  NOT NULL PRIMARY KEY,
+    temperature       FLOAT        NULL,
+    weather_condition VARCHAR(100) NULL,
+    delay_risk        VARCHAR(10)  NOT NULL,
+    observed_at       DATETIME     NOT NULL
+);
+
+-- Backfill from the existing history
+INSERT INTO current_weather
+    (airport_code, temperature, weather_condition, delay_risk, observed_at)
+SELECT w.airport_code, w.temperature, w.weather_condition, w.delay_risk, w.timestamp
+FROM weather_log w
+JOIN (
+    SELECT airport_code, MAX(timestamp) AS latest
+    FROM weather_log
+    GROUP BY airport_code
+) m ON m.airport_code = w.airport_code AND m.latest = w.timestamp
+ON DUPLICATE KEY UPDATE
+    temperature = VALUES(temperature),
+    weather_condition = VALUES(weather_condition),
+    delay_risk = VALUES(delay_risk),
+    observed_at = VALUES(observed_at);
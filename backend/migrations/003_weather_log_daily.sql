@@ -0,0 +1,15 @@
+-- Daily per-airport rollup of weather_log rows older than the retention
+-- window (see prune_weather_log.py). The raw rows are deleted afterwards.
+CREATE TABLE IF NOT EXISTS weather_log_daily (
+    airport_code        VARCHAR(10) NOT NULL,
+    day                 DATE        NOT NULL,
+    observations        INT         NOT NULL,
+    temperature_sum     DOUBLE      NOT NULL DEFAULT 0,
+    temperature_samples INT         NOT NULL DEFAULT 0,
+    min_temperature     FLOAT       NULL,
+    max_temperature     FLOAT       NULL,
+    high_risk_count     INT         NOT NULL DEFAULT 0,
+    medium_risk_count   INT         NOT NULL DEFAULT 0,
+    low_risk_count      INT         NOT NULL DEFAULT 0,
+    PRIMARY KEY (airport_code, day)
+);
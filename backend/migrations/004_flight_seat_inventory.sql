@@ -0,0 +1,30 @@
+-- Per-flight seat counter, decremented / incremented inside the booking
+-- and cancellation transactions (app/services/seat_inventory.py).
+ALTER TABLE flights
+    ADD COLUMN seats_available INT NULL;
+
+-- Capacity minus live bookings (one seat per passenger, at least one per booking)
+UPDATE flights f
+JOIN aircraft a ON a.aircraft_id = f.aircraft_id
+SET f.seats_available = GREATEST(
+    a.seat_capacity - (
+        SELECT COALESCE(SUM(GREATEST(
+            (SELECT COUNT(*) FROM passenger_details p WHERE p.booking_id = b.booking_id), 1
+        )), 0)
+        FROM bookings b
+        WHERE b.flight_id = f.flight_id AND b.status <> 'CANCELLED'
+    ),
+    0
+);
+
+ALTER TABLE flights
+    ADD CONSTRAINT chk_flights_seats_available CHECK (seats_available >= 0);
+
+-- New flights start with the aircraft's full capacity
+CREATE TRIGGER trg_flights_seats_available
+BEFORE INSERT ON flights
+FOR EACH ROW
+SET NEW.seats_available = COALESCE(
+    NEW.seats_available,
+    (SELECT seat_capacity FROM aircraft WHERE aircraft_id = NEW.aircraft_id)
+);
@@ -0,0 +1,39 @@
+-- One row per seat that is booked or held (app/services/seat_map.py).
+-- The primary key is what makes allocation safe: two transactions can
+-- never both own (flight_id, seat_no), and contention stays on that row.
+CREATE TABLE IF NOT EXISTS seat_allocations (
+    flight_id       INT         NOT NULL,
+    seat_no         VARCHAR(5)  NOT NULL,
+    booking_id      INT         NULL,      -- set once booked
+    held_by         INT         NULL,      -- user holding it during checkout
+    hold_expires_at DATETIME    NULL,
+    updated_at      DATETIME    NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (flight_id, seat_no),
+    KEY idx_seat_allocations_booking (booking_id)
+);
+
+-- Seats of existing bookings. seat_no may list several seats ("12A,12B"),
+-- so split it the way seat_map.parse_seats does (trim, upper case) into
+-- one row per seat. Values that can't be a seat label (longer than the
+-- column) are left out rather than truncated.
+INSERT IGNORE INTO seat_allocations (flight_id, seat_no, booking_id)
+WITH RECURSIVE booked_seats (flight_id, booking_id, seat_no, rest) AS (
+    SELECT
+        flight_id,
+        booking_id,
+        UPPER(TRIM(SUBSTRING_INDEX(seat_no, ',', 1))),
+        IF(LOCATE(',', seat_no) > 0, SUBSTRING(seat_no, LOCATE(',', seat_no) + 1), NULL)
+    FROM bookings
+    WHERE status <> 'CANCELLED' AND seat_no IS NOT NULL AND seat_no <> ''
+    UNION ALL
+    SELECT
+        flight_id,
+        booking_id,
+        UPPER(TRIM(SUBSTRING_INDEX(rest, ',', 1))),
+        IF(LOCATE(',', rest) > 0, SUBSTRING(rest, LOCATE(',', rest) + 1), NULL)
+    FROM booked_seats
+    WHERE rest IS NOT NULL
+)
+SELECT flight_id, seat_no, booking_id
+FROM booked_seats
+WHERE seat_no <> '' AND CHAR_LENGTH(seat_no) <= 5;
@@ -0,0 +1,16 @@
+-- Stored responses for Idempotency-Key retries (app/services/idempotency.py).
+-- The primary key is the lock: the first request for a key inserts its
+-- row (response_body NULL, locked_until set) and every duplicate, in any
+-- worker, finds it. Rows older than IDEMPOTENCY_TTL_HOURS are pruned by
+-- prune_idempotency_keys.py.
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id       INT          NOT NULL,
+    scope         VARCHAR(32)  NOT NULL,      -- endpoint, e.g. 'bookings/create'
+    idem_key      VARCHAR(255) NOT NULL,
+    request_hash  CHAR(64)     NOT NULL,      -- HMAC-SHA256 (SECRET_KEY) of the request body
+    response_body MEDIUMTEXT   NULL,          -- JSON, NULL while in flight
+    locked_until  DATETIME     NULL,          -- in-flight claim expiry
+    created_at    DATETIME     NOT NULL,
+    PRIMARY KEY (user_id, scope, idem_key),
+    KEY idx_idempotency_keys_created (created_at)
+);
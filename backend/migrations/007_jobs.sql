@@ -0,0 +1,22 @@
+-- Durable background jobs (app/services/job_queue.py).
+-- run_after is "next time a worker may pick this job up": the enqueue /
+-- retry time for QUEUED jobs, the lease expiry for RUNNING ones (a job
+-- whose worker died is picked up again once its lease has passed).
+-- dedup_key is only set while the job is QUEUED or RUNNING, so the same
+-- key can be enqueued again once the earlier job has finished.
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id       BIGINT       NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    kind         VARCHAR(64)  NOT NULL,
+    payload      TEXT         NOT NULL,         -- JSON
+    dedup_key    VARCHAR(191) NULL,
+    status       ENUM('QUEUED', 'RUNNING', 'DONE', 'FAILED') NOT NULL DEFAULT 'QUEUED',
+    attempts     INT          NOT NULL DEFAULT 0,
+    max_attempts INT          NOT NULL,
+    run_after    DATETIME     NOT NULL,
+    result       TEXT         NULL,             -- JSON returned by the handler
+    last_error   TEXT         NULL,
+    created_at   DATETIME     NOT NULL,
+    finished_at  DATETIME     NULL,
+    UNIQUE KEY uq_jobs_dedup_key (dedup_key),
+    KEY idx_jobs_status_run_after (status, run_after)
+);
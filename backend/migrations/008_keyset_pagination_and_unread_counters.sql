@@ -0,0 +1,24 @@
+-- Keyset pagination (app/services/pagination.py): each page is an index
+-- range scan starting right after the previous page's last row.
+CREATE INDEX idx_notifications_user_created
+    ON notifications (user_id, created_at, notification_id);
+
+CREATE INDEX idx_notifications_user_unread_created
+    ON notifications (user_id, is_read, created_at, notification_id);
+
+CREATE INDEX idx_bookings_user_booked
+    ON bookings (user_id, booked_at, booking_id);
+
+-- Unread notifications per user, kept in sync by notification_service
+-- in the same transactions that insert / mark notifications.
+CREATE TABLE IF NOT EXISTS notification_counters (
+    user_id INT NOT NULL PRIMARY KEY,
+    unread  INT NOT NULL DEFAULT 0
+);
+
+INSERT INTO notification_counters (user_id, unread)
+SELECT user_id, COUNT(*)
+FROM notifications
+WHERE is_read = FALSE
+GROUP BY user_id
+ON DUPLICATE KEY UPDATE unread = VALUES(unread);
@@ -0,0 +1,10 @@
+-- Seat letters of one row of the aircraft's cabin, left to right
+-- (app/services/seat_map.py): 'ABCDEF' for six-abreast narrow-bodies,
+-- 'ABCD' for a four-abreast turboprop. Seat i is row i // len + 1,
+-- letter seat_letters[i % len].
+ALTER TABLE aircraft
+    ADD COLUMN seat_letters VARCHAR(10) NOT NULL DEFAULT 'ABCDEF';
+
+UPDATE aircraft
+SET seat_letters = 'ABCD'
+WHERE model LIKE 'ATR%';
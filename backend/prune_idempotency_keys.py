@@ -0,0 +1,21 @@
+# prune_idempotency_keys.py
+#
+# Delete stored Idempotency-Key responses older than IDEMPOTENCY_TTL_HOURS.
+# Meant to run daily (cron), next to prune_weather_log.py.
+#
+#   python prune_idempotency_keys.py [ttl_hours]
+
+import sys
+
+from app.config import IDEMPOTENCY_TTL_HOURS
+from app.services.idempotency import prune_idempotency_keys
+
+
+def main():
+    ttl_hours = int(sys.argv[1]) if len(sys.argv) > 1 else IDEMPOTENCY_TTL_HOURS
+    deleted = prune_idempotency_keys(ttl_hours)
+    print(f"Deleted {deleted} idempotency key(s) older than {ttl_hours} hours.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+# prune_jobs.py
+#
+# Delete DONE / FAILED background jobs finished more than
+# JOB_RETENTION_DAYS ago. Meant to run daily (cron).
+#
+#   python prune_jobs.py [retention_days]
+
+import sys
+
+from app.config import JOB_RETENTION_DAYS
+from app.services.job_queue import prune_finished_jobs
+
+
+def main():
+    retention_days = int(sys.argv[1]) if len(sys.argv) > 1 else JOB_RETENTION_DAYS
+    deleted = prune_finished_jobs(retention_days)
+    print(f"Deleted {deleted} finished job(s) older than {retention_days} days.")
+
+
+if __name__ == "__main__":
+    main()
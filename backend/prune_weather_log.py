@@ -0,0 +1,25 @@
+# prune_weather_log.py
+#
+# Roll up weather_log rows older than WEATHER_LOG_RETENTION_DAYS into
+# weather_log_daily and delete them. Meant to run daily (cron).
+#
+#   python prune_weather_log.py [retention_days]
+
+import sys
+
+from app.config import WEATHER_LOG_RETENTION_DAYS
+from app.services.weather_retention import rollup_and_prune_weather_log
+
+
+def main():
+    retention_days = int(sys.argv[1]) if len(sys.argv) > 1 else WEATHER_LOG_RETENTION_DAYS
+    result = rollup_and_prune_weather_log(retention_days)
+    print(
+        f"Rolled up {result['days']} day(s), "
+        f"deleted {result['rows_deleted']} weather_log row(s) "
+        f"older than {retention_days} days."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# run_migrations.py
+#
+# Apply the SQL files in migrations/ in name order. Applied files are
+# recorded in schema_migrations, so running this again only applies new ones.
+#
+#   python run_migrations.py
+
+from pathlib import Path
+
+from app.db import get_connection
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+SQL_CREATE_SCHEMA_MIGRATIONS = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        name       VARCHAR(255) NOT NULL PRIMARY KEY,
+        applied_at DATETIME     NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _statements(sql: str) -> list:
+    """Split a migration file on ';' (files don't use ';' inside strings)."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def main():
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute(SQL_CREATE_SCHEMA_MIGRATIONS)
+        cursor.execute("SELECT name FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        pending = [p for p in sorted(MIGRATIONS_DIR.glob("*.sql")) if p.name not in applied]
+        if not pending:
+            print("No pending migrations.")
+            return
+
+        for path in pending:
+            print(f"Applying {path.name}...")
+            # MySQL commits DDL implicitly, so each statement stands alone;
+            # the file is only recorded once all of them succeeded.
+            for stmt in _statements(path.read_text()):
+                cursor.execute(stmt)
+            cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (path.name,))
+            conn.commit()
+
+        print(f"Applied {len(pending)} migration(s).")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
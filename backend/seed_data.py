@@ -39,6 +39,7 @@ def seed_routes():
         cursor.executemany(sql, data)
         conn.commit()
         print(f"Inserted {cursor.rowcount} route rows.")
+        print("Running API? POST /admin/route-graph/invalidate to reload its route graph.")
     finally:
         cursor.close()
         conn.close()
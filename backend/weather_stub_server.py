@@ -0,0 +1,87 @@
+# weather_stub_server.py
+#
+# Tiny local stand-in for the OpenWeather "current weather" API, so the
+# weather cache and pricing path can be exercised without a real API key
+# or network access.
+#
+#   python weather_stub_server.py [port] [delay_seconds]
+#
+# Then run the API with:
+#   OPENWEATHER_BASE_URL=http://127.0.0.1:8099 OPENWEATHER_API_KEY=stub
+#
+# Every request is counted, so you can check that concurrent misses were
+# coalesced: GET /stats
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# city -> condition, anything else is "clear sky"
+CONDITIONS = {
+    "Mumbai": "moderate rain",
+    "Delhi": "haze",
+    "Chennai": "thunderstorm",
+    "Bengaluru": "scattered clouds",
+}
+
+_lock = threading.Lock()
+_calls = {}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    delay = 0.0
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+
+        if url.path == "/stats":
+            with _lock:
+                return self._send(200, {"calls": dict(_calls)})
+
+        if url.path != "/weather":
+            return self._send(404, {"message": "not found"})
+
+        city = parse_qs(url.query).get("q", [""])[0]
+        with _lock:
+            _calls[city] = _calls.get(city, 0) + 1
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        self._send(200, {
+            "name": city,
+            "main": {"temp": 28.5},
+            "weather": [{"description": CONDITIONS.get(city, "clear sky")}],
+        })
+
+    def log_message(self, fmt, *args):
+        pass  # keep the console quiet
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8099
+    StubHandler.delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+
+    ThreadingHTTPServer.request_queue_size = 128  # bulk fetches open many sockets at once
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    print(f"Weather stub listening on http://127.0.0.1:{port} (delay {StubHandler.delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()